@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from accounts.api.serializers import StudentSerializer, TeacherSerializer
+from school_management_system.compiled_serializers import CompiledListSerializer
 
 from accounts.models import Student, Teacher
 from ..models import (
@@ -60,6 +61,7 @@ class StudentEnrollmentSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = StudentEnrollment
+        list_serializer_class = CompiledListSerializer
         fields = '__all__'
 
 
@@ -1,6 +1,10 @@
 from rest_framework.viewsets import ReadOnlyModelViewSet
 from rest_framework.permissions import IsAuthenticated
 
+from school_management_system.conditional import ConditionalGetMixin
+from school_management_system.response_cache import ResponseCacheMixin
+from school_management_system.sparse_fields import SparseFieldsMixin
+
 from ..models import (
 	AcademicYear,
 	ClassTeacher,
@@ -27,43 +31,43 @@ from .filters import (
 )
 
 
-class AcademicYearReadOnlyViewSet(ReadOnlyModelViewSet):
+class AcademicYearReadOnlyViewSet(ResponseCacheMixin, ConditionalGetMixin, SparseFieldsMixin, ReadOnlyModelViewSet):
 	queryset = AcademicYear.objects.all()
 	serializer_class = AcademicYearSerializer
 	permission_classes = [IsAuthenticated]
 	filterset_class = AcademicYearFilter
 
 
-class StandardReadOnlyViewSet(ReadOnlyModelViewSet):
+class StandardReadOnlyViewSet(ResponseCacheMixin, ConditionalGetMixin, SparseFieldsMixin, ReadOnlyModelViewSet):
 	queryset = Standard.objects.all()
 	serializer_class = StandardSerializer
 	permission_classes = [IsAuthenticated]
 	filterset_class = StandardFilter
 
 
-class SubjectReadOnlyViewSet(ReadOnlyModelViewSet):
+class SubjectReadOnlyViewSet(ResponseCacheMixin, ConditionalGetMixin, SparseFieldsMixin, ReadOnlyModelViewSet):
 	queryset = Subject.objects.select_related('standard')
 	serializer_class = SubjectSerializer
 	permission_classes = [IsAuthenticated]
 	filterset_class = SubjectFilter
 
 
-class StudentEnrollmentReadOnlyViewSet(ReadOnlyModelViewSet):
+class StudentEnrollmentReadOnlyViewSet(ConditionalGetMixin, SparseFieldsMixin, ReadOnlyModelViewSet):
 	queryset = StudentEnrollment.objects.select_related('student', 'standard', 'academic_year')
 	serializer_class = StudentEnrollmentSerializer
 	permission_classes = [IsAuthenticated]
 	filterset_class = StudentEnrollmentFilter
 
 
-class ClassTeacherReadOnlyViewSet(ReadOnlyModelViewSet):
+class ClassTeacherReadOnlyViewSet(ResponseCacheMixin, ConditionalGetMixin, SparseFieldsMixin, ReadOnlyModelViewSet):
 	queryset = ClassTeacher.objects.select_related('standard', 'teacher', 'academic_year')
 	serializer_class = ClassTeacherSerializer
 	permission_classes = [IsAuthenticated]
 	filterset_class = ClassTeacherFilter
 
 
-class TeacherSubjectReadOnlyViewSet(ReadOnlyModelViewSet):
-	queryset = TeacherSubject.objects.select_related('subject', 'teacher', 'academic_year')
+class TeacherSubjectReadOnlyViewSet(ResponseCacheMixin, ConditionalGetMixin, SparseFieldsMixin, ReadOnlyModelViewSet):
+	queryset = TeacherSubject.objects.select_related('subject__standard', 'teacher', 'academic_year')
 	serializer_class = TeacherSubjectSerializer
 	permission_classes = [IsAuthenticated]
 	filterset_class = TeacherSubjectFilter
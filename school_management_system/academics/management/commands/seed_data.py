@@ -7,7 +7,9 @@ from faker import Faker
 
 from academics.models import AcademicYear, Standard, Subject, StudentEnrollment, ClassTeacher, TeacherSubject
 from activities.models import Exam, ExamSubject, SubjectResult
+from activities.results import defer_summary_updates
 from accounts.models import Student, Teacher
+from school_management_system.nepali_dates import to_bs
 import nepali_datetime
 
 
@@ -56,7 +58,7 @@ class Command(BaseCommand):
         )
         if not academic_year.is_current:
             academic_year.is_current = True
-            academic_year.save(update_fields=["is_current"])
+            academic_year.save(update_fields=["is_current", "updated_at"])
 
         standards = []
         for class_number in range(1, 11):
@@ -111,11 +113,6 @@ class Command(BaseCommand):
             roll_counter = 1
             for _ in range(20):
                 dob_ad = fake.date_between(start_date="-18y", end_date="-10y")
-                try:
-                    dob_bs = nepali_datetime.date.from_datetime_date(dob_ad)
-                except Exception:
-                    dob_bs = current_nepali_date
-
                 student = Student.objects.create(
                     first_name=fake.first_name(),
                     middle_name=fake.first_name() if random.random() < 0.3 else "",
@@ -124,7 +121,7 @@ class Command(BaseCommand):
                     email=fake.unique.email(),
                     phone=self._safe_phone(fake),
                     date_of_birth=dob_ad,
-                    date_of_birth_bs=dob_bs,
+                    date_of_birth_bs=to_bs(dob_ad),
                     admission_number=f"{current_year_name}-{admission_counter:04d}",
                 )
                 admission_counter += 1
@@ -169,24 +166,26 @@ class Command(BaseCommand):
         for exam_subject in ExamSubject.objects.select_related("subject"):
             exam_subjects_by_standard.setdefault(exam_subject.subject.standard_id, []).append(exam_subject)
 
-        for enrollment in enrollments:
-            for exam_subject in exam_subjects_by_standard.get(enrollment.standard_id, []):
-                full_theory = exam_subject.full_marks_theory
-                full_practical = exam_subject.full_marks_practical
-
-                if random.random() < 0.2:
-                    theory_score = self._random_decimal(Decimal("0"), full_theory * Decimal("0.34"))
-                    practical_score = self._random_decimal(Decimal("0"), full_practical * Decimal("0.34"))
-                else:
-                    theory_score = self._random_decimal(full_theory * Decimal("0.4"), full_theory)
-                    practical_score = self._random_decimal(full_practical * Decimal("0.4"), full_practical)
-
-                SubjectResult.objects.create(
-                    student=enrollment,
-                    exam_subject=exam_subject,
-                    marks_obtained_theory=theory_score,
-                    marks_obtained_practical=practical_score,
-                )
+        # Summaries are recomputed once for all results when the seed commits
+        with defer_summary_updates():
+            for enrollment in enrollments:
+                for exam_subject in exam_subjects_by_standard.get(enrollment.standard_id, []):
+                    full_theory = exam_subject.full_marks_theory
+                    full_practical = exam_subject.full_marks_practical
+
+                    if random.random() < 0.2:
+                        theory_score = self._random_decimal(Decimal("0"), full_theory * Decimal("0.34"))
+                        practical_score = self._random_decimal(Decimal("0"), full_practical * Decimal("0.34"))
+                    else:
+                        theory_score = self._random_decimal(full_theory * Decimal("0.4"), full_theory)
+                        practical_score = self._random_decimal(full_practical * Decimal("0.4"), full_practical)
+
+                    SubjectResult.objects.create(
+                        student=enrollment,
+                        exam_subject=exam_subject,
+                        marks_obtained_theory=theory_score,
+                        marks_obtained_practical=practical_score,
+                    )
 
         self.stdout.write(self.style.SUCCESS("Seeding completed successfully."))
 
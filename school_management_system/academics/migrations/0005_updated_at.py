@@ -0,0 +1,23 @@
+# Generated by Django 6.1.2 on 2026-10-17 04:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0004_alter_teachersubject_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='classteacher',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='teachersubject',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -111,6 +111,7 @@ class ClassTeacher(models.Model):
     standard = models.ForeignKey(Standard, on_delete=models.PROTECT)
     teacher = models.ForeignKey('accounts.Teacher', on_delete=models.PROTECT)
     academic_year = models.ForeignKey(AcademicYear, on_delete=models.PROTECT)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ('teacher', 'standard', 'academic_year')
@@ -126,6 +127,7 @@ class TeacherSubject(models.Model):
     teacher = models.ForeignKey('accounts.Teacher', on_delete=models.CASCADE)
     subject = models.ForeignKey(Subject, on_delete=models.CASCADE)
     academic_year = models.ForeignKey(AcademicYear, on_delete=models.PROTECT)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = 'Subject Teacher'
@@ -0,0 +1,7 @@
+from accounts.models import Teacher
+from school_management_system.response_cache import track_versions
+from .models import AcademicYear, ClassTeacher, Standard, Subject, TeacherSubject
+
+# The reference-data endpoints cache their responses against the
+# versions of these models
+track_versions(AcademicYear, Standard, Subject, ClassTeacher, TeacherSubject, Teacher)
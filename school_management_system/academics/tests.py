@@ -1,3 +1,62 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from academics.models import Standard, Subject
+
+User = get_user_model()
+
+
+class ResponseCacheTestCase(TestCase):
+    """Test cases for the versioned response cache of the reference-data endpoints."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('teacher', password='secret'))
+        self.standard = Standard.objects.create(name='Class 10', section='A')
+        Subject.objects.create(name='Mathematics', code='C10-1', standard=self.standard, credit_hours=4)
+
+    def test_repeated_requests_are_served_from_the_cache(self):
+        url = reverse('subjects-readonly-list')
+        first = self.client.get(url)
+
+        # No ETag, COUNT, page or serialization
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+        self.assertEqual(second.data, first.data)
+
+        # The cached ETag still answers conditional requests
+        self.assertEqual(second.headers['ETag'], first.headers['ETag'])
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=first.headers['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+        # Other query strings are cached separately
+        response = self.client.get(url, {'fields': 'id,name'})
+        self.assertEqual(set(response.data['results'][0]), {'id', 'name'})
+
+    def test_saves_and_deletes_invalidate(self):
+        url = reverse('subjects-readonly-list')
+        self.client.get(url)
+
+        # Subjects render their standard, so its version is part of the key
+        self.standard.section = 'B'
+        self.standard.save()
+        response = self.client.get(url)
+        self.assertEqual(response.data['results'][0]['standard']['section'], 'B')
+
+        Subject.objects.get().delete()
+        self.assertEqual(self.client.get(url).data['count'], 0)
+
+    def test_detail_responses_are_cached(self):
+        url = reverse('standards-readonly-detail', args=[self.standard.pk])
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).data['name'], 'Class 10')
+
+        self.standard.name = 'Class Ten'
+        self.standard.save()
+        self.assertEqual(self.client.get(url).data['name'], 'Class Ten')
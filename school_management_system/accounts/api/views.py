@@ -1,18 +1,20 @@
 from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
 from rest_framework.permissions import IsAuthenticated
+from school_management_system.conditional import ConditionalGetMixin
+from school_management_system.sparse_fields import SparseFieldsMixin
 from ..models import Student, Teacher
 from .serializers import StudentSerializer, TeacherSerializer
 from django.db.models import Q
 from .filters import StudentFilter
 
 
-class StudentReadOnlyViewSet(ReadOnlyModelViewSet):
+class StudentReadOnlyViewSet(ConditionalGetMixin, SparseFieldsMixin, ReadOnlyModelViewSet):
     queryset = Student.objects.all()
     serializer_class = StudentSerializer
     permission_classes = [IsAuthenticated]
     filterset_class = StudentFilter
 
-class TeacherReadOnlyViewSet(ReadOnlyModelViewSet):
+class TeacherReadOnlyViewSet(ConditionalGetMixin, SparseFieldsMixin, ReadOnlyModelViewSet):
     queryset = Teacher.objects.all()
     serializer_class = TeacherSerializer
     permission_classes = [IsAuthenticated]
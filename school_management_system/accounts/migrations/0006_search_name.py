@@ -0,0 +1,80 @@
+# Generated by Django 6.1.2 on 2026-10-17 04:58
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+TRIGRAM_INDEXES = [
+    (model_name, django.contrib.postgres.indexes.GinIndex(
+        fields=['search_name'], name=f'{model_name}_search_name_trgm', opclasses=['gin_trgm_ops'],
+    ))
+    for model_name in ('student', 'teacher')
+]
+
+
+def _query_exists(schema_editor, sql):
+    if schema_editor.connection.vendor != 'postgresql':
+        return False
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(sql)
+        return cursor.fetchone() is not None
+
+
+def create_trigram_extension(apps, schema_editor):
+    if _query_exists(schema_editor, "SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'"):
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+
+def _trigram_installed(schema_editor):
+    return _query_exists(schema_editor, "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+
+
+def add_trigram_indexes(apps, schema_editor):
+    if not _trigram_installed(schema_editor):
+        return
+    for model_name, index in TRIGRAM_INDEXES:
+        schema_editor.add_index(apps.get_model('accounts', model_name), index)
+
+
+def remove_trigram_indexes(apps, schema_editor):
+    if not _trigram_installed(schema_editor):
+        return
+    for model_name, index in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {schema_editor.quote_name(index.name)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_teacher_date_of_birth_teacher_date_of_birth_bs_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='search_name',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.text.Lower(django.db.models.functions.text.Concat('first_name', models.Value(' '), django.db.models.functions.comparison.Coalesce('middle_name', models.Value('')), models.Value(' '), 'last_name')), output_field=models.TextField()),
+        ),
+        migrations.AddField(
+            model_name='teacher',
+            name='search_name',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.text.Lower(django.db.models.functions.text.Concat('first_name', models.Value(' '), django.db.models.functions.comparison.Coalesce('middle_name', models.Value('')), models.Value(' '), 'last_name')), output_field=models.TextField()),
+        ),
+        # pg_trgm ships with PostgreSQL's contrib package. Where it is not
+        # available the indexes are left out and name search falls back to
+        # substring matching (see school_management_system/search.py).
+        migrations.RunPython(create_trigram_extension, migrations.RunPython.noop),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(model_name=model_name, index=index)
+                for model_name, index in TRIGRAM_INDEXES
+            ],
+            database_operations=[
+                migrations.RunPython(add_trigram_indexes, remove_trigram_indexes),
+            ],
+        ),
+    ]
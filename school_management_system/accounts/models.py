@@ -1,9 +1,24 @@
 from django.db import models
+from django.db.models import Value
+from django.db.models.functions import Coalesce, Concat, Lower
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex
 from nepali_datetime_field.models import NepaliDateField
 import nepali_datetime
 from datetime import date
 
+
+def search_name_field():
+    """Lower-case "first middle last", computed by the database for name search."""
+    return models.GeneratedField(
+        expression=Lower(Concat(
+            'first_name', Value(' '), Coalesce('middle_name', Value('')), Value(' '), 'last_name',
+        )),
+        output_field=models.TextField(),
+        db_persist=True,
+    )
+
+
 class Student(models.Model):
     GENDER_CHOICES = [
         ('male', 'Male'),
@@ -31,9 +46,14 @@ class Student(models.Model):
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    search_name = search_name_field()
 
     class Meta:
         ordering = ['first_name', 'last_name']
+        indexes = [
+            # Created by the migration only when pg_trgm is installed
+            GinIndex(fields=['search_name'], opclasses=['gin_trgm_ops'], name='student_search_name_trgm'),
+        ]
 
     # def __str__(self):
     #     return f"{self.first_name} {self.last_name}"
@@ -74,6 +94,13 @@ class Teacher(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="active")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    search_name = search_name_field()
+
+    class Meta:
+        indexes = [
+            # Created by the migration only when pg_trgm is installed
+            GinIndex(fields=['search_name'], opclasses=['gin_trgm_ops'], name='teacher_search_name_trgm'),
+        ]
 
     # def __str__(self):
     #     return f"{self.first_name} {self.last_name}"
@@ -1,3 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from academics.models import AcademicYear, Standard, StudentEnrollment
+from accounts.models import Student, Teacher
+from school_management_system.search import trigram_available
+
+User = get_user_model()
+
+
+class NameSearchTestCase(TestCase):
+    """Test cases for the full name search shared by the student, teacher and result filters."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('teacher', password='secret'))
+        self.aaron = Student.objects.create(
+            first_name='Aaron', middle_name='Jeffery', last_name='Jones', admission_number='2081-0001',
+        )
+        self.sita = Student.objects.create(first_name='Sita', last_name='Sharma', admission_number='2081-0002')
+        self.teacher = Teacher.objects.create(
+            first_name='Gita', last_name='Sharma', designation='Secondary Level Teacher',
+            email='gita@example.com', phone='9800000000',
+        )
+
+    def search(self, url_name, **params):
+        response = self.client.get(reverse(url_name), params)
+        self.assertEqual(response.status_code, 200)
+        return response.data['results']
+
+    def test_search_name_is_generated(self):
+        self.assertEqual(Student.objects.get(pk=self.aaron.pk).search_name, 'aaron jeffery jones')
+        self.sita.middle_name = 'Kumari'
+        self.sita.save()
+        self.assertEqual(Student.objects.get(pk=self.sita.pk).search_name, 'sita kumari sharma')
+
+    def test_every_word_must_match(self):
+        rows = self.search('students-readonly-list', full_name='JEFF jon')
+        self.assertEqual([row['id'] for row in rows], [self.aaron.pk])
+        self.assertEqual(self.search('students-readonly-list', full_name='Aaron Sharma'), [])
+
+        rows = self.search('teachers-readonly-list', full_name='sharma')
+        self.assertEqual([row['id'] for row in rows], [self.teacher.pk])
+
+    def test_related_filters_share_the_search(self):
+        academic_year = AcademicYear.objects.create(name='2081', is_current=True)
+        standard = Standard.objects.create(name='Class 10', section='A')
+        for roll_number, student in enumerate([self.aaron, self.sita], start=1):
+            StudentEnrollment.objects.create(
+                student=student, standard=standard, academic_year=academic_year, roll_number=f'{roll_number:02d}',
+            )
+
+        rows = self.search('student-enrollments-readonly-list', student_full_name='sita')
+        self.assertEqual([row['roll_number'] for row in rows], ['02'])
+
+    def test_misspelt_names_are_found_best_first(self):
+        # Checked here: the test database only exists once the tests run
+        if not trigram_available(connection.alias):
+            self.skipTest('the pg_trgm extension is not installed')
+        Student.objects.create(first_name='Aarav', last_name='Joshi', admission_number='2081-0003')
+
+        rows = self.search('students-readonly-list', full_name='Aaron Jonez')
+        self.assertEqual(rows[0]['id'], self.aaron.pk)
@@ -1,7 +1,12 @@
+from itertools import groupby
+
 from django.contrib import admin
 from django.forms.models import BaseInlineFormSet
-from django.db.models import Sum, Avg
+from django.http import StreamingHttpResponse
+from django.template.loader import render_to_string
+from django.utils.html import format_html_join
 from django.utils.safestring import mark_safe
+from django.utils.text import slugify
 
 from .models import (
     Attendance,
@@ -10,9 +15,14 @@ from .models import (
     SubjectResult,
     StudentResultSummary,
     StudentMarksheet,
+    GradingScale,
+    GradeBand,
+    ResultJob,
 )
+from .jobs import enqueue
+from .marksheets import archive_name, iter_marksheets, iter_zip, subject_results
 
-from academics.models import StudentEnrollment, Standard
+from academics.models import Standard, StudentEnrollment
 
 
 # ============================================================
@@ -107,100 +117,62 @@ class SubjectResultInline(admin.TabularInline):
 # ADMIN ACTIONS
 # ============================================================
 
+def _enqueue_for_exams(modeladmin, request, kind, exams):
+    created = existing = 0
+    for exam in exams:
+        _, is_new = enqueue(kind, exam, requested_by=request.user)
+        if is_new:
+            created += 1
+        else:
+            existing += 1
+
+    message = f"Queued {created} job(s)."
+    if existing:
+        message += f" {existing} exam(s) already had one queued or running."
+    modeladmin.message_user(
+        request,
+        f"{message} Progress is shown under Result Jobs.",
+    )
+
+
 @admin.action(description='Process All Results & Ranks for this Exam')
 def process_exam_full_results(modeladmin, request, queryset):
-    for exam in queryset:
-        standards = (
-            ExamSubject.objects
-            .filter(exam=exam)
-            .values_list('subject__standard', flat=True)
-            .distinct()
-        )
+    # Processing a whole exam can outlast the request; the
+    # run_result_jobs worker does it in the background.
+    _enqueue_for_exams(modeladmin, request, 'process_exam', queryset)
 
-        total_processed = 0
 
-        for standard_id in standards:
-            standard = Standard.objects.only('id').get(id=standard_id)
+@admin.action(description='Generate Ranks by Class and Exam')
+def calculate_exam_ranks(modeladmin, request, queryset):
+    exam_ids = queryset.order_by().values_list('exam', flat=True).distinct()
+    _enqueue_for_exams(modeladmin, request, 'rank_exam', Exam.objects.filter(pk__in=exam_ids))
 
-            enrollments = StudentEnrollment.objects.filter(
-                standard=standard,
-                academic_year=exam.academic_year,
-                status='enrolled',
-            )
 
-            for enrollment in enrollments:
-                results = SubjectResult.objects.filter(
-                    student=enrollment,
-                    exam_subject__exam=exam,
-                )
-
-                if not results.exists():
-                    continue
-
-                aggregates = results.aggregate(
-                    theory=Sum('marks_obtained_theory'),
-                    practical=Sum('marks_obtained_practical'),
-                    avg_gpa=Avg('subject_grade_point'),
-                )
-
-                total_marks = (aggregates['theory'] or 0) + (aggregates['practical'] or 0)
-                avg_gpa = aggregates['avg_gpa'] or 0
-                has_ng = results.filter(subject_grade='NG').exists()
-
-                # Update or create summary - no longer need to set M2M relationship
-                StudentResultSummary.objects.update_or_create(
-                    student=enrollment,
-                    exam=exam,
-                    defaults={
-                        'academic_year': enrollment.academic_year,
-                        'total_marks': total_marks,
-                        'gpa': 0 if has_ng else avg_gpa,
-                        'overall_grade': 'NG' if has_ng else 'PASS',
-                    },
-                )
-                total_processed += 1
-
-            summaries = (
-                StudentResultSummary.objects
-                .filter(
-                    exam=exam,
-                    student__standard=standard,
-                    student__academic_year=exam.academic_year,
-                )
-                .order_by('-gpa', '-total_marks')
-            )
+@admin.action(description='Download Marksheets of every Class (ZIP)')
+def download_class_marksheets(modeladmin, request, queryset):
+    exams = list(queryset.select_related('academic_year'))
 
-            for idx, summary in enumerate(summaries, start=1):
-                summary.rank = idx
-                summary.save(update_fields=['rank'])
+    def files():
+        for exam in exams:
+            standards = Standard.objects.filter(
+                pk__in=ExamSubject.objects.filter(exam=exam).values('subject__standard')
+            ).order_by('name', 'section')
+            for standard in standards:
+                folder = f"{slugify(exam.name)}/{slugify(standard.display_name())}"
+                for filename, html in iter_marksheets(exam, standard):
+                    yield f"{folder}/{filename}", html
 
-        modeladmin.message_user(
-            request,
-            f"Successfully processed {total_processed} result summaries for {exam.name}."
-        )
+    response = StreamingHttpResponse(iter_zip(files()), content_type='application/zip')
+    filename = archive_name(exams[0]) if len(exams) == 1 else 'marksheets.zip'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
 
 
-@admin.action(description='Generate Ranks by Class and Exam')
-def calculate_exam_ranks(modeladmin, request, queryset):
-    groups = queryset.values_list('exam', 'student__standard').distinct()
-
-    updated = 0
-    for exam, standard in groups:
-        summaries = (
-            StudentResultSummary.objects
-            .filter(exam=exam, student__standard=standard)
-            .order_by('-gpa', '-total_marks')
-        )
-
-        for idx, summary in enumerate(summaries, start=1):
-            summary.rank = idx
-            summary.save(update_fields=['rank'])
-            updated += 1
-
-    modeladmin.message_user(
-        request,
-        f"Successfully recalculated ranks for {updated} records."
-    )
+@admin.action(description='Retry selected failed jobs')
+def retry_result_jobs(modeladmin, request, queryset):
+    # Retried jobs resume from their checkpoints
+    retried = queryset.filter(status='failed').update(status='queued', finished_at=None)
+    modeladmin.message_user(request, f"Re-queued {retried} failed job(s).")
 
 
 # ============================================================
@@ -214,7 +186,7 @@ class ExamAdmin(admin.ModelAdmin):
     search_fields = ('name',)
     list_select_related = ('academic_year',)
     inlines = [ExamSubjectInline]
-    actions = [process_exam_full_results]
+    actions = [process_exam_full_results, download_class_marksheets]
 
     def get_actions(self, request):
         actions = super().get_actions(request)
@@ -355,6 +327,51 @@ class AttendanceAdmin(admin.ModelAdmin):
         return "-"
 
 
+class GradeBandInline(admin.TabularInline):
+    model = GradeBand
+    fields = ('grade', 'grade_point', 'min_percentage', 'min_gpa')
+    extra = 0
+
+
+@admin.register(GradingScale)
+class GradingScaleAdmin(admin.ModelAdmin):
+    list_display = ('name', 'get_exam', 'get_academic_year', 'is_default', 'component_pass_percentage', 'updated_at')
+    list_filter = ('is_default', 'academic_year')
+    search_fields = ('name',)
+    list_select_related = ('exam', 'academic_year')
+    autocomplete_fields = ['exam']
+    inlines = [GradeBandInline]
+
+    @admin.display(description='Exam', ordering='exam__name')
+    def get_exam(self, obj):
+        return obj.exam.name if obj.exam else "-"
+
+    @admin.display(description='Academic Year', ordering='academic_year__name')
+    def get_academic_year(self, obj):
+        return obj.academic_year.display_name() if obj.academic_year else "-"
+
+
+@admin.register(ResultJob)
+class ResultJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'get_exam', 'status', 'get_progress', 'attempts', 'requested_by', 'created_at', 'finished_at')
+    list_filter = ('status', 'kind')
+    list_select_related = ('exam', 'requested_by')
+    readonly_fields = [field.name for field in ResultJob._meta.fields]
+    actions = [retry_result_jobs]
+
+    def has_add_permission(self, request):
+        # Jobs are created by the exam actions
+        return False
+
+    @admin.display(description='Exam', ordering='exam__name')
+    def get_exam(self, obj):
+        return obj.exam.name
+
+    @admin.display(description='Progress')
+    def get_progress(self, obj):
+        return f"{obj.progress()}% ({obj.completed_steps}/{obj.total_steps})"
+
+
 @admin.register(StudentResultSummary)
 class StudentResultSummaryAdmin(admin.ModelAdmin):
     list_display = (
@@ -620,63 +637,28 @@ class StudentMarksheetAdmin(admin.ModelAdmin):
     @admin.display(description='Detailed Subject-wise Results')
     def get_all_subject_results(self, obj):
         """Display detailed subject-wise results for all exams"""
-        # Get all exams for this academic year
-        exams = Exam.objects.filter(
-            academic_year=obj.academic_year
-        ).select_related('academic_year').order_by('-start_date')
-        
-        if not exams:
-            return mark_safe("<p>No exams found for this academic year</p>")
-        
-        html = ""
-        for exam in exams:
-            # Get subject results for this student and exam
-            results = SubjectResult.objects.filter(
-                student=obj,
-                exam_subject__exam=exam
-            ).select_related(
-                'exam_subject',
-                'exam_subject__subject',
-                'exam_subject__exam'
-            ).order_by('exam_subject__subject__name')
-            
-            if not results.exists():
-                continue
-            
-            html += f"<h3 style='margin-top: 20px;'>{exam.name}</h3>"
-            html += "<table style='width:100%; border-collapse: collapse;'>"
-            html += "<tr style='background-color: #f2f2f2;'>"
-            html += "<th style='border: 1px solid #ddd; padding: 8px; text-align: left;'>Subject</th>"
-            html += "<th style='border: 1px solid #ddd; padding: 8px; text-align: center;'>Theory (Obtained/Full)</th>"
-            html += "<th style='border: 1px solid #ddd; padding: 8px; text-align: center;'>Practical (Obtained/Full)</th>"
-            html += "<th style='border: 1px solid #ddd; padding: 8px; text-align: center;'>Total</th>"
-            html += "<th style='border: 1px solid #ddd; padding: 8px; text-align: center;'>Grade</th>"
-            html += "<th style='border: 1px solid #ddd; padding: 8px; text-align: center;'>GPA</th>"
-            html += "</tr>"
-            
-            for result in results:
-                subject_name = result.exam_subject.subject.name if result.exam_subject.subject else "N/A"
-                theory_marks = f"{result.marks_obtained_theory}/{result.exam_subject.full_marks_theory}"
-                practical_marks = f"{result.marks_obtained_practical}/{result.exam_subject.full_marks_practical}"
-                total_obtained = result.marks_obtained_theory + result.marks_obtained_practical
-                total_full = result.exam_subject.full_marks_theory + result.exam_subject.full_marks_practical
-                total_marks = f"{total_obtained}/{total_full}"
-                
-                # Color code based on grade
-                grade_color = "#4CAF50" if result.subject_grade != "NG" else "#f44336"
-                
-                html += "<tr>"
-                html += f"<td style='border: 1px solid #ddd; padding: 8px;'>{subject_name}</td>"
-                html += f"<td style='border: 1px solid #ddd; padding: 8px; text-align: center;'>{theory_marks}</td>"
-                html += f"<td style='border: 1px solid #ddd; padding: 8px; text-align: center;'>{practical_marks}</td>"
-                html += f"<td style='border: 1px solid #ddd; padding: 8px; text-align: center;'><strong>{total_marks}</strong></td>"
-                html += f"<td style='border: 1px solid #ddd; padding: 8px; text-align: center; color: {grade_color}; font-weight: bold;'>{result.subject_grade}</td>"
-                html += f"<td style='border: 1px solid #ddd; padding: 8px; text-align: center;'>{result.subject_grade_point}</td>"
-                html += "</tr>"
-            
-            html += "</table>"
-        
-        if not html:
+        # Every exam of the year in one query, newest exam first
+        results = subject_results(
+            student=obj,
+            exam_subject__exam__academic_year=obj.academic_year,
+        ).select_related('exam_subject__exam').order_by(
+            '-exam_subject__exam__start_date', 'exam_subject__exam_id', 'exam_subject__subject__name',
+        )
+
+        sections = [
+            (
+                exam_results[0].exam_subject.exam.name,
+                render_to_string('activities/includes/subject_results_table.html', {'results': exam_results}),
+            )
+            for exam_results in (
+                list(rows) for _, rows in groupby(results, key=lambda result: result.exam_subject.exam_id)
+            )
+        ]
+        if not sections:
             return mark_safe("<p>No subject results available</p>")
-        
-        return mark_safe(html)
+
+        return format_html_join(
+            '',
+            "<h3 style='margin-top: 20px;'>{}</h3>{}",
+            ((name, mark_safe(table)) for name, table in sections),
+        )
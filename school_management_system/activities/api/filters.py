@@ -1,62 +1,93 @@
 import django_filters
-from django.db.models import Q
+from django.db import models
+from django_filters.constants import EMPTY_VALUES
+from nepali_datetime_field.forms import NepaliDateField
 
-from ..models import SubjectResult, ExamSubject, StudentResultSummary
+from school_management_system.nepali_dates import to_ad
+from school_management_system.search import FullNameFilter
+
+from ..models import (
+    SubjectResult, Exam, ExamSubject, StudentResultSummary, ExamSubjectStatistics, ExamStandardStatistics, Attendance,
+)
+
+
+class NepaliDateFilter(django_filters.DateFilter):
+    """
+    Date filter taking a BS date (2081-04-01). NepaliDateField stores AD
+    dates, so the value is converted once, from the conversion table, and
+    compared in the database, where the date indexes apply.
+    """
+    field_class = NepaliDateField
+
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        return super().filter(qs, models.Value(to_ad(value), output_field=models.DateField()))
 
 
 class SubjectResultFilter(django_filters.FilterSet):
-    student_full_name = django_filters.CharFilter(method='filter_student_full_name')
+    student_full_name = FullNameFilter(field_name='student__student')
     student_id = django_filters.NumberFilter(field_name='student_id')
     exam_id = django_filters.NumberFilter(field_name='exam_subject__exam_id')
     subject_id = django_filters.NumberFilter(field_name='exam_subject__subject_id')
     standard_id = django_filters.NumberFilter(field_name='student__standard_id')
     subject_grade = django_filters.CharFilter(field_name='subject_grade', lookup_expr='exact')
 
-    def filter_student_full_name(self, queryset, name, value):
-        parts = value.strip().split()
-        q = Q()
-        for part in parts:
-            q &= (
-                Q(student__student__first_name__icontains=part)
-                | Q(student__student__middle_name__icontains=part)
-                | Q(student__student__last_name__icontains=part)
-            )
-        return queryset.filter(q)
-
     class Meta:
         model = SubjectResult
         fields = ['id', 'student_id', 'exam_id', 'subject_id', 'standard_id', 'subject_grade']
 
 
+class AttendanceFilter(django_filters.FilterSet):
+    student_id = django_filters.NumberFilter(field_name='student_id')
+    standard_id = django_filters.NumberFilter(field_name='standard_id')
+    subject_id = django_filters.NumberFilter(field_name='subject_id')
+    academic_year_id = django_filters.NumberFilter(field_name='academic_year_id')
+    recorded_by_id = django_filters.NumberFilter(field_name='recorded_by_id')
+    status = django_filters.CharFilter(field_name='status', lookup_expr='exact')
+    date_from = NepaliDateFilter(field_name='date', lookup_expr='gte')
+    date_to = NepaliDateFilter(field_name='date', lookup_expr='lte')
+
+    class Meta:
+        model = Attendance
+        fields = [
+            'id', 'student_id', 'standard_id', 'subject_id', 'academic_year_id', 'recorded_by_id', 'status',
+            'date_from', 'date_to',
+        ]
+
+
+class ExamFilter(django_filters.FilterSet):
+    academic_year_id = django_filters.NumberFilter(field_name='academic_year_id')
+    term = django_filters.CharFilter(field_name='term', lookup_expr='exact')
+    # Exams held at least partly within the range
+    date_from = NepaliDateFilter(field_name='end_date', lookup_expr='gte')
+    date_to = NepaliDateFilter(field_name='start_date', lookup_expr='lte')
+
+    class Meta:
+        model = Exam
+        fields = ['id', 'academic_year_id', 'term', 'date_from', 'date_to']
+
+
 class ExamSubjectFilter(django_filters.FilterSet):
     exam_id = django_filters.NumberFilter(field_name='exam_id')
     standard_id = django_filters.NumberFilter(field_name='standard_id')
     subject_id = django_filters.NumberFilter(field_name='subject_id')
+    date_from = NepaliDateFilter(field_name='exam_date', lookup_expr='gte')
+    date_to = NepaliDateFilter(field_name='exam_date', lookup_expr='lte')
 
     class Meta:
         model = ExamSubject
-        fields = ['id', 'exam_id', 'standard_id', 'subject_id']
+        fields = ['id', 'exam_id', 'standard_id', 'subject_id', 'date_from', 'date_to']
 
 
 class StudentResultSummaryFilter(django_filters.FilterSet):
-    student_full_name = django_filters.CharFilter(method='filter_student_full_name')
+    student_full_name = FullNameFilter(field_name='student__student')
     student_id = django_filters.NumberFilter(field_name='student_id')
     exam_id = django_filters.NumberFilter(field_name='exam_id')
     academic_year_id = django_filters.NumberFilter(field_name='academic_year_id')
     standard_id = django_filters.NumberFilter(field_name='student__standard_id')
     overall_grade = django_filters.CharFilter(field_name='overall_grade', lookup_expr='exact')
 
-    def filter_student_full_name(self, queryset, name, value):
-        parts = value.strip().split()
-        q = Q()
-        for part in parts:
-            q &= (
-                Q(student__student__first_name__icontains=part)
-                | Q(student__student__middle_name__icontains=part)
-                | Q(student__student__last_name__icontains=part)
-            )
-        return queryset.filter(q)
-
     class Meta:
         model = StudentResultSummary
         fields = ['id', 'student_id', 'exam_id', 'academic_year_id', 'standard_id', 'overall_grade']
@@ -70,7 +101,7 @@ class MarksheetDetailFilter(django_filters.FilterSet):
     result_id = django_filters.NumberFilter(field_name='id')
     student_id = django_filters.NumberFilter(field_name='student_id')
     exam_id = django_filters.NumberFilter(field_name='exam_subject__exam_id')
-    student_full_name = django_filters.CharFilter(method='filter_student_full_name')
+    student_full_name = FullNameFilter(field_name='student__student')
 
     def filter_resultsummary_id(self, queryset, name, value):
         """
@@ -90,17 +121,26 @@ class MarksheetDetailFilter(django_filters.FilterSet):
             exam_subject__exam_id__in=summary_subquery.values('exam_id')
         )
 
-    def filter_student_full_name(self, queryset, name, value):
-        parts = value.strip().split()
-        q = Q()
-        for part in parts:
-            q &= (
-                Q(student__student__first_name__icontains=part)
-                | Q(student__student__middle_name__icontains=part)
-                | Q(student__student__last_name__icontains=part)
-            )
-        return queryset.filter(q)
-
     class Meta:
         model = SubjectResult
-        fields = ['id', 'resultsummary_id', 'result_id', 'student_id', 'exam_id']
\ No newline at end of file
+        fields = ['id', 'resultsummary_id', 'result_id', 'student_id', 'exam_id']
+
+
+class ExamSubjectStatisticsFilter(django_filters.FilterSet):
+    exam_subject_id = django_filters.NumberFilter(field_name='exam_subject_id')
+    exam_id = django_filters.NumberFilter(field_name='exam_subject__exam_id')
+    standard_id = django_filters.NumberFilter(field_name='exam_subject__standard_id')
+    subject_id = django_filters.NumberFilter(field_name='exam_subject__subject_id')
+
+    class Meta:
+        model = ExamSubjectStatistics
+        fields = ['id', 'exam_subject_id', 'exam_id', 'standard_id', 'subject_id']
+
+
+class ExamStandardStatisticsFilter(django_filters.FilterSet):
+    exam_id = django_filters.NumberFilter(field_name='exam_id')
+    standard_id = django_filters.NumberFilter(field_name='standard_id')
+
+    class Meta:
+        model = ExamStandardStatistics
+        fields = ['id', 'exam_id', 'standard_id']
@@ -0,0 +1,29 @@
+import codecs
+import csv
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class CSVParser(BaseParser):
+    """
+    Parses a CSV mark sheet into ``{"results": [row, ...]}``.
+
+    The first line holds the column names. Empty cells are dropped so that
+    serializer defaults apply to them.
+    """
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            reader = csv.DictReader(codecs.getreader(encoding)(stream))
+            rows = [
+                {key.strip(): value.strip() for key, value in row.items() if key and value and value.strip()}
+                for row in reader
+            ]
+        except (csv.Error, UnicodeDecodeError) as exc:
+            raise ParseError(f'CSV parse error - {exc}')
+        return {'results': rows}
@@ -1,13 +1,32 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.db.models import Q
 from rest_framework import serializers
 
 from academics.api.serializers import (
     StudentEnrollmentSerializer,
     StandardSerializer,
     AcademicYearSerializer,
+    SubjectSerializer,
 )
 from accounts.api.serializers import StudentSerializer, TeacherSerializer
-from ..models import SubjectResult, ExamSubject, StudentResultSummary, Attendance, Exam
-from academics.models import ClassTeacher
+from school_management_system.compiled_serializers import CompiledListSerializer
+from ..models import (
+    SubjectResult,
+    ExamSubject,
+    StudentResultSummary,
+    Attendance,
+    Exam,
+    ExamSubjectStatistics,
+    ExamStandardStatistics,
+)
+from .. import locks
+from ..scales import table_for_exam
+from ..results import defer_summary_updates, mark_summary_dirty, pairs_condition
+from ..statistics import record_result_changes
+from ..packed_attendance import packed_storage, record_packed
+from ..attendance_rollups import record_attendance_changes
+from academics.models import ClassTeacher, StudentEnrollment, Subject
 
 
 class ExamSerializer(serializers.ModelSerializer):
@@ -46,7 +65,7 @@ class AttendanceSerializer(serializers.ModelSerializer):
         queryset=StandardSerializer.Meta.model.objects.all(),
         write_only=True,
     )
-    subject = serializers.SerializerMethodField(read_only=True)
+    subject = SubjectSerializer(read_only=True)
     subject_id = serializers.IntegerField(write_only=True, required=False)
     recorded_by = TeacherSerializer(read_only=True)
     recorded_by_id = serializers.PrimaryKeyRelatedField(
@@ -62,12 +81,9 @@ class AttendanceSerializer(serializers.ModelSerializer):
         write_only=True,
     )
 
-    def get_subject(self, obj):
-        from academics.api.serializers import SubjectSerializer
-        return SubjectSerializer(obj.subject, read_only=True).data if obj.subject else None
-
     class Meta:
         model = Attendance
+        list_serializer_class = CompiledListSerializer
         fields = [
             'id',
             'date',
@@ -93,15 +109,11 @@ class ExamSubjectSerializer(serializers.ModelSerializer):
         queryset=Exam.objects.all(),
         write_only=True,
     )
-    subject = serializers.SerializerMethodField(read_only=True)
+    subject = SubjectSerializer(read_only=True)
     subject_id = serializers.IntegerField(write_only=True, required=False)
     standard = StandardSerializer(read_only=True)
     standard_id = serializers.IntegerField(write_only=True, required=False)
 
-    def get_subject(self, obj):
-        from academics.api.serializers import SubjectSerializer
-        return SubjectSerializer(obj.subject, read_only=True).data if obj.subject else None
-
     class Meta:
         model = ExamSubject
         fields = [
@@ -136,6 +148,7 @@ class SubjectResultSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = SubjectResult
+        list_serializer_class = CompiledListSerializer
         fields = [
             'id',
             'student',
@@ -150,6 +163,17 @@ class SubjectResultSerializer(serializers.ModelSerializer):
         read_only_fields = ['subject_grade', 'subject_grade_point']
 
 
+# Relations SubjectResultSerializer reads
+SUBJECT_RESULT_RELATED = (
+    'exam_subject__exam__academic_year',
+    'exam_subject__subject__standard',
+    'exam_subject__standard',
+    'student__student',
+    'student__standard',
+    'student__academic_year',
+)
+
+
 class StudentResultSummarySerializer(serializers.ModelSerializer):
     student = StudentEnrollmentSerializer(read_only=True)
     student_id = serializers.PrimaryKeyRelatedField(
@@ -170,20 +194,35 @@ class StudentResultSummarySerializer(serializers.ModelSerializer):
         write_only=True,
     )
     results = serializers.SerializerMethodField()
-    
+
+    @staticmethod
+    def load_results(summaries):
+        """
+        Fetch the subject results of every summary in one query.
+
+        Returns ``{(enrollment_id, exam_id): [SubjectResult, ...]}``; list
+        views put it in the context as ``subject_results``.
+        """
+        pairs = {(summary.student_id, summary.exam_id) for summary in summaries}
+        grouped = {pair: [] for pair in pairs}
+        if pairs:
+            results = SubjectResult.objects.filter(
+                pairs_condition(pairs, 'exam_subject__exam_id', 'student_id')
+            ).select_related(*SUBJECT_RESULT_RELATED).order_by('pk')
+            for result in results:
+                grouped[(result.student_id, result.exam_subject.exam_id)].append(result)
+        return grouped
+
     def get_results(self, obj):
         """Fetch subject results dynamically instead of using M2M."""
-        results = SubjectResult.objects.filter(
-            student=obj.student,
-            exam_subject__exam=obj.exam
-        ).select_related(
-            'exam_subject__exam__academic_year',
-            'exam_subject__subject__standard',
-            'exam_subject__standard',
-            'student__student',
-            'student__standard',
-            'student__academic_year',
-        )
+        preloaded = self.context.get('subject_results')
+        if preloaded is not None and (obj.student_id, obj.exam_id) in preloaded:
+            results = preloaded[(obj.student_id, obj.exam_id)]
+        else:
+            results = SubjectResult.objects.filter(
+                student=obj.student,
+                exam_subject__exam=obj.exam
+            ).select_related(*SUBJECT_RESULT_RELATED)
         return SubjectResultSerializer(results, many=True, context=self.context).data
 
     class Meta:
@@ -219,6 +258,7 @@ class MarksheetDetailSerializer(serializers.Serializer):
     standard = serializers.SerializerMethodField(read_only=True)
     roll_no = serializers.CharField(source='student.roll_number', read_only=True)
 
+    exam_subject_id = serializers.IntegerField(read_only=True)
     exam_id = serializers.IntegerField(source='exam_subject.exam.id', read_only=True)
     exam_name = serializers.CharField(source='exam_subject.exam.name', read_only=True)
     
@@ -274,6 +314,62 @@ class MarksheetDetailSerializer(serializers.Serializer):
     class_teacher_id = serializers.SerializerMethodField(read_only=True)
     class_teacher_name = serializers.SerializerMethodField(read_only=True)
 
+    # Fields served from the caches that preload() fills
+    PRELOADED_FIELDS = {
+        'resultsummary_id',
+        'summary_gpa',
+        'summary_overall_grade',
+        'summary_rank',
+        'class_teacher_id',
+        'class_teacher_name',
+    }
+
+    # Fields that compact list responses side-load once per id, as
+    # included key: (id field, dependent fields)
+    INCLUDED_GROUPS = {
+        'enrollments': ('student_enrollment_id', (
+            'student_id', 'student_full_name', 'standard_id', 'standard', 'roll_no',
+        )),
+        'exam_subjects': ('exam_subject_id', (
+            'exam_id', 'exam_name', 'subject_id', 'subject_name',
+            'full_marks_theory', 'pass_marks_theory', 'full_marks_practical', 'pass_marks_practical',
+        )),
+        'summaries': ('resultsummary_id', ('summary_gpa', 'summary_overall_grade', 'summary_rank')),
+        'class_teachers': ('class_teacher_id', ('class_teacher_name',)),
+    }
+
+    @staticmethod
+    def preload(results):
+        """
+        Fetch the summaries and class teachers of a page of results in two
+        queries. Returns context entries that fill the per-key caches of
+        _get_summary and _get_class_teacher.
+        """
+        summary_keys = {(result.student_id, result.exam_subject.exam_id) for result in results}
+        teacher_keys = {(result.student.standard_id, result.student.academic_year_id) for result in results}
+        summaries = dict.fromkeys(summary_keys)
+        class_teachers = dict.fromkeys(teacher_keys)
+
+        if summary_keys:
+            for summary in StudentResultSummary.objects.filter(
+                pairs_condition(summary_keys, 'exam_id', 'student_id')
+            ):
+                summaries[(summary.student_id, summary.exam_id)] = summary
+
+        if teacher_keys:
+            by_year = {}
+            for standard_id, academic_year_id in teacher_keys:
+                by_year.setdefault(academic_year_id, set()).add(standard_id)
+            condition = Q()
+            for academic_year_id, standard_ids in by_year.items():
+                condition |= Q(academic_year_id=academic_year_id, standard_id__in=standard_ids)
+            for class_teacher in ClassTeacher.objects.select_related('teacher').filter(condition).order_by('pk'):
+                key = (class_teacher.standard_id, class_teacher.academic_year_id)
+                if class_teachers[key] is None:
+                    class_teachers[key] = class_teacher
+
+        return {'_summary_cache': summaries, '_class_teacher_cache': class_teachers}
+
     def get_standard(self, obj):
         standard = obj.student.standard
         if not standard:
@@ -286,8 +382,8 @@ class MarksheetDetailSerializer(serializers.Serializer):
         key = (obj.student_id, obj.exam_subject.exam_id)
         
         if key not in cache:
-            # If we're serializing multiple objects, we might want to bulk fetch summaries
-            # For now, we fetch individually but cache the result
+            # List views preload the whole page (see preload()); this is
+            # the fallback for a single object
             cache[key] = StudentResultSummary.objects.filter(
                 student_id=obj.student_id,
                 exam_id=obj.exam_subject.exam_id
@@ -333,4 +429,300 @@ class MarksheetDetailSerializer(serializers.Serializer):
 
     def get_class_teacher_name(self, obj):
         class_teacher = self._get_class_teacher(obj)
-        return class_teacher.teacher.full_name if class_teacher else None
\ No newline at end of file
+        return class_teacher.teacher.full_name() if class_teacher else None
+
+
+class MarkSheetEntrySerializer(serializers.Serializer):
+    """One row of a mark sheet. Students are identified by enrollment id or roll number."""
+    student_id = serializers.IntegerField(required=False)
+    roll_number = serializers.CharField(required=False)
+    marks_obtained_theory = serializers.DecimalField(max_digits=5, decimal_places=2, min_value=0)
+    marks_obtained_practical = serializers.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        min_value=0,
+        default=0,
+    )
+
+    def validate(self, attrs):
+        if 'student_id' not in attrs and 'roll_number' not in attrs:
+            raise serializers.ValidationError("Either student_id or roll_number is required.")
+        return attrs
+
+
+class MarkSheetSerializer(serializers.Serializer):
+    """
+    A whole class mark sheet for the ExamSubject passed in the context.
+
+    Every row is checked against the exam subject's full marks and the
+    class enrollment (fetched with one query). Errors are reported per row,
+    in row order, and nothing is saved unless every row is valid.
+    """
+    results = MarkSheetEntrySerializer(many=True, allow_empty=False)
+
+    def validate_results(self, rows):
+        exam_subject = self.context['exam_subject']
+        enrollments = dict(
+            StudentEnrollment.objects
+            .filter(
+                standard_id=exam_subject.standard_id,
+                academic_year_id=exam_subject.exam.academic_year_id,
+                status='enrolled',
+            )
+            .values_list('roll_number', 'id')
+        )
+        enrolled_ids = set(enrollments.values())
+
+        errors = []
+        seen = set()
+        for row in rows:
+            row_errors = {}
+            if 'student_id' in row:
+                if row['student_id'] not in enrolled_ids:
+                    row_errors['student_id'] = ["Result can only be recorded for enrolled students."]
+            elif row['roll_number'] in enrollments:
+                row['student_id'] = enrollments[row['roll_number']]
+            else:
+                row_errors['roll_number'] = ["No enrolled student has this roll number."]
+
+            student_id = row.get('student_id')
+            if student_id is not None:
+                if student_id in seen:
+                    row_errors['student_id'] = ["Student appears more than once in the mark sheet."]
+                seen.add(student_id)
+
+            if row['marks_obtained_theory'] > exam_subject.full_marks_theory:
+                row_errors['marks_obtained_theory'] = [
+                    f"Theory marks cannot exceed {exam_subject.full_marks_theory}."
+                ]
+            if row['marks_obtained_practical'] > exam_subject.full_marks_practical:
+                row_errors['marks_obtained_practical'] = [
+                    f"Practical marks cannot exceed {exam_subject.full_marks_practical}."
+                ]
+            errors.append(row_errors)
+
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return rows
+
+    def create(self, validated_data):
+        exam_subject = self.context['exam_subject']
+        rows = validated_data['results']
+        grades, points = table_for_exam(exam_subject.exam).grade_marks(
+            [row['marks_obtained_theory'] for row in rows],
+            [row['marks_obtained_practical'] for row in rows],
+            exam_subject.full_marks_theory,
+            exam_subject.full_marks_practical,
+        )
+        results = [
+            SubjectResult(
+                student_id=row['student_id'],
+                exam_subject=exam_subject,
+                marks_obtained_theory=row['marks_obtained_theory'],
+                marks_obtained_practical=row['marks_obtained_practical'],
+                subject_grade=grade,
+                subject_grade_point=point,
+            )
+            for row, grade, point in zip(rows, grades, points)
+        ]
+
+        with transaction.atomic(), defer_summary_updates():
+            # Rows that do not exist yet cannot be locked; without this two
+            # posts of one sheet would both count its new rows
+            locks.lock('mark-sheet', [exam_subject.pk])
+            # What the subject statistics count for the rows about to be overwritten
+            previous = {
+                result.student_id: result._statistics_entry
+                for result in SubjectResult.objects
+                .select_for_update()
+                .filter(exam_subject=exam_subject, student_id__in=[result.student_id for result in results])
+                .only('student', *SubjectResult.STATISTICS_SOURCE_FIELDS)
+            }
+            SubjectResult.objects.bulk_create(
+                results,
+                update_conflicts=True,
+                unique_fields=['student', 'exam_subject'],
+                update_fields=[
+                    'marks_obtained_theory',
+                    'marks_obtained_practical',
+                    'subject_grade',
+                    'subject_grade_point',
+                    'updated_at',
+                ],
+            )
+            # bulk_create() sends no post_save, so mark the summaries ourselves
+            for result in results:
+                mark_summary_dirty(result.student_id, exam_subject.exam_id)
+            record_result_changes(
+                (previous.get(result.student_id), result.statistics_entry()) for result in results
+            )
+        return results
+
+
+class RollCallEntrySerializer(serializers.Serializer):
+    """One student of a roll-call, identified by student id or roll number."""
+    student_id = serializers.IntegerField(required=False)
+    roll_number = serializers.CharField(required=False)
+    status = serializers.ChoiceField(choices=Attendance.ATTENDANCE_CHOICES)
+    remarks = serializers.CharField(max_length=255, required=False, allow_blank=True, default='')
+
+    def validate(self, attrs):
+        if 'student_id' not in attrs and 'roll_number' not in attrs:
+            raise serializers.ValidationError("Either student_id or roll_number is required.")
+        return attrs
+
+
+class RollCallSerializer(serializers.Serializer):
+    """
+    The attendance of a whole section for one date, and optionally one
+    subject, for the Standard passed in the context.
+
+    Rows are checked against the section's enrollment in the current
+    academic year (fetched with one query). Errors are reported per row,
+    in row order, and nothing is saved unless every row is valid; a valid
+    roll-call is upserted in one statement, so it can be sent again to
+    correct it. With packed storage it is also merged into AttendanceMonth
+    rows.
+    """
+    date = serializers.CharField()
+    subject_id = serializers.PrimaryKeyRelatedField(
+        source='subject',
+        queryset=Subject.objects.all(),
+        required=False,
+        allow_null=True,
+        default=None,
+    )
+    entries = RollCallEntrySerializer(many=True, allow_empty=False)
+
+    def validate_date(self, value):
+        try:
+            return Attendance._meta.get_field('date').to_python(value)
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError(exc.messages)
+
+    def validate_subject_id(self, subject):
+        if subject is not None and subject.standard_id != self.context['standard'].pk:
+            raise serializers.ValidationError("Subject is not taught in this section.")
+        return subject
+
+    def validate_entries(self, rows):
+        enrollments = {
+            roll_number: (student_id, academic_year_id)
+            for roll_number, student_id, academic_year_id in StudentEnrollment.objects
+            .filter(standard=self.context['standard'], academic_year__is_current=True, status='enrolled')
+            .values_list('roll_number', 'student_id', 'academic_year_id')
+        }
+        academic_years = {student_id: academic_year_id for student_id, academic_year_id in enrollments.values()}
+        student_ids = {student_id for student_id, _ in enrollments.values()}
+
+        errors = []
+        seen = set()
+        for row in rows:
+            row_errors = {}
+            if 'student_id' in row:
+                if row['student_id'] not in student_ids:
+                    row_errors['student_id'] = ["Attendance can only be recorded for enrolled students."]
+            elif row['roll_number'] in enrollments:
+                row['student_id'] = enrollments[row['roll_number']][0]
+            else:
+                row_errors['roll_number'] = ["No enrolled student has this roll number."]
+
+            student_id = row.get('student_id')
+            if student_id is not None:
+                if student_id in seen:
+                    row_errors['student_id'] = ["Student appears more than once in the roll-call."]
+                seen.add(student_id)
+            if not row_errors:
+                row['academic_year_id'] = academic_years[student_id]
+            errors.append(row_errors)
+
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return rows
+
+    def create(self, validated_data):
+        standard = self.context['standard']
+        recorded_by = self.context.get('recorded_by')
+        entries = [
+            Attendance(
+                date=validated_data['date'],
+                student_id=row['student_id'],
+                standard=standard,
+                subject=validated_data['subject'],
+                status=row['status'],
+                remarks=row['remarks'],
+                recorded_by=recorded_by,
+                academic_year_id=row['academic_year_id'],
+            )
+            for row in validated_data['entries']
+        ]
+        update_fields = ['status', 'remarks', 'academic_year', 'updated_at']
+        if recorded_by is not None:
+            update_fields.append('recorded_by')
+        with transaction.atomic():
+            # Rows that do not exist yet cannot be locked; without this, two
+            # submissions of a new roll-call would both count every entry
+            subject = validated_data['subject']
+            locks.lock('roll-call', [(standard.pk, str(validated_data['date']), subject and subject.pk)])
+            # What the rollups count for the rows about to be overwritten
+            previous = {
+                entry.student_id: entry._rollup_entry
+                for entry in Attendance.objects
+                .select_for_update()
+                .filter(
+                    date=validated_data['date'],
+                    standard=standard,
+                    subject=validated_data['subject'],
+                    student_id__in=[entry.student_id for entry in entries],
+                )
+                .only(*Attendance.ROLLUP_SOURCE_FIELDS)
+            }
+            entries = Attendance.objects.bulk_create(
+                entries,
+                update_conflicts=True,
+                unique_fields=['date', 'student', 'subject', 'standard'],
+                update_fields=update_fields,
+            )
+            # bulk_create() sends no post_save, so update the rollups ourselves
+            record_attendance_changes(
+                (previous.get(entry.student_id), entry.rollup_entry()) for entry in entries
+            )
+            # Upserted entries keep their day and period; merging is enough
+            if packed_storage():
+                record_packed(entry.packed_entry() for entry in entries)
+        return entries
+
+
+class ResultStatisticsSerializer(serializers.ModelSerializer):
+    mean_marks = serializers.DecimalField(max_digits=8, decimal_places=2, read_only=True)
+    median_marks = serializers.DecimalField(max_digits=8, decimal_places=2, read_only=True)
+    highest_marks = serializers.DecimalField(max_digits=8, decimal_places=2, read_only=True)
+    pass_rate = serializers.DecimalField(max_digits=5, decimal_places=2, read_only=True)
+
+    statistics_fields = [
+        'result_count',
+        'pass_count',
+        'pass_rate',
+        'mean_marks',
+        'median_marks',
+        'highest_marks',
+        'grade_counts',
+        'updated_at',
+    ]
+
+
+class ExamSubjectStatisticsSerializer(ResultStatisticsSerializer):
+    exam_subject = ExamSubjectSerializer(read_only=True)
+
+    class Meta:
+        model = ExamSubjectStatistics
+        fields = ['id', 'exam_subject'] + ResultStatisticsSerializer.statistics_fields
+
+
+class ExamStandardStatisticsSerializer(ResultStatisticsSerializer):
+    exam = ExamSerializer(read_only=True)
+    standard = StandardSerializer(read_only=True)
+
+    class Meta:
+        model = ExamStandardStatistics
+        fields = ['id', 'exam', 'standard'] + ResultStatisticsSerializer.statistics_fields
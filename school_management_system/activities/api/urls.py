@@ -7,6 +7,12 @@ from .views import (
     ExamReadOnlyViewSet,
     AttendanceReadOnlyViewSet,
     MarksheetDetailReadOnlyViewSet,
+    ExamSubjectMarkSheetView,
+    RollCallView,
+    AttendanceMonthReportView,
+    AttendanceSummaryView,
+    ExamSubjectStatisticsReadOnlyViewSet,
+    ExamStandardStatisticsReadOnlyViewSet,
 )
 
 router = DefaultRouter()
@@ -17,7 +23,21 @@ router.register(r'resultsummary-readonly', StudentResultSummaryReadOnlyViewSet,
 router.register(r'exam-readonly', ExamReadOnlyViewSet, basename='exam-readonly')
 router.register(r'attendance-readonly', AttendanceReadOnlyViewSet, basename='attendance-readonly')
 router.register(r'marksheet-readonly', MarksheetDetailReadOnlyViewSet, basename='marksheet-readonly')
+router.register(r'exam-subject-statistics-readonly', ExamSubjectStatisticsReadOnlyViewSet, basename='exam-subject-statistics-readonly')
+router.register(r'exam-standard-statistics-readonly', ExamStandardStatisticsReadOnlyViewSet, basename='exam-standard-statistics-readonly')
 
 urlpatterns = [
+    path('exam-subjects/<int:pk>/marks/', ExamSubjectMarkSheetView.as_view(), name='examsubject-marks'),
+    path('standards/<int:pk>/roll-call/', RollCallView.as_view(), name='standard-roll-call'),
+    path(
+        'standards/<int:pk>/attendance/<int:year>/<int:month>/',
+        AttendanceMonthReportView.as_view(),
+        name='standard-attendance-month',
+    ),
+    path(
+        'standards/<int:pk>/attendance-summary/',
+        AttendanceSummaryView.as_view(),
+        name='standard-attendance-summary',
+    ),
     path('', include(router.urls))
 ]
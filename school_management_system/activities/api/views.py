@@ -1,8 +1,32 @@
 from rest_framework.viewsets import ReadOnlyModelViewSet
+from rest_framework.generics import GenericAPIView
+from rest_framework.parsers import JSONParser
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.response import Response
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db.models import Prefetch
 
-from ..models import SubjectResult, ExamSubject, StudentResultSummary, Attendance, Exam
+from school_management_system.conditional import ConditionalGetMixin, latest_update
+from school_management_system.exports import StreamingExportMixin
+from school_management_system.nepali_dates import days_in_month
+from school_management_system.pagination import KeysetPagination
+from school_management_system.side_loading import SideLoadMixin
+from school_management_system.sparse_fields import SparseFieldsMixin
+
+from academics.models import Standard
+from accounts.models import Teacher
+from ..attendance_rollups import range_summary
+from ..packed_attendance import month_report
+from ..models import (
+    SubjectResult,
+    ExamSubject,
+    StudentResultSummary,
+    Attendance,
+    Exam,
+    ExamSubjectStatistics,
+    ExamStandardStatistics,
+)
 from .serializers import (
     SubjectResultSerializer,
     ExamSubjectSerializer,
@@ -10,19 +34,40 @@ from .serializers import (
     ExamSerializer,
     AttendanceSerializer,
     MarksheetDetailSerializer,
+    MarkSheetSerializer,
+    RollCallSerializer,
+    ExamSubjectStatisticsSerializer,
+    ExamStandardStatisticsSerializer,
+)
+from .parsers import CSVParser
+from .filters import (
+    AttendanceFilter,
+    ExamFilter,
+    SubjectResultFilter,
+    ExamSubjectFilter,
+    StudentResultSummaryFilter,
+    MarksheetDetailFilter,
+    ExamSubjectStatisticsFilter,
+    ExamStandardStatisticsFilter,
 )
-from .filters import SubjectResultFilter, ExamSubjectFilter, StudentResultSummaryFilter, MarksheetDetailFilter
 
 
-class ExamReadOnlyViewSet(ReadOnlyModelViewSet):
+class ExamReadOnlyViewSet(ConditionalGetMixin, SparseFieldsMixin, ReadOnlyModelViewSet):
     serializer_class = ExamSerializer
     permission_classes = [IsAuthenticated]
-    queryset = Exam.objects.select_related('academic_year')
+    filterset_class = ExamFilter
+    queryset = Exam.objects.select_related('academic_year').order_by('start_date', 'id')
 
 
-class AttendanceReadOnlyViewSet(ReadOnlyModelViewSet):
+class AttendanceReadOnlyViewSet(
+    ConditionalGetMixin, StreamingExportMixin, SideLoadMixin, SparseFieldsMixin, ReadOnlyModelViewSet
+):
     serializer_class = AttendanceSerializer
     permission_classes = [IsAuthenticated]
+    filterset_class = AttendanceFilter
+    pagination_class = KeysetPagination
+    keyset_ordering = ('date', 'id')
+    export_ordering = keyset_ordering
     queryset = Attendance.objects.select_related(
         'student',
         'standard',
@@ -32,17 +77,19 @@ class AttendanceReadOnlyViewSet(ReadOnlyModelViewSet):
     )
 
 
-class MarksheetDetailReadOnlyViewSet(ReadOnlyModelViewSet):
+class MarksheetDetailReadOnlyViewSet(ConditionalGetMixin, SideLoadMixin, SparseFieldsMixin, ReadOnlyModelViewSet):
     """
     ViewSet for marksheet details - replaces StudentMarksheetReadOnlyViewSet.
     Uses SubjectResult as base model instead of the removed StudentMarksheet through table.
-    
-    Note: To optimize the summary field lookups in the serializer, the viewset could be enhanced
-    to prefetch StudentResultSummary objects and pass them in the serializer context to avoid N+1 queries.
+
+    List pages load the summaries and class teachers of all their rows in
+    two queries and pass them to the serializer in the context. The same
+    rows go into the ETag.
     """
     serializer_class = MarksheetDetailSerializer
     permission_classes = [IsAuthenticated]
     filterset_class = MarksheetDetailFilter
+    preloaded = None
     
     def get_queryset(self):
         return SubjectResult.objects.select_related(
@@ -55,11 +102,32 @@ class MarksheetDetailReadOnlyViewSet(ReadOnlyModelViewSet):
             'exam_subject__subject',
         )
 
+    def get_dependency_marker(self, rows):
+        if not MarksheetDetailSerializer.PRELOADED_FIELDS & set(self.get_serializer().fields):
+            return None
+        self.preloaded = MarksheetDetailSerializer.preload(rows)
+        return [
+            sorted((key, None if obj is None else (obj.pk, latest_update(obj))) for key, obj in cache.items())
+            for cache in self.preloaded.values()
+        ]
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if args and self.preloaded is not None:
+            serializer.context.update(self.preloaded)
+        elif kwargs.get('many') and args and MarksheetDetailSerializer.PRELOADED_FIELDS & set(serializer.child.fields):
+            serializer.context.update(MarksheetDetailSerializer.preload(args[0]))
+        return serializer
 
-class SubjectResultReadOnlyViewSet(ReadOnlyModelViewSet):
+
+class SubjectResultReadOnlyViewSet(
+    ConditionalGetMixin, StreamingExportMixin, SideLoadMixin, SparseFieldsMixin, ReadOnlyModelViewSet
+):
     serializer_class = SubjectResultSerializer
     permission_classes = [IsAuthenticated]
     filterset_class = SubjectResultFilter
+    pagination_class = KeysetPagination
+    keyset_ordering = ('id',)
 
     def get_queryset(self):
         return SubjectResult.objects.select_related(
@@ -72,7 +140,7 @@ class SubjectResultReadOnlyViewSet(ReadOnlyModelViewSet):
         )
 
 
-class ExamSubjectReadOnlyViewSet(ReadOnlyModelViewSet):
+class ExamSubjectReadOnlyViewSet(ConditionalGetMixin, SparseFieldsMixin, ReadOnlyModelViewSet):
     serializer_class = ExamSubjectSerializer
     permission_classes = [IsAuthenticated]
     filterset_class = ExamSubjectFilter
@@ -84,21 +152,193 @@ class ExamSubjectReadOnlyViewSet(ReadOnlyModelViewSet):
             'subject',
             'subject__standard',
             'standard',
-        )
+        ).order_by('exam_date', 'id')
 
 
-class StudentResultSummaryReadOnlyViewSet(ReadOnlyModelViewSet):
+class StudentResultSummaryReadOnlyViewSet(ConditionalGetMixin, SparseFieldsMixin, ReadOnlyModelViewSet):
     serializer_class = StudentResultSummarySerializer
     permission_classes = [IsAuthenticated]
     filterset_class = StudentResultSummaryFilter
+    subject_results = None
 
     def get_queryset(self):
-        # No need to prefetch results anymore since we use SerializerMethodField
-        # The serializer will handle fetching results dynamically with proper select_related
         return StudentResultSummary.objects.select_related(
             'student__student',
             'student__standard',
             'student__academic_year',
             'exam__academic_year',
             'academic_year',
-        )
\ No newline at end of file
+        )
+
+    def get_dependency_marker(self, rows):
+        # The nested results, loaded once for both the ETag and the serializer
+        if 'results' not in self.get_serializer().fields:
+            return None
+        self.subject_results = StudentResultSummarySerializer.load_results(rows)
+        return sorted(
+            (pair, [(result.pk, latest_update(result)) for result in results])
+            for pair, results in self.subject_results.items()
+        )
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        # A page of summaries loads all of its subject results in one query
+        if args and self.subject_results is not None:
+            serializer.context['subject_results'] = self.subject_results
+        elif kwargs.get('many') and args and 'results' in serializer.child.fields:
+            serializer.context['subject_results'] = StudentResultSummarySerializer.load_results(args[0])
+        return serializer
+
+
+class ExamSubjectStatisticsReadOnlyViewSet(ConditionalGetMixin, SparseFieldsMixin, ReadOnlyModelViewSet):
+    """Per-subject class statistics of an exam, maintained as results are entered."""
+    serializer_class = ExamSubjectStatisticsSerializer
+    permission_classes = [IsAuthenticated]
+    filterset_class = ExamSubjectStatisticsFilter
+
+    def get_queryset(self):
+        return ExamSubjectStatistics.objects.select_related(
+            'exam_subject__exam__academic_year',
+            'exam_subject__subject__standard',
+            'exam_subject__standard',
+        )
+
+
+class ExamStandardStatisticsReadOnlyViewSet(ConditionalGetMixin, SparseFieldsMixin, ReadOnlyModelViewSet):
+    """Per-standard statistics of an exam's overall results."""
+    serializer_class = ExamStandardStatisticsSerializer
+    permission_classes = [IsAuthenticated]
+    filterset_class = ExamStandardStatisticsFilter
+
+    def get_queryset(self):
+        return ExamStandardStatistics.objects.select_related(
+            'exam__academic_year',
+            'standard',
+        )
+
+
+class ExamSubjectMarkSheetView(GenericAPIView):
+    """
+    Bulk mark entry for one ExamSubject.
+
+    Accepts the whole class mark sheet as JSON (``{"results": [...]}``) or
+    as CSV with ``student_id`` or ``roll_number``, ``marks_obtained_theory``
+    and ``marks_obtained_practical`` columns, and upserts it in one statement.
+    """
+    serializer_class = MarkSheetSerializer
+    permission_classes = [IsAuthenticated]
+    parser_classes = [JSONParser, CSVParser]
+    queryset = ExamSubject.objects.select_related('exam')
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['exam_subject'] = getattr(self, 'exam_subject', None)
+        return context
+
+    def post(self, request, *args, **kwargs):
+        self.exam_subject = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = serializer.save()
+        return Response({
+            'exam_subject_id': self.exam_subject.pk,
+            'saved': len(results),
+        })
+
+
+class RollCallView(GenericAPIView):
+    """
+    Bulk attendance entry for one section.
+
+    Accepts the statuses of the whole section for a date, and optionally
+    a subject, as ``{"date": ..., "subject_id": ..., "entries": [...]}``
+    and upserts them in one statement. The teacher linked to the user is
+    recorded as having taken the roll-call.
+    """
+    serializer_class = RollCallSerializer
+    permission_classes = [IsAuthenticated]
+    parser_classes = [JSONParser]
+    queryset = Standard.objects.all()
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['standard'] = getattr(self, 'standard', None)
+        context['recorded_by'] = getattr(self, 'recorded_by', None)
+        return context
+
+    def post(self, request, *args, **kwargs):
+        self.standard = self.get_object()
+        self.recorded_by = Teacher.objects.filter(user_id=request.user.pk).first()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        entries = serializer.save()
+        return Response({
+            'standard_id': self.standard.pk,
+            'date': str(serializer.validated_data['date']),
+            'saved': len(entries),
+        })
+
+
+class AttendanceMonthReportView(GenericAPIView):
+    """
+    A section's attendance for one Nepali month: every student's status
+    for each day and the number of days in each status. Pass
+    ``?subject_id=`` for a subject's periods instead of daily attendance.
+    """
+    permission_classes = [IsAuthenticated]
+    queryset = Standard.objects.all()
+
+    def get(self, request, *args, **kwargs):
+        standard = self.get_object()
+        year, month = self.kwargs['year'], self.kwargs['month']
+        try:
+            days = days_in_month(year, month)
+        except ValueError:
+            raise NotFound("No such month.")
+        subject_id = request.query_params.get('subject_id') or None
+        if subject_id is not None and not subject_id.isdigit():
+            raise ValidationError({'subject_id': ["A valid integer is required."]})
+        return Response({
+            'standard_id': standard.pk,
+            'subject_id': int(subject_id) if subject_id else None,
+            'year': year,
+            'month': month,
+            'days': days,
+            'students': month_report(standard, year, month, subject_id),
+        })
+
+
+class AttendanceSummaryView(GenericAPIView):
+    """
+    Every student's attendance in a section from ``?date_from=`` through
+    ``?date_to=`` (Nepali dates, e.g. 2081-04-01): the number of entries
+    in each status and the percentage attended, read from the attendance
+    rollups. Pass ``?academic_year_id=`` to count only one academic year.
+    """
+    permission_classes = [IsAuthenticated]
+    queryset = Standard.objects.all()
+
+    def query_date(self, name):
+        value = self.request.query_params.get(name)
+        if not value:
+            raise ValidationError({name: ["This query parameter is required."]})
+        try:
+            return Attendance._meta.get_field('date').to_python(value)
+        except DjangoValidationError as exc:
+            raise ValidationError({name: exc.messages})
+
+    def get(self, request, *args, **kwargs):
+        standard = self.get_object()
+        date_from, date_to = self.query_date('date_from'), self.query_date('date_to')
+        if date_from > date_to:
+            raise ValidationError({'date_to': ["Must not be before date_from."]})
+        academic_year_id = request.query_params.get('academic_year_id') or None
+        if academic_year_id is not None and not academic_year_id.isdigit():
+            raise ValidationError({'academic_year_id': ["A valid integer is required."]})
+        return Response({
+            'standard_id': standard.pk,
+            'academic_year_id': int(academic_year_id) if academic_year_id else None,
+            'date_from': str(date_from),
+            'date_to': str(date_to),
+            'students': range_summary(standard, date_from, date_to, academic_year_id),
+        })
@@ -0,0 +1,188 @@
+"""
+Incremental maintenance of AttendanceDailyRollup and AttendanceMonthlyRollup.
+
+The rollups count a student's attendance entries per status for each day
+and for each Nepali month, in one standard and academic year. Writers
+report each change as an (old, new) pair of entries, where an entry is
+(student_id, standard_id, academic_year_id, date, status) and None means
+the entry did not exist before or no longer exists; the differences are
+applied with statistics.apply_changes(), like the exam statistics.
+
+The rollups count Attendance rows, whatever ATTENDANCE_STORAGE is; the
+packed months are only a copy of them. rebuild_attendance_rollups()
+recounts them from the rows; it backs the rebuild_attendance_rollups
+command.
+
+range_summary() answers any date range with two grouped reads: the
+monthly rollups of the months the range covers whole, and the daily
+rollups of the days before and after them.
+"""
+import datetime
+from decimal import Decimal
+
+import nepali_datetime
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from school_management_system.nepali_dates import ad_column, to_ad, to_bs_many
+from .models import Attendance, AttendanceDailyRollup, AttendanceMonthlyRollup
+from .packed_attendance import STATUSES
+from .statistics import _changes, apply_changes
+
+
+COUNT_FIELDS = [f'{status}_count' for status in STATUSES]
+# Statuses in which the student was at school
+ATTENDED = ('present', 'late')
+
+
+def _daily(entry):
+    student_id, standard_id, academic_year_id, date, status = entry
+    return student_id, standard_id, academic_year_id, to_ad(date), status
+
+
+def _monthly(entry):
+    student_id, standard_id, academic_year_id, date, status = entry
+    return student_id, standard_id, academic_year_id, date.year, date.month, status
+
+
+def _convert(entries, convert):
+    return [
+        (old if old is None else convert(old), new if new is None else convert(new))
+        for old, new in entries
+    ]
+
+
+def record_attendance_changes(entries):
+    """
+    Update the daily and monthly rollups for changed attendance entries.
+
+    ``entries`` holds (old, new) pairs of Attendance.rollup_entry(), either
+    of which may be None. Returns the number of rollups updated.
+    """
+    entries = [(old, new) for old, new in entries if old != new]
+    if not entries:
+        return 0
+    with transaction.atomic(savepoint=False):
+        daily = apply_changes(AttendanceDailyRollup, _changes(_convert(entries, _daily), key_length=4))
+        monthly = apply_changes(AttendanceMonthlyRollup, _changes(_convert(entries, _monthly), key_length=5))
+    return daily + monthly
+
+
+def stored_entries(academic_year_ids=None, standard_ids=None):
+    """
+    ``(entry, count)`` of every distinct rollup entry in the Attendance
+    rows, optionally only of some academic years or standards.
+    """
+    rows = Attendance.objects.all()
+    if academic_year_ids is not None:
+        rows = rows.filter(academic_year_id__in=academic_year_ids)
+    if standard_ids is not None:
+        rows = rows.filter(standard_id__in=standard_ids)
+    counts = list(
+        rows
+        .order_by()
+        .values_list('student_id', 'standard_id', 'academic_year_id', ad_column('date'), 'status')
+        .annotate(count=Count('id'))
+    )
+    dates = to_bs_many(row[3] for row in counts)
+    for (student_id, standard_id, academic_year_id, _, status, count), date in zip(counts, dates):
+        yield (student_id, standard_id, academic_year_id, date, status), count
+
+
+def rebuild_attendance_rollups(academic_year_ids=None, standard_ids=None):
+    """
+    Recount the attendance rollups from the Attendance rows, optionally
+    only of some academic years or standards. Returns the number of
+    (daily, monthly) rollups written.
+    """
+    daily, monthly = {}, {}
+    for entry, count in stored_entries(academic_year_ids, standard_ids):
+        for rows, model, key in (
+            (daily, AttendanceDailyRollup, _daily(entry)[:-1]),
+            (monthly, AttendanceMonthlyRollup, _monthly(entry)[:-1]),
+        ):
+            if key not in rows:
+                rows[key] = model(**dict(zip(model.STATISTICS_KEY, key)))
+            rows[key].apply(entry[-1], sign=count)
+
+    with transaction.atomic():
+        for model in (AttendanceDailyRollup, AttendanceMonthlyRollup):
+            existing = model.objects.all()
+            if academic_year_ids is not None:
+                existing = existing.filter(academic_year_id__in=academic_year_ids)
+            if standard_ids is not None:
+                existing = existing.filter(standard_id__in=standard_ids)
+            existing.delete()
+        AttendanceDailyRollup.objects.bulk_create(daily.values(), batch_size=5000)
+        AttendanceMonthlyRollup.objects.bulk_create(monthly.values(), batch_size=5000)
+    return len(daily), len(monthly)
+
+
+def _first_of_next_month(date):
+    if date.month == 12:
+        return nepali_datetime.date(date.year + 1, 1, 1)
+    return nepali_datetime.date(date.year, date.month + 1, 1)
+
+
+def _month_range(first, last):
+    """Q for the months from ``first`` through ``last``, both (year, month)."""
+    return (
+        (Q(year__gt=first[0]) | Q(year=first[0], month__gte=first[1]))
+        & (Q(year__lt=last[0]) | Q(year=last[0], month__lte=last[1]))
+    )
+
+
+def _totals(queryset):
+    return queryset.order_by().values('student_id').annotate(**{field: Sum(field) for field in COUNT_FIELDS})
+
+
+def range_summary(standard, start, end, academic_year=None):
+    """
+    Per-student attendance counts of a section from ``start`` through
+    ``end`` (Nepali dates), with the percentage of entries the student
+    attended. Optionally only of one academic year.
+    """
+    # Whole months come from the monthly rollups; the days before the
+    # first whole month and after the last one from the daily rollups
+    months_start = start if start.day == 1 else _first_of_next_month(start)
+    after_end = end + datetime.timedelta(days=1)
+    months_end = after_end if after_end.day == 1 else nepali_datetime.date(end.year, end.month, 1)
+
+    daily = AttendanceDailyRollup.objects.filter(standard=standard)
+    monthly = AttendanceMonthlyRollup.objects.filter(standard=standard)
+    if academic_year is not None:
+        daily = daily.filter(academic_year=academic_year)
+        monthly = monthly.filter(academic_year=academic_year)
+
+    if months_start < months_end:
+        last_month = months_end - datetime.timedelta(days=1)
+        parts = [
+            monthly.filter(_month_range(
+                (months_start.year, months_start.month), (last_month.year, last_month.month),
+            )),
+            daily.filter(
+                Q(date__gte=to_ad(start), date__lt=to_ad(months_start))
+                | Q(date__gte=to_ad(months_end), date__lte=to_ad(end))
+            ),
+        ]
+    else:
+        parts = [daily.filter(date__range=(to_ad(start), to_ad(end)))]
+
+    by_student = {}
+    for part in parts:
+        for row in _totals(part):
+            counts = by_student.setdefault(row['student_id'], dict.fromkeys(STATUSES, 0))
+            for status, field in zip(STATUSES, COUNT_FIELDS):
+                counts[status] += row[field]
+
+    summary = []
+    for student_id, counts in sorted(by_student.items()):
+        total = sum(counts.values())
+        attended = sum(counts[status] for status in ATTENDED)
+        summary.append({
+            'student_id': student_id,
+            **counts,
+            'total': total,
+            'percentage': (Decimal(attended) * 100 / total).quantize(Decimal('0.01')) if total else None,
+        })
+    return summary
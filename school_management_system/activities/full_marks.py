@@ -0,0 +1,85 @@
+"""
+Cached full-marks totals per (exam, standard).
+
+A summary's percentage is its total marks over the full marks of every
+subject its standard sits in the exam. Those totals only change when an
+ExamSubject does, so they are kept in the cache, one entry per exam,
+keyed by a version of the exam's subjects read from the database: their
+count and the sum of their ``updated_at``. Any write to them, committed
+by any process, changes the version, so a stale entry is never read,
+even with a per-process cache; old entries just age out.
+
+Reading the versions of a batch of exams takes one grouped query over
+ExamSubject alone; the uncached totals another, joined with Subject. A
+Subject saved with a new standard touches the ``updated_at`` of its exam
+subjects (see signals.py), so their versions change too.
+
+Writes that bypass Model.save() must set ``updated_at`` themselves.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.core.cache import cache
+from django.db.models import Count, DecimalField, F, Sum
+from django.db.models.functions import Coalesce, Extract
+
+from .models import ExamSubject
+
+
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _versions(exam_ids):
+    """``{exam_id: (subject count, sum of updated_at)}`` of the exams that have subjects."""
+    return {
+        exam_id: (count, stamp)
+        for exam_id, count, stamp in ExamSubject.objects
+        .filter(exam_id__in=exam_ids)
+        .order_by()
+        .values('exam_id')
+        # Whole seconds would miss edits made within the same second
+        .annotate(count=Count('id'), stamp=Sum(Extract('updated_at', 'epoch', output_field=DecimalField())))
+        .values_list('exam_id', 'count', 'stamp')
+    }
+
+
+def _cache_key(exam_id, version):
+    count, stamp = version
+    return f'activities:full-marks:{exam_id}:{count}:{stamp}'
+
+
+def full_marks_by_standard(exam_ids):
+    """
+    Map each exam id to ``{standard_id: total full marks}``.
+
+    One query reads the exams' versions; the uncached exams are computed
+    with one more.
+    """
+    exam_ids = set(exam_ids)
+    # Exams without subjects have no full marks
+    totals = {exam_id: {} for exam_id in exam_ids}
+    keys = {exam_id: _cache_key(exam_id, version) for exam_id, version in _versions(exam_ids).items()}
+    cached = cache.get_many(keys.values())
+    totals.update({exam_id: cached[key] for exam_id, key in keys.items() if key in cached})
+
+    missing = {exam_id for exam_id, key in keys.items() if key not in cached}
+    if missing:
+        rows = (
+            ExamSubject.objects
+            .filter(exam_id__in=missing)
+            .order_by()
+            .values('exam_id', standard_key=Coalesce('standard_id', 'subject__standard_id'))
+            .annotate(full_marks=Sum(F('full_marks_theory') + F('full_marks_practical')))
+        )
+        computed = {exam_id: {} for exam_id in missing}
+        for row in rows:
+            computed[row['exam_id']][row['standard_key']] = row['full_marks']
+        cache.set_many({keys[exam_id]: value for exam_id, value in computed.items()}, CACHE_TIMEOUT)
+        totals.update(computed)
+    return totals
+
+
+def percentage(total_marks, full_marks):
+    """``total_marks`` as a percentage of ``full_marks``, to two places."""
+    if not full_marks:
+        return Decimal('0.00')
+    return (Decimal(total_marks) * 100 / Decimal(full_marks)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
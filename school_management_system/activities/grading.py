@@ -0,0 +1,113 @@
+"""
+Table-driven grading of subject results.
+
+A GradingTable is a compiled grading scale: passing grades with their lower
+percentage bound, grade point and the lowest GPA that earns the grade
+overall. Anything below the lowest band, or below the component pass
+percentage in theory or practical, is 'NG'.
+
+GradingTable.grade_marks() grades whole arrays of marks in one vectorized
+call: every percentage is located in the cut-off table with
+numpy.searchsorted, so regrading a year of results is a handful of array
+operations rather than a Python loop. SubjectResult.calculate_grading() is
+a one-row call into it. Overall grades are looked up with bisect.
+
+All arithmetic is done on integers (marks in hundredths, percentages in
+hundredths of a percent) so boundaries such as exactly 90% grade exactly
+as the Decimal comparisons they replace.
+"""
+from bisect import bisect_right
+from decimal import Decimal
+
+import numpy as np
+
+
+FAIL_GRADE = 'NG'
+FAIL_GRADE_POINT = Decimal('0.0')
+
+# Nepal CDC scale: (grade, grade point, min percentage, min GPA for the overall grade)
+CDC_BANDS = (
+    ('A+', Decimal('4.0'), Decimal('90'), Decimal('3.6')),
+    ('A', Decimal('3.6'), Decimal('80'), Decimal('3.2')),
+    ('B+', Decimal('3.2'), Decimal('70'), Decimal('2.8')),
+    ('B', Decimal('2.8'), Decimal('60'), Decimal('2.4')),
+    ('C+', Decimal('2.4'), Decimal('50'), Decimal('2.0')),
+    ('C', Decimal('2.0'), Decimal('40'), Decimal('1.6')),
+    ('D', Decimal('1.6'), Decimal('35'), Decimal('0')),
+)
+
+# NG if theory or practical is below this percentage on its own
+COMPONENT_PASS_PERCENTAGE = Decimal('35')
+
+
+def _hundredths(values):
+    """Convert marks (Decimal, float, str or int) to an int64 array of hundredths."""
+    return np.rint(np.asarray(values, dtype=np.float64) * 100).astype(np.int64)
+
+
+class GradingTable:
+    """A grading scale compiled into lookup arrays."""
+
+    def __init__(self, bands, component_pass_percentage=COMPONENT_PASS_PERCENTAGE):
+        by_percentage = sorted(bands, key=lambda band: band[2])
+        self.cutoffs = _hundredths([band[2] for band in by_percentage])
+        self.grades = np.asarray([FAIL_GRADE] + [band[0] for band in by_percentage], dtype=object)
+        self.points = np.asarray([FAIL_GRADE_POINT] + [band[1] for band in by_percentage], dtype=object)
+        self.pass_mark = int(round(Decimal(component_pass_percentage) * 100))
+
+        by_gpa = sorted(bands, key=lambda band: band[3])
+        self.gpa_cutoffs = [band[3] for band in by_gpa]
+        self.gpa_grades = [band[0] for band in by_gpa]
+
+    def grade_marks(self, theory, practical, full_theory, full_practical):
+        """
+        Grade arrays of obtained and full marks.
+
+        All four arguments are equal-length sequences (or scalars, broadcast).
+        Returns ``(grades, points)`` as NumPy object arrays of grade strings
+        and Decimal grade points.
+        """
+        theory = _hundredths(theory)
+        practical = _hundredths(practical)
+        full_theory = _hundredths(full_theory)
+        full_practical = _hundredths(full_practical)
+
+        total_full = full_theory + full_practical
+        # floor(percentage * 100); exact because both sides are integers
+        percentage = (theory + practical) * 10000 // np.maximum(total_full, 1)
+        index = np.searchsorted(self.cutoffs, percentage, side='right')
+
+        # Theory and practical must each reach the pass percentage separately
+        failed = (
+            (total_full <= 0)
+            | ((full_theory > 0) & (theory * 10000 < self.pass_mark * full_theory))
+            | ((full_practical > 0) & (practical * 10000 < self.pass_mark * full_practical))
+        )
+        index = np.where(failed, 0, index)
+        return self.grades[index], self.points[index]
+
+    def grade_one(self, theory, practical, full_theory, full_practical):
+        """Grade a single result; returns ``(grade, grade_point)``."""
+        grades, points = self.grade_marks([theory], [practical], [full_theory], [full_practical])
+        return grades[0], points[0]
+
+    def overall_grade(self, avg_gpa, has_ng):
+        """Map an average grade point to the overall grade."""
+        # If ANY subject has an 'NG', the overall grade is 'NG'
+        if has_ng or not self.gpa_grades:
+            return FAIL_GRADE
+        index = bisect_right(self.gpa_cutoffs, avg_gpa) - 1
+        return self.gpa_grades[max(index, 0)]
+
+
+CDC_TABLE = GradingTable(CDC_BANDS)
+
+
+def grade_marks(theory, practical, full_theory, full_practical, table=CDC_TABLE):
+    """Grade arrays of marks with ``table`` (the CDC scale by default)."""
+    return table.grade_marks(theory, practical, full_theory, full_practical)
+
+
+def grade_one(theory, practical, full_theory, full_practical, table=CDC_TABLE):
+    """Grade a single result with ``table`` (the CDC scale by default)."""
+    return table.grade_one(theory, practical, full_theory, full_practical)
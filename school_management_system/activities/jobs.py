@@ -0,0 +1,149 @@
+"""
+A database-backed queue for long-running result operations.
+
+Admin actions enqueue ResultJob rows; the run_result_jobs management
+command claims them one at a time with SELECT ... FOR UPDATE SKIP LOCKED,
+so several workers can share the queue without a broker.
+
+Exam processing runs one standard per transaction and records the
+standard as a checkpoint in the same transaction. A worker that dies
+mid-job leaves a running job whose heartbeat goes stale; the next worker
+claims it again and continues with the standards that are not done yet.
+"""
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ExamSubject, ResultJob
+from .results import process_exam_results, rank_exam
+
+
+logger = logging.getLogger(__name__)
+
+# A running job that has not checkpointed for this long is considered abandoned
+STALE_AFTER = timedelta(minutes=10)
+
+
+def enqueue(kind, exam, requested_by=None):
+    """
+    Queue a job of ``kind`` for ``exam``.
+
+    An exam has at most one active job of each kind; if one is already
+    queued or running it is returned instead. Returns ``(job, created)``.
+    """
+    with transaction.atomic():
+        active = (
+            ResultJob.objects
+            .select_for_update()
+            .filter(kind=kind, exam=exam, status__in=ResultJob.ACTIVE_STATUSES)
+            .first()
+        )
+        if active is not None:
+            return active, False
+        return ResultJob.objects.create(kind=kind, exam=exam, requested_by=requested_by), True
+
+
+def claim_next(stale_after=STALE_AFTER):
+    """
+    Mark the oldest runnable job as running and return it, or None.
+
+    Runnable jobs are queued ones and running ones whose worker stopped
+    sending heartbeats.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        job = (
+            ResultJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(Q(status='queued') | Q(status='running', heartbeat_at__lt=now - stale_after))
+            .order_by('created_at', 'pk')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = 'running'
+        job.started_at = job.started_at or now
+        job.heartbeat_at = now
+        job.attempts += 1
+        job.save(update_fields=['status', 'started_at', 'heartbeat_at', 'attempts'])
+    return job
+
+
+def _checkpoint(job, **changes):
+    """Save progress and refresh the heartbeat."""
+    changes['heartbeat_at'] = timezone.now()
+    for field, value in changes.items():
+        setattr(job, field, value)
+    job.save(update_fields=list(changes))
+
+
+def _exam_standard_ids(exam):
+    return sorted(
+        ExamSubject.objects
+        .filter(exam=exam, subject__standard__isnull=False)
+        .order_by()
+        .values_list('subject__standard_id', flat=True)
+        .distinct()
+    )
+
+
+def _run_process_exam(job):
+    standard_ids = _exam_standard_ids(job.exam)
+    done = set(job.completed_standards)
+    _checkpoint(job, total_steps=len(standard_ids) + 1, completed_steps=len(done & set(standard_ids)))
+
+    processed = 0
+    for standard_id in standard_ids:
+        if standard_id in done:
+            continue
+        with transaction.atomic():
+            processed += process_exam_results(job.exam, standard_ids=[standard_id])
+            done.add(standard_id)
+            _checkpoint(job, completed_standards=sorted(done), completed_steps=job.completed_steps + 1)
+
+    rank_exam(job.exam_id)
+    return f"Processed {processed} result summaries and ranked {job.exam.name}."
+
+
+def _run_rank_exam(job):
+    _checkpoint(job, total_steps=1)
+    updated = rank_exam(job.exam_id)
+    return f"Recalculated ranks of {job.exam.name}; {updated} records changed."
+
+
+HANDLERS = {
+    'process_exam': _run_process_exam,
+    'rank_exam': _run_rank_exam,
+}
+
+
+def run_job(job):
+    """Execute a claimed job and record its outcome. Returns the job."""
+    try:
+        message = HANDLERS[job.kind](job)
+    except Exception as exc:
+        logger.exception("Result job %s failed", job.pk)
+        job.status = 'failed'
+        job.message = f"{type(exc).__name__}: {exc}"
+    else:
+        job.status = 'done'
+        job.completed_steps = job.total_steps
+        job.message = message
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'completed_steps', 'message', 'finished_at'])
+    return job
+
+
+def run_pending(stale_after=STALE_AFTER, limit=None):
+    """Claim and run jobs until the queue is empty or ``limit`` jobs ran."""
+    ran = 0
+    while limit is None or ran < limit:
+        job = claim_next(stale_after)
+        if job is None:
+            break
+        run_job(job)
+        ran += 1
+    return ran
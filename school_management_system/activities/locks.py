@@ -0,0 +1,40 @@
+"""
+Transaction-level advisory locks for read-then-write sequences.
+
+Incremental statistics and rollups are kept by reading what a write
+replaces and applying the difference. select_for_update() cannot lock
+rows that do not exist yet, so two writers creating the same rows would
+both read "nothing there" and both count the new rows. Writers that
+replace the same data take the same advisory lock before reading; the
+second waits until the first commits, then reads what it wrote.
+
+The locks are PostgreSQL's pg_advisory_xact_lock() and are released when
+the transaction ends. Keys are hashed to 64 bits together with a
+namespace; two unrelated keys only collide by chance, which makes one
+writer wait for the other and nothing worse. Other databases serialize
+their writers anyway, and there this does nothing.
+"""
+import hashlib
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.transaction import TransactionManagementError
+
+
+def _lock_id(namespace, key):
+    digest = hashlib.blake2b(repr((namespace, key)).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+def lock(namespace, keys, using=DEFAULT_DB_ALIAS):
+    """Hold a lock on each of ``keys`` in ``namespace`` until the current transaction ends."""
+    connection = connections[using]
+    if not connection.in_atomic_block:
+        raise TransactionManagementError("lock() must be called inside a transaction.")
+    if connection.vendor != 'postgresql':
+        return
+    # Always taken in the same order, so writers sharing keys cannot deadlock
+    lock_ids = sorted({_lock_id(namespace, key) for key in keys})
+    if not lock_ids:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_xact_lock(lock_id) FROM unnest(%s::bigint[]) AS lock_id', [lock_ids])
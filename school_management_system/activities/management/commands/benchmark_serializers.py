@@ -0,0 +1,76 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+from academics.api.views import StudentEnrollmentReadOnlyViewSet
+from activities.api.views import AttendanceReadOnlyViewSet, SubjectResultReadOnlyViewSet
+
+
+ENDPOINTS = {
+    "subject-results": SubjectResultReadOnlyViewSet,
+    "attendance": AttendanceReadOnlyViewSet,
+    "enrollments": StudentEnrollmentReadOnlyViewSet,
+}
+
+
+def _best_of(repeat, function):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = function()
+        timings.append(time.perf_counter() - start)
+    return min(timings), output
+
+
+class Command(BaseCommand):
+    help = "Compare DRF's list serializer with the compiled one on the busiest read-only endpoints."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--endpoint",
+            choices=sorted(ENDPOINTS),
+            action="append",
+            help="Only benchmark this endpoint. May be given more than once.",
+        )
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=1000,
+            help="Number of rows rendered per run.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Number of runs; the fastest one is reported.",
+        )
+
+    def handle(self, *args, **options):
+        renderer = JSONRenderer()
+        for name in options["endpoint"] or sorted(ENDPOINTS):
+            view = ENDPOINTS[name]()
+            serializer_class = view.get_serializer_class()
+            queryset = view.get_queryset().order_by("pk")[:options["rows"]]
+            instances = list(queryset)
+            if not instances:
+                self.stdout.write(self.style.WARNING(f"{name}: no rows, skipped."))
+                continue
+
+            # Instances time serialization alone; querysets include the query,
+            # which the compiled serializer reads with values_list() where it can
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{name} ({len(instances)} rows)"))
+            for label, rows in (("instances", lambda: instances), ("queryset", queryset.all)):
+                plain_time, expected = _best_of(options["repeat"], lambda: renderer.render(
+                    serializers.ListSerializer(rows(), child=serializer_class()).data
+                ))
+                compiled_time, output = _best_of(options["repeat"], lambda: renderer.render(
+                    serializer_class(rows(), many=True).data
+                ))
+                if output != expected:
+                    raise CommandError(f"{name}: the compiled output for {label} differs from DRF's.")
+                self.stdout.write(
+                    f"  {label:<10} DRF {plain_time * 1000:8.1f} ms   "
+                    f"compiled {compiled_time * 1000:8.1f} ms   ({plain_time / compiled_time:.1f}x)"
+                )
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from activities.packed_attendance import rebuild_packed
+
+
+class Command(BaseCommand):
+    help = "Copy Attendance rows into packed AttendanceMonth storage, replacing the months already there."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--academic-year",
+            type=int,
+            help="Only pack attendance of this academic year.",
+        )
+        parser.add_argument(
+            "--standard",
+            type=int,
+            action="append",
+            help="Only pack attendance of this standard. May be given more than once.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=5000,
+            help="Number of rows read at a time.",
+        )
+
+    def handle(self, *args, **options):
+        academic_year_ids = [options["academic_year"]] if options["academic_year"] else None
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Packing attendance..."))
+        packed = rebuild_packed(academic_year_ids, options["standard"], chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Packed {packed} attendance row(s)."))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from activities.attendance_rollups import rebuild_attendance_rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute the daily and monthly attendance rollups from the Attendance rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--academic-year",
+            type=int,
+            action="append",
+            help="Only rebuild this academic year. May be given more than once.",
+        )
+        parser.add_argument(
+            "--standard",
+            type=int,
+            action="append",
+            help="Only rebuild this standard. May be given more than once.",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.MIGRATE_HEADING("Rebuilding attendance rollups..."))
+        daily, monthly = rebuild_attendance_rollups(options["academic_year"], options["standard"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {daily} daily and {monthly} monthly attendance rollup(s)."
+        ))
@@ -0,0 +1,36 @@
+from django.db import transaction
+from django.core.management.base import BaseCommand
+
+from activities.models import Exam, ExamSubject
+from activities.statistics import rebuild_exam_subject_statistics, rebuild_standard_statistics
+
+
+class Command(BaseCommand):
+    help = "Recompute exam subject and standard statistics from the stored results."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--exam",
+            type=int,
+            action="append",
+            help="Only rebuild this exam. May be given more than once.",
+        )
+
+    def handle(self, *args, **options):
+        exam_ids = list(Exam.objects.values_list("id", flat=True))
+        if options["exam"]:
+            exam_ids = [exam_id for exam_id in exam_ids if exam_id in options["exam"]]
+
+        if not exam_ids:
+            self.stdout.write(self.style.WARNING("No exams to rebuild."))
+            return
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"Rebuilding statistics of {len(exam_ids)} exam(s)..."))
+        with transaction.atomic():
+            subjects = rebuild_exam_subject_statistics(
+                ExamSubject.objects.filter(exam_id__in=exam_ids).values_list("id", flat=True)
+            )
+            standards = rebuild_standard_statistics(exam_ids)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt statistics of {subjects} exam subject(s) and {standards} standard(s)."
+        ))
@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from activities.models import Exam, GradingScale, SubjectResult
+from activities.results import regrade_results
+from activities.scales import resolve_scales
+
+
+class Command(BaseCommand):
+    help = "Re-grade subject results after a grading scale or full marks change."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scale",
+            type=int,
+            help="Only re-grade exams that are graded with this grading scale.",
+        )
+        parser.add_argument(
+            "--exam",
+            type=int,
+            action="append",
+            help="Only re-grade this exam. May be given more than once.",
+        )
+        parser.add_argument(
+            "--academic-year",
+            type=int,
+            help="Only re-grade exams of this academic year.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Number of results graded and written per batch.",
+        )
+
+    def handle(self, *args, **options):
+        exams = Exam.objects.all()
+        if options["exam"]:
+            exams = exams.filter(pk__in=options["exam"])
+        if options["academic_year"]:
+            exams = exams.filter(academic_year_id=options["academic_year"])
+        exam_years = dict(exams.values_list("id", "academic_year_id"))
+
+        scale_id = options["scale"]
+        if scale_id is not None:
+            if not GradingScale.objects.filter(pk=scale_id).exists():
+                raise CommandError(f"Grading scale {scale_id} does not exist.")
+            resolved = resolve_scales(exam_years)
+            exam_years = {
+                exam_id: academic_year_id
+                for exam_id, academic_year_id in exam_years.items()
+                if resolved[exam_id] and resolved[exam_id][0] == scale_id
+            }
+
+        if not exam_years:
+            self.stdout.write(self.style.WARNING("No exams to re-grade."))
+            return
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"Re-grading results of {len(exam_years)} exam(s)..."))
+        updated = regrade_results(
+            SubjectResult.objects.filter(exam_subject__exam_id__in=exam_years),
+            chunk_size=options["chunk_size"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Re-grading completed: {updated} results changed."))
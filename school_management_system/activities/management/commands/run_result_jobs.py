@@ -0,0 +1,48 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from activities.jobs import STALE_AFTER, claim_next, run_job
+
+
+class Command(BaseCommand):
+    help = "Run queued result jobs (exam processing and ranking) until stopped."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Exit once the queue is empty instead of waiting for new jobs.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=5.0,
+            help="Seconds to wait between checks of an empty queue.",
+        )
+        parser.add_argument(
+            "--stale-after",
+            type=int,
+            default=int(STALE_AFTER.total_seconds()),
+            help="Seconds without a checkpoint after which a running job is taken over.",
+        )
+
+    def handle(self, *args, **options):
+        stale_after = timedelta(seconds=options["stale_after"])
+        self.stdout.write(self.style.MIGRATE_HEADING("Waiting for result jobs..."))
+        try:
+            while True:
+                job = claim_next(stale_after)
+                if job is None:
+                    if options["burst"]:
+                        break
+                    time.sleep(options["poll_interval"])
+                    continue
+
+                self.stdout.write(f"Running job {job.pk}: {job.display_name()}")
+                run_job(job)
+                style = self.style.SUCCESS if job.status == "done" else self.style.ERROR
+                self.stdout.write(style(f"Job {job.pk} {job.status}: {job.message}"))
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING("Stopped."))
@@ -0,0 +1,112 @@
+"""
+Batch rendering of marksheets for a whole class.
+
+All subject results of an (exam, standard) are read with one query,
+ordered by student, and grouped into marksheets as the rows arrive.
+Each marksheet is rendered from the same compiled template and written
+straight into a ZIP that is streamed to the client, so only one
+marksheet is held in memory at a time.
+
+Marksheets are HTML files that print as report cards; no PDF renderer is
+installed in this project.
+"""
+import io
+import zipfile
+from itertools import groupby
+
+from django.db.models import F
+from django.template.loader import get_template
+from django.utils.text import slugify
+
+from .models import StudentResultSummary, SubjectResult
+
+
+TEMPLATE_NAME = 'activities/marksheet.html'
+
+
+def subject_results(**filters):
+    """SubjectResults with the related rows and totals a marksheet shows."""
+    return (
+        SubjectResult.objects
+        .filter(**filters)
+        .select_related('student__student', 'exam_subject__subject')
+        .annotate(
+            total_obtained=F('marks_obtained_theory') + F('marks_obtained_practical'),
+            total_full=F('exam_subject__full_marks_theory') + F('exam_subject__full_marks_practical'),
+        )
+    )
+
+
+def iter_marksheets(exam, standard, chunk_size=500):
+    """
+    Yield ``(filename, html)`` for every student of ``standard`` with
+    results in ``exam``, in roll number order.
+    """
+    template = get_template(TEMPLATE_NAME)
+    summaries = {
+        summary.student_id: summary
+        for summary in StudentResultSummary.objects.filter(exam=exam, student__standard=standard)
+    }
+    results = (
+        subject_results(
+            exam_subject__exam=exam,
+            student__standard=standard,
+            student__academic_year_id=exam.academic_year_id,
+        )
+        .order_by('student__roll_number', 'student_id', 'exam_subject__subject__name')
+        .iterator(chunk_size=chunk_size)
+    )
+
+    for enrollment_id, rows in groupby(results, key=lambda result: result.student_id):
+        rows = list(rows)
+        enrollment = rows[0].student
+        html = template.render({
+            'exam': exam,
+            'standard': standard,
+            'enrollment': enrollment,
+            'results': rows,
+            'summary': summaries.get(enrollment_id),
+        })
+        filename = f"{enrollment.roll_number}-{slugify(enrollment.student.full_name())}.html"
+        yield filename, html
+
+
+class _ChunkBuffer(io.RawIOBase):
+    """A write-only, unseekable stream whose contents are drained as chunks."""
+
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def iter_zip(files):
+    """
+    Stream ``(filename, content)`` pairs as a ZIP archive, one file at a time.
+
+    Yields bytes; suitable as the body of a StreamingHttpResponse.
+    """
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for filename, content in files:
+            archive.writestr(filename, content)
+            yield buffer.drain()
+    # The central directory is written when the archive closes
+    yield buffer.drain()
+
+
+def archive_name(exam, standard=None):
+    """File name of the marksheet archive of an exam, or of one of its standards."""
+    parts = [exam.name] + ([standard.display_name()] if standard else [])
+    return f"{slugify(' '.join(parts))}-marksheets.zip"
@@ -0,0 +1,59 @@
+# Generated by Django 6.1.2 on 2026-10-17 04:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0004_alter_teachersubject_options_and_more'),
+        ('activities', '0012_remove_studentresultsummary_results_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentMarksheet',
+            fields=[
+            ],
+            options={
+                'verbose_name': 'Student Marksheet',
+                'verbose_name_plural': 'Student Marksheets',
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('academics.studentenrollment',),
+        ),
+        migrations.CreateModel(
+            name='GradingScale',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='e.g. CDC Grading 2081', max_length=100)),
+                ('is_default', models.BooleanField(default=False, help_text='Use when the exam and its academic year have no scale')),
+                ('component_pass_percentage', models.DecimalField(decimal_places=2, default=35, help_text='Theory and practical must each reach this percentage, or the result is NG', max_digits=5)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('academic_year', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='grading_scales', to='academics.academicyear')),
+                ('exam', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='grading_scales', to='activities.exam')),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='GradeBand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('grade', models.CharField(max_length=5)),
+                ('grade_point', models.DecimalField(decimal_places=2, max_digits=3)),
+                ('min_percentage', models.DecimalField(decimal_places=2, help_text='Lowest subject percentage for this grade', max_digits=5)),
+                ('min_gpa', models.DecimalField(decimal_places=2, help_text='Lowest average GPA for this overall grade', max_digits=3)),
+                ('scale', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bands', to='activities.gradingscale')),
+            ],
+            options={
+                'ordering': ['scale', '-min_percentage'],
+                'unique_together': {('scale', 'grade')},
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 6.1.2 on 2026-10-17 04:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0004_alter_teachersubject_options_and_more'),
+        ('activities', '0013_grading_scales'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExamSubjectStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('result_count', models.PositiveIntegerField(default=0)),
+                ('pass_count', models.PositiveIntegerField(default=0)),
+                ('total_marks_sum', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('grade_counts', models.JSONField(blank=True, default=dict)),
+                ('mark_histogram', models.JSONField(blank=True, default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('exam_subject', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='statistics', to='activities.examsubject')),
+            ],
+            options={
+                'verbose_name_plural': 'Exam Subject Statistics',
+            },
+        ),
+        migrations.CreateModel(
+            name='ExamStandardStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('result_count', models.PositiveIntegerField(default=0)),
+                ('pass_count', models.PositiveIntegerField(default=0)),
+                ('total_marks_sum', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('grade_counts', models.JSONField(blank=True, default=dict)),
+                ('mark_histogram', models.JSONField(blank=True, default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standard_statistics', to='activities.exam')),
+                ('standard', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='academics.standard')),
+            ],
+            options={
+                'verbose_name_plural': 'Exam Standard Statistics',
+                'unique_together': {('exam', 'standard')},
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 6.1.2 on 2026-10-17 05:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0005_updated_at'),
+        ('accounts', '0006_search_name'),
+        ('activities', '0016_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='attendance',
+            unique_together=set(),
+        ),
+        # NULL subjects were never equal under unique_together; keep the
+        # latest of any daily entries recorded twice
+        migrations.RunSQL(
+            sql="""
+                DELETE FROM activities_attendance AS older
+                USING activities_attendance AS newer
+                WHERE older.subject_id IS NULL
+                  AND newer.subject_id IS NULL
+                  AND older.date = newer.date
+                  AND older.student_id = newer.student_id
+                  AND older.standard_id = newer.standard_id
+                  AND older.id < newer.id
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddConstraint(
+            model_name='attendance',
+            constraint=models.UniqueConstraint(fields=('date', 'student', 'subject', 'standard'), name='unique_attendance_entry', nulls_distinct=False),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 6.1.2 on 2026-10-17 05:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0005_updated_at'),
+        ('accounts', '0006_search_name'),
+        ('activities', '0017_attendance_unique_entry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceMonth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField(help_text='Year in BS')),
+                ('month', models.PositiveSmallIntegerField(help_text='Month in BS, 1 to 12')),
+                ('recorded', models.BigIntegerField(default=0)),
+                ('statuses', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('academic_year', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='academics.academicyear')),
+                ('standard', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='academics.standard')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='accounts.student')),
+                ('subject', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='academics.subject')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['standard', 'year', 'month'], name='attendance_month_standard_idx')],
+                'constraints': [models.UniqueConstraint(fields=('student', 'standard', 'subject', 'year', 'month'), name='unique_attendance_month', nulls_distinct=False)],
+            },
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 6.1.2 on 2026-10-17 05:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0005_updated_at'),
+        ('accounts', '0006_search_name'),
+        ('activities', '0018_attendance_month'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('present_count', models.PositiveIntegerField(default=0)),
+                ('absent_count', models.PositiveIntegerField(default=0)),
+                ('late_count', models.PositiveIntegerField(default=0)),
+                ('leave_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('date', models.DateField(help_text='Date in AD')),
+                ('academic_year', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='academics.academicyear')),
+                ('standard', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='academics.standard')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='accounts.student')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['standard', 'date'], name='attendance_daily_std_idx')],
+                'constraints': [models.UniqueConstraint(fields=('student', 'standard', 'academic_year', 'date'), name='unique_attendance_daily_rollup')],
+            },
+        ),
+        migrations.CreateModel(
+            name='AttendanceMonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('present_count', models.PositiveIntegerField(default=0)),
+                ('absent_count', models.PositiveIntegerField(default=0)),
+                ('late_count', models.PositiveIntegerField(default=0)),
+                ('leave_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('year', models.PositiveSmallIntegerField(help_text='Year in BS')),
+                ('month', models.PositiveSmallIntegerField(help_text='Month in BS, 1 to 12')),
+                ('academic_year', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='academics.academicyear')),
+                ('standard', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='academics.standard')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='accounts.student')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['standard', 'year', 'month'], name='attendance_monthly_std_idx')],
+                'constraints': [models.UniqueConstraint(fields=('student', 'standard', 'academic_year', 'year', 'month'), name='unique_attendance_monthly_rollup')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 6.1.2 on 2026-10-17 05:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0005_updated_at'),
+        ('accounts', '0006_search_name'),
+        ('activities', '0019_attendance_rollups'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['standard', 'date', 'id'], name='attendance_standard_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['student', 'date', 'id'], name='attendance_student_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='examsubject',
+            index=models.Index(fields=['standard', 'exam_date'], name='examsubject_standard_date_idx'),
+        ),
+    ]
@@ -1,8 +1,12 @@
+from decimal import Decimal
+
+from django.conf import settings
 from django.db import models
 from django.core.exceptions import ValidationError
 from nepali_datetime_field.models import NepaliDateField
 import nepali_datetime
 
+from .grading import FAIL_GRADE
 
 # Import StudentEnrollment for proxy model
 from academics.models import StudentEnrollment
@@ -27,11 +31,56 @@ class Attendance(models.Model):
     recorded_by = models.ForeignKey('accounts.Teacher', on_delete=models.SET_NULL, null=True)
     academic_year = models.ForeignKey('academics.AcademicYear', on_delete=models.PROTECT)
     remarks = models.CharField(max_length=255, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        unique_together = ('date', 'student', 'subject', 'standard')
+        constraints = [
+            # Daily attendance has no subject; it must still be recorded once
+            # per day, and roll-call upserts rely on this as the conflict target
+            models.UniqueConstraint(
+                fields=['date', 'student', 'subject', 'standard'],
+                name='unique_attendance_entry',
+                nulls_distinct=False,
+            ),
+        ]
+        # A section's or a student's attendance over a date range, in the
+        # (date, id) order the list pages by
+        indexes = [
+            models.Index(fields=['standard', 'date', 'id'], name='attendance_standard_date_idx'),
+            models.Index(fields=['student', 'date', 'id'], name='attendance_student_date_idx'),
+        ]
         verbose_name_plural = "Attendance"
 
+    ROLLUP_SOURCE_FIELDS = {'student_id', 'standard_id', 'academic_year_id', 'date', 'status'}
+    PACKED_SOURCE_FIELDS = ROLLUP_SOURCE_FIELDS | {'subject_id'}
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what the rollups and the packed months currently hold
+        # for this row, unless some of the fields were deferred
+        if cls.ROLLUP_SOURCE_FIELDS.issubset(field_names):
+            instance._rollup_entry = instance.rollup_entry()
+        if cls.PACKED_SOURCE_FIELDS.issubset(field_names):
+            instance._packed_entry = instance.packed_entry()
+        return instance
+
+    def rollup_entry(self):
+        """(student_id, standard_id, academic_year_id, date, status) as counted by the attendance rollups."""
+        return (
+            self.student_id,
+            self.standard_id,
+            self.academic_year_id,
+            # The date may still be a string when the row was built from input
+            self._meta.get_field('date').to_python(self.date),
+            self.status,
+        )
+
+    def packed_entry(self):
+        """(student_id, standard_id, subject_id, academic_year_id, date, status) as copied into AttendanceMonth."""
+        student_id, standard_id, academic_year_id, date, status = self.rollup_entry()
+        return student_id, standard_id, self.subject_id, academic_year_id, date, status
+
     # def __str__(self):
     #     return f"{self.student} - {self.date} ({self.status})"
     
@@ -39,6 +88,109 @@ class Attendance(models.Model):
         """Display method for attendance"""
         return f"{self.student.full_name()} - {self.date} ({self.status})"
 
+
+class AttendanceMonth(models.Model):
+    """
+    A student's attendance for one Nepali month in one period, packed.
+
+    Bit ``day - 1`` of ``recorded`` is set for every day with an entry,
+    and bits ``2 * (day - 1)`` and up of ``statuses`` hold its status as a
+    two-bit code (see activities/packed_attendance.py). A copy of the
+    Attendance rows, kept when ATTENDANCE_STORAGE is 'packed' for month
+    reports to read; remarks and recorded_by are not kept.
+    """
+    student = models.ForeignKey('accounts.Student', on_delete=models.CASCADE)
+    standard = models.ForeignKey('academics.Standard', on_delete=models.CASCADE)
+    # The period; None for once-a-day attendance
+    subject = models.ForeignKey('academics.Subject', on_delete=models.SET_NULL, null=True, blank=True)
+    academic_year = models.ForeignKey('academics.AcademicYear', on_delete=models.PROTECT)
+    year = models.PositiveSmallIntegerField(help_text="Year in BS")
+    month = models.PositiveSmallIntegerField(help_text="Month in BS, 1 to 12")
+    recorded = models.BigIntegerField(default=0)
+    statuses = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['student', 'standard', 'subject', 'year', 'month'],
+                name='unique_attendance_month',
+                nulls_distinct=False,
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['standard', 'year', 'month'], name='attendance_month_standard_idx'),
+        ]
+
+
+# --- ATTENDANCE ROLLUPS ---
+class AttendanceCounts(models.Model):
+    """
+    Number of attendance entries in each status, kept up to date by deltas
+    (see activities/attendance_rollups.py). With subject attendance every
+    period is an entry of its own.
+    """
+    present_count = models.PositiveIntegerField(default=0)
+    absent_count = models.PositiveIntegerField(default=0)
+    late_count = models.PositiveIntegerField(default=0)
+    leave_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    STATISTICS_FIELDS = ['present_count', 'absent_count', 'late_count', 'leave_count', 'updated_at']
+
+    class Meta:
+        abstract = True
+
+    def apply(self, status, sign=1):
+        """Add (sign=1) or remove (sign=-1) one entry; other signs add or remove that many."""
+        field = f'{status}_count'
+        setattr(self, field, getattr(self, field) + sign)
+
+
+class AttendanceDailyRollup(AttendanceCounts):
+    """A student's attendance counts for one day in one standard and academic year."""
+    student = models.ForeignKey('accounts.Student', on_delete=models.CASCADE)
+    standard = models.ForeignKey('academics.Standard', on_delete=models.CASCADE)
+    academic_year = models.ForeignKey('academics.AcademicYear', on_delete=models.CASCADE)
+    # Nepali dates cannot be used as keys of the rollup deltas, so the day
+    # is kept in AD, which is also how Attendance.date is stored
+    date = models.DateField(help_text="Date in AD")
+
+    STATISTICS_KEY = ('student_id', 'standard_id', 'academic_year_id', 'date')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['student', 'standard', 'academic_year', 'date'],
+                name='unique_attendance_daily_rollup',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['standard', 'date'], name='attendance_daily_std_idx'),
+        ]
+
+
+class AttendanceMonthlyRollup(AttendanceCounts):
+    """A student's attendance counts for one Nepali month in one standard and academic year."""
+    student = models.ForeignKey('accounts.Student', on_delete=models.CASCADE)
+    standard = models.ForeignKey('academics.Standard', on_delete=models.CASCADE)
+    academic_year = models.ForeignKey('academics.AcademicYear', on_delete=models.CASCADE)
+    year = models.PositiveSmallIntegerField(help_text="Year in BS")
+    month = models.PositiveSmallIntegerField(help_text="Month in BS, 1 to 12")
+
+    STATISTICS_KEY = ('student_id', 'standard_id', 'academic_year_id', 'year', 'month')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['student', 'standard', 'academic_year', 'year', 'month'],
+                name='unique_attendance_monthly_rollup',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['standard', 'year', 'month'], name='attendance_monthly_std_idx'),
+        ]
+
 # --- EXAMS ---
 class Exam(models.Model):
     TERM_CHOICES = [
@@ -56,6 +208,7 @@ class Exam(models.Model):
     end_date = NepaliDateField()
     is_published = models.BooleanField(default=False, help_text="Set to true to show results to students/parents")
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     # def __str__(self):
     #     return f"{self.name} ({self.academic_year})"
@@ -82,6 +235,7 @@ class ExamSubject(models.Model):
     pass_marks_practical = models.DecimalField(max_digits=5, decimal_places=2, default=9.0)
     
     standard = models.ForeignKey('academics.Standard', on_delete=models.CASCADE, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def save(self, *args, **kwargs):
         # Auto-assign the standard from the subject before saving
@@ -91,6 +245,9 @@ class ExamSubject(models.Model):
 
     class Meta:
         unique_together = ('exam', 'subject')
+        indexes = [
+            models.Index(fields=['standard', 'exam_date'], name='examsubject_standard_date_idx'),
+        ]
         verbose_name_plural = 'Exam Subjects -> Fill Result Per Subject'
 
     # def __str__(self):
@@ -117,11 +274,31 @@ class SubjectResult(models.Model):
     # Auto-calculated fields
     subject_grade_point = models.DecimalField(max_digits=3, decimal_places=2, editable=False)
     subject_grade = models.CharField(max_length=5, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ('student', 'exam_subject')
         verbose_name_plural = 'Student -> Subject Marks'
 
+    STATISTICS_SOURCE_FIELDS = {'exam_subject_id', 'marks_obtained_theory', 'marks_obtained_practical', 'subject_grade'}
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what the statistics currently count for this row,
+        # unless some of the fields were deferred
+        if cls.STATISTICS_SOURCE_FIELDS.issubset(field_names):
+            instance._statistics_entry = instance.statistics_entry()
+        return instance
+
+    def statistics_entry(self):
+        """(exam_subject_id, total marks, grade) as counted by ExamSubjectStatistics."""
+        return (
+            self.exam_subject_id,
+            (self.marks_obtained_theory + self.marks_obtained_practical).quantize(Decimal('0.01')),
+            self.subject_grade,
+        )
+
     def clean(self):
         """Ensure obtained marks do not exceed full marks."""
         super().clean()
@@ -140,37 +317,14 @@ class SubjectResult(models.Model):
                 })
 
     def calculate_grading(self):
-        """Logic to calculate Grade and GPA based on Nepal CDC standard."""
-        theory_fm = self.exam_subject.full_marks_theory
-        practical_fm = self.exam_subject.full_marks_practical
-        total_fm = theory_fm + practical_fm
-        
-        obtained_total = self.marks_obtained_theory + self.marks_obtained_practical
-        
-        # Avoid division by zero
-        if total_fm <= 0:
-            return 'NG', 0.0
-
-        # Calculate percentages
-        total_percentage = (obtained_total / total_fm) * 100
-        
-        # Individual component check (NG if Theory < 35% or Practical < 35%)
-        # Note: Nepal CDC typically requires min 35% in theory AND practical separately to pass.
-        theory_pass_perc = (self.marks_obtained_theory / theory_fm * 100) if theory_fm > 0 else 100
-        practical_pass_perc = (self.marks_obtained_practical / practical_fm * 100) if practical_fm > 0 else 100
-
-        if theory_pass_perc < 35 or practical_pass_perc < 35:
-            return 'NG', 0.00
-        
-        # Grading Scale based on total percentage
-        if total_percentage >= 90: return 'A+', 4.0
-        if total_percentage >= 80: return 'A', 3.6
-        if total_percentage >= 70: return 'B+', 3.2
-        if total_percentage >= 60: return 'B', 2.8
-        if total_percentage >= 50: return 'C+', 2.4
-        if total_percentage >= 40: return 'C', 2.0
-        if total_percentage >= 35: return 'D', 1.6
-        return 'NG', 0.0
+        """Grade and GPA from the grading scale that applies to this exam."""
+        from .scales import table_for_exam
+        return table_for_exam(self.exam_subject.exam).grade_one(
+            self.marks_obtained_theory,
+            self.marks_obtained_practical,
+            self.exam_subject.full_marks_theory,
+            self.exam_subject.full_marks_practical,
+        )
 
     def save(self, *args, **kwargs):
         # Force validation before saving
@@ -202,6 +356,7 @@ class StudentResultSummary(models.Model):
     gpa = models.DecimalField(max_digits=3, decimal_places=2, null=True, blank=True)
     overall_grade = models.CharField(max_length=5, blank=True)
     rank = models.PositiveIntegerField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ('student', 'exam')
@@ -225,6 +380,206 @@ class StudentResultSummary(models.Model):
         )
 
 
+# --- GRADING SCALES ---
+class GradingScale(models.Model):
+    """
+    A grading scale attached to an exam, to an academic year, or marked as
+    the school default. The most specific one applies; without any scale
+    the built-in CDC scale is used.
+    """
+    name = models.CharField(max_length=100, help_text="e.g. CDC Grading 2081")
+    exam = models.ForeignKey(Exam, on_delete=models.CASCADE, null=True, blank=True, related_name='grading_scales')
+    academic_year = models.ForeignKey(
+        'academics.AcademicYear',
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='grading_scales',
+    )
+    is_default = models.BooleanField(default=False, help_text="Use when the exam and its academic year have no scale")
+    component_pass_percentage = models.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        default=35,
+        help_text="Theory and practical must each reach this percentage, or the result is NG",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['name']
+
+    def clean(self):
+        super().clean()
+        if self.exam_id and self.academic_year_id:
+            raise ValidationError("Attach the scale to an exam or to an academic year, not both.")
+
+    def display_name(self):
+        """Display method for grading scale"""
+        if self.exam_id:
+            return f"{self.name} ({self.exam.name})"
+        if self.academic_year_id:
+            return f"{self.name} ({self.academic_year.display_name()})"
+        return f"{self.name} (Default)" if self.is_default else self.name
+
+
+class GradeBand(models.Model):
+    """One passing grade of a scale. Percentages below the lowest band are NG."""
+    scale = models.ForeignKey(GradingScale, on_delete=models.CASCADE, related_name='bands')
+    grade = models.CharField(max_length=5)
+    grade_point = models.DecimalField(max_digits=3, decimal_places=2)
+    min_percentage = models.DecimalField(max_digits=5, decimal_places=2, help_text="Lowest subject percentage for this grade")
+    min_gpa = models.DecimalField(max_digits=3, decimal_places=2, help_text="Lowest average GPA for this overall grade")
+
+    class Meta:
+        ordering = ['scale', '-min_percentage']
+        unique_together = ('scale', 'grade')
+
+    def display_name(self):
+        """Display method for grade band"""
+        return f"{self.grade} ({self.min_percentage}%+)"
+
+
+# --- RESULT STATISTICS ---
+class ResultStatistics(models.Model):
+    """
+    Counters and a histogram of total marks, kept up to date by deltas.
+
+    Mean, median, highest mark, pass rate and grade counts are all read from
+    the row itself, without scanning the results it describes.
+    """
+    result_count = models.PositiveIntegerField(default=0)
+    pass_count = models.PositiveIntegerField(default=0)
+    total_marks_sum = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    # {"A+": 4, "NG": 1, ...}
+    grade_counts = models.JSONField(default=dict, blank=True)
+    # {"87.50": 2, ...}: number of results per total mark
+    mark_histogram = models.JSONField(default=dict, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    STATISTICS_FIELDS = ['result_count', 'pass_count', 'total_marks_sum', 'grade_counts', 'mark_histogram', 'updated_at']
+
+    class Meta:
+        abstract = True
+
+    def apply(self, total_marks, grade, sign=1):
+        """Add (sign=1) or remove (sign=-1) one result; other signs add or remove that many."""
+        total_marks = Decimal(total_marks).quantize(Decimal('0.01'))
+        self.result_count += sign
+        self.total_marks_sum += sign * total_marks
+        if grade != FAIL_GRADE:
+            self.pass_count += sign
+        for counts, key in ((self.grade_counts, grade), (self.mark_histogram, str(total_marks))):
+            counts[key] = counts.get(key, 0) + sign
+            if not counts[key]:
+                del counts[key]
+
+    @property
+    def mean_marks(self):
+        if not self.result_count:
+            return None
+        return (self.total_marks_sum / self.result_count).quantize(Decimal('0.01'))
+
+    @property
+    def highest_marks(self):
+        if not self.mark_histogram:
+            return None
+        return max(Decimal(mark) for mark in self.mark_histogram)
+
+    @property
+    def median_marks(self):
+        if not self.result_count:
+            return None
+        marks = sorted((Decimal(mark), count) for mark, count in self.mark_histogram.items())
+        middle = [(self.result_count - 1) // 2, self.result_count // 2]
+        values, seen = [], 0
+        for mark, count in marks:
+            while middle and middle[0] < seen + count:
+                values.append(mark)
+                middle.pop(0)
+            seen += count
+        return (sum(values) / len(values)).quantize(Decimal('0.01'))
+
+    @property
+    def pass_rate(self):
+        if not self.result_count:
+            return None
+        return (Decimal(self.pass_count) * 100 / self.result_count).quantize(Decimal('0.01'))
+
+
+class ExamSubjectStatistics(ResultStatistics):
+    """Statistics of the SubjectResults of one ExamSubject."""
+    exam_subject = models.OneToOneField(ExamSubject, on_delete=models.CASCADE, related_name='statistics')
+
+    STATISTICS_KEY = ('exam_subject_id',)
+
+    class Meta:
+        verbose_name_plural = 'Exam Subject Statistics'
+
+
+class ExamStandardStatistics(ResultStatistics):
+    """Statistics of the StudentResultSummaries of one standard in one exam."""
+    exam = models.ForeignKey(Exam, on_delete=models.CASCADE, related_name='standard_statistics')
+    standard = models.ForeignKey('academics.Standard', on_delete=models.CASCADE)
+
+    STATISTICS_KEY = ('exam_id', 'standard_id')
+
+    class Meta:
+        unique_together = ('exam', 'standard')
+        verbose_name_plural = 'Exam Standard Statistics'
+
+
+# --- RESULT JOBS ---
+class ResultJob(models.Model):
+    """
+    A long-running result operation, queued from the admin and executed by
+    the run_result_jobs worker outside the HTTP request.
+    """
+    KIND_CHOICES = [
+        ('process_exam', 'Process results & ranks'),
+        ('rank_exam', 'Generate ranks'),
+    ]
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    ACTIVE_STATUSES = ('queued', 'running')
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    exam = models.ForeignKey(Exam, on_delete=models.CASCADE, related_name='result_jobs')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    # Progress, in steps (one per standard, plus ranking)
+    total_steps = models.PositiveIntegerField(default=0)
+    completed_steps = models.PositiveIntegerField(default=0)
+    # Standards whose summaries are already written; skipped when the job resumes
+    completed_standards = models.JSONField(default=list, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    message = models.TextField(blank=True)
+    requested_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Refreshed at every checkpoint; a running job whose heartbeat is too
+    # old belongs to a crashed worker and may be claimed again
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['status', 'created_at'])]
+
+    def display_name(self):
+        """Display method for result job"""
+        return f"{self.get_kind_display()} - {self.exam.name} ({self.get_status_display()})"
+
+    def progress(self):
+        """Completed percentage of the job's steps."""
+        if not self.total_steps:
+            return 100 if self.status == 'done' else 0
+        return self.completed_steps * 100 // self.total_steps
+
+
 # ============================================================
 # PROXY MODEL FOR STUDENT MARKSHEET VIEW
 # ============================================================
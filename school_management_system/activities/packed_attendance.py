@@ -0,0 +1,276 @@
+"""
+Packed attendance storage.
+
+With ATTENDANCE_STORAGE = 'packed' a student's attendance for a Nepali
+month in one period (a subject, or None for once-a-day attendance) is
+also kept as a single AttendanceMonth row holding two 64-bit integers:
+
+- ``recorded``: bit ``day - 1`` is set for every day with an entry;
+- ``statuses``: bits ``2 * (day - 1)`` and ``2 * (day - 1) + 1`` hold the
+  day's status as a code from STATUS_CODES.
+
+A month of daily rows becomes one row of a few dozen bytes, and a month
+report for a section reads one row per student. Reports decode the
+integers of all students at once with numpy (decode_months()), the
+same way grading works on whole arrays of marks.
+
+Attendance rows stay the record: the attendance list and its export,
+the rollups and the admin all work on rows, and the months are a copy
+for month reports. Writers update the months along with the rows, with
+record_packed() and remove_packed(); month_codes() reads a section's
+month from the months while they are kept and from the rows otherwise.
+rebuild_packed() copies the existing rows into months when the packed
+storage is switched on; it backs the pack_attendance command.
+"""
+from itertools import islice
+
+import nepali_datetime
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from school_management_system.nepali_dates import ad_column, days_in_month, to_ad
+from .models import Attendance, AttendanceMonth
+
+
+STATUSES = [status for status, _ in Attendance.ATTENDANCE_CHOICES]
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+NO_ENTRY = -1
+MAX_DAYS = 32
+
+_UINT64 = 1 << 64
+_DAYS = np.arange(MAX_DAYS, dtype=np.uint64)
+
+
+def _signed(value):
+    # The columns are signed bigints; store the same 64 bits
+    return value - _UINT64 if value >= 1 << 63 else value
+
+
+def packed_storage():
+    return getattr(settings, 'ATTENDANCE_STORAGE', 'rows') == 'packed'
+
+
+def month_bounds(year, month):
+    """First and last day of a Nepali month."""
+    return nepali_datetime.date(year, month, 1), nepali_datetime.date(year, month, days_in_month(year, month))
+
+
+def set_days(recorded, statuses, days):
+    """Return ``(recorded, statuses)`` with the ``{day: code}`` entries written into them."""
+    recorded %= _UINT64
+    statuses %= _UINT64
+    for day, code in days.items():
+        shift = 2 * (day - 1)
+        recorded |= 1 << (day - 1)
+        statuses = statuses & ~(3 << shift) | code << shift
+    return _signed(recorded), _signed(statuses)
+
+
+def clear_days(recorded, statuses, days):
+    """Return ``(recorded, statuses)`` without entries for ``days``."""
+    recorded %= _UINT64
+    statuses %= _UINT64
+    for day in days:
+        recorded &= ~(1 << (day - 1))
+        statuses &= ~(3 << 2 * (day - 1))
+    return _signed(recorded), _signed(statuses)
+
+
+def decode(recorded, statuses):
+    """``{day: status}`` of one packed month."""
+    recorded %= _UINT64
+    statuses %= _UINT64
+    return {
+        day: STATUSES[statuses >> 2 * (day - 1) & 3]
+        for day in range(1, MAX_DAYS + 1)
+        if recorded >> (day - 1) & 1
+    }
+
+
+def decode_months(recorded, statuses):
+    """
+    Decode many packed months at once: an ``(n, 32)`` array of status
+    codes, with NO_ENTRY for days without an entry.
+    """
+    recorded = np.asarray(recorded, dtype=np.int64).view(np.uint64)[:, None]
+    statuses = np.asarray(statuses, dtype=np.int64).view(np.uint64)[:, None]
+    codes = (statuses >> (_DAYS * np.uint64(2)) & np.uint64(3)).astype(np.int8)
+    has_entry = (recorded >> _DAYS & np.uint64(1)).astype(bool)
+    return np.where(has_entry, codes, np.int8(NO_ENTRY))
+
+
+def record_packed(entries):
+    """
+    Write ``(student_id, standard_id, subject_id, academic_year_id, date,
+    status)`` entries into their months, creating the months as needed.
+    A later entry for the same day replaces the earlier one. Returns the
+    number of entries written.
+    """
+    months = {}
+    for student_id, standard_id, subject_id, academic_year_id, date, status in entries:
+        key = (student_id, standard_id, subject_id, date.year, date.month)
+        month = months.setdefault(key, {'academic_year_id': academic_year_id, 'days': {}})
+        month['days'][date.day] = STATUS_CODES[status]
+    if not months:
+        return 0
+
+    with transaction.atomic():
+        # Every month must exist before it can be locked and merged into
+        AttendanceMonth.objects.bulk_create(
+            [
+                AttendanceMonth(
+                    student_id=student_id,
+                    standard_id=standard_id,
+                    subject_id=subject_id,
+                    year=year,
+                    month=month,
+                    academic_year_id=entry['academic_year_id'],
+                )
+                for (student_id, standard_id, subject_id, year, month), entry in months.items()
+            ],
+            ignore_conflicts=True,
+        )
+        now = timezone.now()
+        changed = []
+        for month in _locked_months(months):
+            entry = months.get((month.student_id, month.standard_id, month.subject_id, month.year, month.month))
+            if entry is None:
+                continue
+            month.recorded, month.statuses = set_days(month.recorded, month.statuses, entry['days'])
+            month.academic_year_id = entry['academic_year_id']
+            month.updated_at = now
+            changed.append(month)
+        AttendanceMonth.objects.bulk_update(changed, ['recorded', 'statuses', 'academic_year', 'updated_at'])
+    return sum(len(entry['days']) for entry in months.values())
+
+
+def remove_packed(entries):
+    """
+    Clear the days of entries in record_packed()'s format from their
+    months, deleting months left without any entry. Returns the number
+    of entries cleared.
+    """
+    months = {}
+    for student_id, standard_id, subject_id, _, date, _ in entries:
+        months.setdefault((student_id, standard_id, subject_id, date.year, date.month), set()).add(date.day)
+    if not months:
+        return 0
+
+    with transaction.atomic():
+        now = timezone.now()
+        changed, emptied = [], []
+        for month in _locked_months(months):
+            days = months.get((month.student_id, month.standard_id, month.subject_id, month.year, month.month))
+            if days is None:
+                continue
+            month.recorded, month.statuses = clear_days(month.recorded, month.statuses, days)
+            month.updated_at = now
+            (changed if month.recorded else emptied).append(month)
+        AttendanceMonth.objects.bulk_update(changed, ['recorded', 'statuses', 'updated_at'])
+        AttendanceMonth.objects.filter(pk__in=[month.pk for month in emptied]).delete()
+    return sum(len(days) for days in months.values())
+
+
+def _locked_months(keys):
+    """The stored months among ``(student_id, standard_id, subject_id, year, month)`` keys, locked."""
+    return (
+        AttendanceMonth.objects
+        .select_for_update()
+        .filter(
+            student_id__in={key[0] for key in keys},
+            standard_id__in={key[1] for key in keys},
+            year__in={key[3] for key in keys},
+            month__in={key[4] for key in keys},
+        )
+        .order_by('pk')
+    )
+
+
+def pack_rows(queryset, chunk_size=5000):
+    """
+    Copy the Attendance rows of ``queryset`` into packed months, a chunk
+    at a time. Returns the number of rows packed.
+    """
+    rows = (
+        queryset
+        .order_by('pk')
+        .values_list('student_id', 'standard_id', 'subject_id', 'academic_year_id', 'date', 'status')
+        .iterator(chunk_size=chunk_size)
+    )
+    packed = 0
+    while chunk := list(islice(rows, chunk_size)):
+        packed += record_packed(chunk)
+    return packed
+
+
+def rebuild_packed(academic_year_ids=None, standard_ids=None, chunk_size=5000):
+    """
+    Replace the packed months with a fresh copy of the Attendance rows,
+    optionally only of some academic years or standards. Returns the
+    number of rows packed.
+    """
+    rows = Attendance.objects.all()
+    months = AttendanceMonth.objects.all()
+    if academic_year_ids is not None:
+        rows = rows.filter(academic_year_id__in=academic_year_ids)
+        months = months.filter(academic_year_id__in=academic_year_ids)
+    if standard_ids is not None:
+        rows = rows.filter(standard_id__in=standard_ids)
+        months = months.filter(standard_id__in=standard_ids)
+    with transaction.atomic():
+        months.delete()
+        return pack_rows(rows, chunk_size)
+
+
+def month_codes(standard, year, month, subject=None):
+    """
+    ``(student_ids, codes)`` for a section's month in one period: the
+    students with any entry, by id, and their ``(n, 32)`` status codes
+    as decode_months() returns them.
+    """
+    if packed_storage():
+        # The months hold the same entries as the rows, one row per student
+        rows = list(
+            AttendanceMonth.objects
+            .filter(standard=standard, subject=subject, year=year, month=month)
+            .order_by('student_id')
+            .values_list('student_id', 'recorded', 'statuses')
+        )
+        if not rows:
+            return [], np.empty((0, MAX_DAYS), dtype=np.int8)
+        student_ids, recorded, statuses = zip(*rows)
+        return list(student_ids), decode_months(recorded, statuses)
+
+    first, last = month_bounds(year, month)
+    month_start = to_ad(first)
+    by_student = {}
+    # Days are counted from the month's first day in AD; no row is converted to BS
+    for student_id, date, status in (
+        Attendance.objects
+        .filter(standard=standard, subject=subject, date__range=(first, last))
+        .values_list('student_id', ad_column('date'), 'status')
+    ):
+        by_student.setdefault(student_id, {})[(date - month_start).days + 1] = STATUS_CODES[status]
+    student_ids = sorted(by_student)
+    codes = np.full((len(student_ids), MAX_DAYS), NO_ENTRY, dtype=np.int8)
+    for row, student_id in enumerate(student_ids):
+        for day, code in by_student[student_id].items():
+            codes[row, day - 1] = code
+    return student_ids, codes
+
+
+def month_report(standard, year, month, subject=None):
+    """Per-student day-by-day statuses and status counts of a section's month."""
+    student_ids, codes = month_codes(standard, year, month, subject)
+    codes = codes[:, :days_in_month(year, month)]
+    counts = np.stack([(codes == code).sum(axis=1) for code in range(len(STATUSES))], axis=1)
+    return [
+        {
+            'student_id': student_id,
+            'days': [STATUSES[code] if code != NO_ENTRY else None for code in day_codes.tolist()],
+            **dict(zip(STATUSES, student_counts.tolist())),
+        }
+        for student_id, day_codes, student_counts in zip(student_ids, codes, counts)
+    ]
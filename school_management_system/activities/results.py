@@ -0,0 +1,392 @@
+"""
+Set-based computation of StudentResultSummary rows.
+
+Summaries are derived from SubjectResult with one grouped aggregate query
+and written back with one bulk upsert, so processing an exam costs the same
+number of queries whether a class has 20 students or 2,000. Ranks are
+assigned by PostgreSQL window functions in a single UPDATE per exam.
+
+Individual result writes do not recompute anything themselves: they mark
+their (enrollment, exam) pair dirty and every dirty pair is recomputed once,
+in one batch, when the surrounding transaction commits.
+"""
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from decimal import Decimal, ROUND_HALF_UP
+from itertools import islice
+
+import numpy as np
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Avg, Count, Q, Sum
+from django.utils import timezone
+
+from academics.models import StudentEnrollment
+from . import locks
+from .full_marks import full_marks_by_standard, percentage
+from .models import ExamSubject, StudentResultSummary, SubjectResult
+from .scales import tables_for_exams
+from .statistics import rebuild_standard_statistics, record_result_changes, record_summary_changes
+
+
+SUMMARY_UPDATE_FIELDS = ['academic_year', 'total_marks', 'percentage', 'gpa', 'overall_grade', 'updated_at']
+
+# Tie policies for rank_exam():
+#   competition -> 1, 2, 2, 4 (RANK)
+#   dense       -> 1, 2, 2, 3 (DENSE_RANK)
+RANK_FUNCTIONS = {
+    'competition': 'RANK',
+    'dense': 'DENSE_RANK',
+}
+
+TWO_PLACES = Decimal('0.01')
+
+
+def build_summaries(results):
+    """
+    Aggregate a SubjectResult queryset into unsaved StudentResultSummary objects.
+
+    Runs a single GROUP BY query over (enrollment, exam); one summary is
+    returned for every pair that has at least one result in ``results``.
+    Percentages use the cached full-marks totals of each exam and standard.
+    """
+    rows = list(
+        results
+        .order_by()
+        .values(
+            'student_id',
+            'student__academic_year_id',
+            'student__standard_id',
+            'exam_subject__exam_id',
+            'exam_subject__exam__academic_year_id',
+        )
+        .annotate(
+            theory=Sum('marks_obtained_theory'),
+            practical=Sum('marks_obtained_practical'),
+            avg_gpa=Avg('subject_grade_point'),
+            ng_count=Count('id', filter=Q(subject_grade='NG')),
+        )
+    )
+
+    tables = tables_for_exams({
+        row['exam_subject__exam_id']: row['exam_subject__exam__academic_year_id'] for row in rows
+    })
+    full_marks = full_marks_by_standard({row['exam_subject__exam_id'] for row in rows})
+
+    summaries = []
+    for row in rows:
+        has_ng = row['ng_count'] > 0
+        # GPA is not awarded if a student fails a subject
+        avg_gpa = Decimal(0) if has_ng else Decimal(row['avg_gpa'] or 0)
+        total_marks = (row['theory'] or 0) + (row['practical'] or 0)
+        summaries.append(StudentResultSummary(
+            student_id=row['student_id'],
+            exam_id=row['exam_subject__exam_id'],
+            academic_year_id=row['student__academic_year_id'],
+            total_marks=total_marks,
+            percentage=percentage(
+                total_marks,
+                full_marks[row['exam_subject__exam_id']].get(row['student__standard_id']),
+            ),
+            gpa=avg_gpa.quantize(TWO_PLACES, rounding=ROUND_HALF_UP),
+            overall_grade=tables[row['exam_subject__exam_id']].overall_grade(avg_gpa, has_ng),
+        ))
+    return summaries
+
+
+def save_summaries(summaries):
+    """Insert or update summaries in one statement, keyed on (student, exam)."""
+    if not summaries:
+        return []
+    return StudentResultSummary.objects.bulk_create(
+        summaries,
+        update_conflicts=True,
+        unique_fields=['student', 'exam'],
+        update_fields=SUMMARY_UPDATE_FIELDS,
+    )
+
+
+def pairs_condition(pairs, exam_field, student_field):
+    """Build a Q matching (enrollment_id, exam_id) pairs, one clause per exam."""
+    by_exam = defaultdict(set)
+    for enrollment_id, exam_id in pairs:
+        by_exam[exam_id].add(enrollment_id)
+
+    condition = Q()
+    for exam_id, enrollment_ids in by_exam.items():
+        condition |= Q(**{exam_field: exam_id, f'{student_field}__in': enrollment_ids})
+    return condition
+
+
+def refresh_summaries(pairs):
+    """
+    Recompute the summaries of the given (enrollment_id, exam_id) pairs.
+
+    All pairs are aggregated in a single query. Pairs that no longer have
+    any subject result lose their summary. Standard statistics are moved
+    by the difference between the old and new summaries. Returns the
+    number written.
+    """
+    pairs = set(pairs)
+    if not pairs:
+        return 0
+
+    with transaction.atomic(savepoint=False):
+        # A concurrent refresh of the same pairs would read the same old
+        # summaries and apply its difference to the statistics twice
+        locks.lock('result-summary', pairs)
+        # (enrollment_id, exam_id) -> (standard_id, total_marks, overall_grade) before the refresh
+        previous = {
+            (enrollment_id, exam_id): rest
+            for enrollment_id, exam_id, *rest in StudentResultSummary.objects
+            .filter(pairs_condition(pairs, 'exam_id', 'student_id'))
+            .values_list('student_id', 'exam_id', 'student__standard_id', 'total_marks', 'overall_grade')
+        }
+
+        results = SubjectResult.objects.filter(
+            pairs_condition(pairs, 'exam_subject__exam_id', 'student_id')
+        )
+        summaries = save_summaries(build_summaries(results))
+
+        emptied = pairs - {(summary.student_id, summary.exam_id) for summary in summaries}
+        if emptied:
+            StudentResultSummary.objects.filter(
+                pairs_condition(emptied, 'exam_id', 'student_id')
+            ).delete()
+
+        standards = {enrollment_id: values[0] for (enrollment_id, _), values in previous.items()}
+        missing = {summary.student_id for summary in summaries} - standards.keys()
+        if missing:
+            standards.update(StudentEnrollment.objects.filter(pk__in=missing).values_list('id', 'standard_id'))
+
+        changes = []
+        for summary in summaries:
+            pair = (summary.student_id, summary.exam_id)
+            key = (summary.exam_id, standards[summary.student_id])
+            old = previous.get(pair)
+            changes.append((
+                key + tuple(old[1:]) if old else None,
+                key + (summary.total_marks, summary.overall_grade),
+            ))
+        for pair in emptied & previous.keys():
+            old = previous[pair]
+            changes.append(((pair[1], old[0], old[1], old[2]), None))
+        record_summary_changes(changes)
+    return len(summaries)
+
+
+def process_exam_results(exam, standard_ids=None):
+    """
+    Recompute every StudentResultSummary of ``exam``.
+
+    Only enrolled students of the exam's academic year in a standard that
+    sits the exam are considered. ``standard_ids`` narrows processing to a
+    subset of standards. Returns the number of summaries written.
+    """
+    exam_standards = (
+        ExamSubject.objects
+        .filter(exam=exam)
+        .values('subject__standard')
+    )
+    results = SubjectResult.objects.filter(
+        exam_subject__exam=exam,
+        student__academic_year_id=exam.academic_year_id,
+        student__status='enrolled',
+        student__standard__in=exam_standards,
+    )
+    if standard_ids is not None:
+        results = results.filter(student__standard_id__in=standard_ids)
+
+    with transaction.atomic():
+        written = len(save_summaries(build_summaries(results)))
+        rebuild_standard_statistics([exam.pk], standard_ids)
+    return written
+
+
+def rank_exam(exam_id, tie_policy=None):
+    """
+    Rank every summary of an exam within its standard, in one statement.
+
+    Students are ordered by GPA then total marks. ``tie_policy`` is a key of
+    RANK_FUNCTIONS and defaults to settings.RESULT_RANKING_TIE_POLICY.
+    Returns the number of summaries whose rank changed.
+    """
+    tie_policy = tie_policy or getattr(settings, 'RESULT_RANKING_TIE_POLICY', 'competition')
+    if tie_policy not in RANK_FUNCTIONS:
+        raise ValueError(
+            f"Unknown tie policy {tie_policy!r}; expected one of {sorted(RANK_FUNCTIONS)}."
+        )
+
+    qn = connection.ops.quote_name
+    summary_table = qn(StudentResultSummary._meta.db_table)
+    enrollment_table = qn(StudentEnrollment._meta.db_table)
+    sql = f"""
+        UPDATE {summary_table} AS summary
+        SET rank = ranked.position, updated_at = %s
+        FROM (
+            SELECT
+                s.id,
+                {RANK_FUNCTIONS[tie_policy]}() OVER (
+                    PARTITION BY e.standard_id
+                    ORDER BY s.gpa DESC NULLS LAST, s.total_marks DESC
+                ) AS position
+            FROM {summary_table} AS s
+            INNER JOIN {enrollment_table} AS e ON e.id = s.student_id
+            WHERE s.exam_id = %s
+        ) AS ranked
+        WHERE summary.id = ranked.id
+          AND summary.rank IS DISTINCT FROM ranked.position
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [timezone.now(), exam_id])
+        return cursor.rowcount
+
+
+def regrade_results(results, chunk_size=2000):
+    """
+    Re-grade a SubjectResult queryset in chunks of bulk updates.
+
+    Each chunk is graded with one vectorized call; only rows whose grade or
+    grade point changes are written, and only their summaries are marked
+    dirty. Subject statistics move the changed rows between grades.
+    Returns the number of results updated.
+    """
+    rows = (
+        results
+        .order_by()
+        .values_list(
+            'id',
+            'student_id',
+            'exam_subject_id',
+            'exam_subject__exam_id',
+            'exam_subject__exam__academic_year_id',
+            'marks_obtained_theory',
+            'marks_obtained_practical',
+            'exam_subject__full_marks_theory',
+            'exam_subject__full_marks_practical',
+            'subject_grade',
+            'subject_grade_point',
+        )
+        .iterator(chunk_size=chunk_size)
+    )
+
+    updated = 0
+    while chunk := list(islice(rows, chunk_size)):
+        (ids, enrollment_ids, exam_subject_ids, exam_ids, exam_years, theory, practical,
+         full_theory, full_practical, old_grades, old_points) = map(np.asarray, zip(*chunk))
+        tables = tables_for_exams(dict(zip(exam_ids.tolist(), exam_years.tolist())))
+
+        # One vectorized call per exam in the chunk, each with its own scale
+        grades = np.empty(len(chunk), dtype=object)
+        points = np.empty(len(chunk), dtype=object)
+        for exam_id, table in tables.items():
+            rows_of_exam = exam_ids == exam_id
+            grades[rows_of_exam], points[rows_of_exam] = table.grade_marks(
+                theory[rows_of_exam],
+                practical[rows_of_exam],
+                full_theory[rows_of_exam],
+                full_practical[rows_of_exam],
+            )
+
+        changed = np.flatnonzero((grades != old_grades) | (points != old_points)).tolist()
+        if not changed:
+            continue
+
+        with transaction.atomic(), defer_summary_updates():
+            # bulk_update() does not fill auto_now fields
+            now = timezone.now()
+            SubjectResult.objects.bulk_update(
+                [
+                    SubjectResult(
+                        pk=int(ids[index]),
+                        subject_grade=grades[index],
+                        subject_grade_point=points[index],
+                        updated_at=now,
+                    )
+                    for index in changed
+                ],
+                ['subject_grade', 'subject_grade_point', 'updated_at'],
+            )
+            for index in changed:
+                mark_summary_dirty(int(enrollment_ids[index]), int(exam_ids[index]))
+            record_result_changes(
+                (
+                    (int(exam_subject_ids[index]), theory[index] + practical[index], old_grades[index]),
+                    (int(exam_subject_ids[index]), theory[index] + practical[index], grades[index]),
+                )
+                for index in changed
+            )
+        updated += len(changed)
+    return updated
+
+
+# ============================================================
+# DEFERRED RECOMPUTATION
+# ============================================================
+
+_pending = threading.local()
+
+
+def _dirty_pairs():
+    pairs = getattr(_pending, 'pairs', None)
+    if pairs is None:
+        pairs = _pending.pairs = set()
+    return pairs
+
+
+def _schedule_flush():
+    # One flush per transaction covers every pair marked in it. A rollback
+    # drops the callback from run_on_commit, so the next mark schedules a
+    # new one
+    if getattr(_pending, 'scheduled', False) and any(
+        func is flush_dirty_summaries for _, func, _ in connection.run_on_commit
+    ):
+        return
+    _pending.scheduled = True
+    transaction.on_commit(flush_dirty_summaries)
+
+
+def mark_summary_dirty(enrollment_id, exam_id):
+    """
+    Record that a summary needs recomputing once the transaction commits.
+
+    Outside a transaction the recomputation happens immediately. Inside
+    defer_summary_updates() it waits until the outermost block exits.
+    """
+    _dirty_pairs().add((enrollment_id, exam_id))
+    if not getattr(_pending, 'deferred', 0):
+        _schedule_flush()
+
+
+def flush_dirty_summaries():
+    """Recompute every pending pair once. Returns the number of summaries written."""
+    _pending.scheduled = False
+    pairs = _dirty_pairs()
+    if not pairs:
+        return 0
+    batch = set(pairs)
+    pairs.clear()
+    return refresh_summaries(batch)
+
+
+@contextmanager
+def defer_summary_updates():
+    """
+    Suspend summary recomputation for bulk imports and seeding.
+
+    Result writes inside the block are only recorded; all of them are
+    recomputed together when the block exits (or, inside a transaction,
+    when it commits).
+    """
+    _pending.deferred = getattr(_pending, 'deferred', 0) + 1
+    try:
+        yield
+    finally:
+        _pending.deferred -= 1
+        # Also when the block raises: in autocommit the writes before the
+        # error are already committed; inside a transaction that rolls
+        # back, on_commit() drops the flush
+        if not _pending.deferred:
+            _schedule_flush()
@@ -0,0 +1,81 @@
+"""
+Resolution and in-process caching of grading scales.
+
+The scale for an exam is the exam's own scale, else its academic year's,
+else the default scale, else the built-in CDC scale. Finding it is one
+small query; compiling it into a GradingTable happens once per process and
+is cached against the scale's updated_at. Editing a scale or any of its
+bands bumps updated_at, so every process recompiles on its next lookup.
+"""
+from django.db.models import Q
+
+from .grading import CDC_TABLE, GradingTable
+from .models import GradeBand, GradingScale
+
+
+# scale id -> (updated_at, GradingTable)
+_compiled = {}
+
+
+def _compile(scale_id, updated_at, component_pass_percentage):
+    cached = _compiled.get(scale_id)
+    if cached is not None and cached[0] == updated_at:
+        return cached[1]
+
+    bands = GradeBand.objects.filter(scale_id=scale_id).values_list(
+        'grade', 'grade_point', 'min_percentage', 'min_gpa',
+    )
+    table = GradingTable(list(bands), component_pass_percentage)
+    _compiled[scale_id] = (updated_at, table)
+    return table
+
+
+def resolve_scales(exam_years):
+    """
+    Map ``{exam_id: academic_year_id}`` to the scale row that applies to each
+    exam, ``(id, updated_at, component_pass_percentage, exam_id,
+    academic_year_id)``, or None where the CDC scale applies.
+
+    Every exam is resolved with a single query.
+    """
+    if not exam_years:
+        return {}
+
+    scales = (
+        GradingScale.objects
+        .filter(
+            Q(exam_id__in=exam_years)
+            | Q(exam__isnull=True, academic_year_id__in=set(exam_years.values()))
+            | Q(exam__isnull=True, academic_year__isnull=True, is_default=True)
+        )
+        .order_by('id')
+        .values_list('id', 'updated_at', 'component_pass_percentage', 'exam_id', 'academic_year_id')
+    )
+
+    by_exam, by_year, default = {}, {}, None
+    for scale in scales:
+        exam_id, academic_year_id = scale[3], scale[4]
+        if exam_id:
+            by_exam.setdefault(exam_id, scale)
+        elif academic_year_id:
+            by_year.setdefault(academic_year_id, scale)
+        elif default is None:
+            default = scale
+
+    return {
+        exam_id: by_exam.get(exam_id) or by_year.get(academic_year_id) or default
+        for exam_id, academic_year_id in exam_years.items()
+    }
+
+
+def tables_for_exams(exam_years):
+    """Map ``{exam_id: academic_year_id}`` to ``{exam_id: GradingTable}``."""
+    return {
+        exam_id: _compile(*scale[:3]) if scale else CDC_TABLE
+        for exam_id, scale in resolve_scales(exam_years).items()
+    }
+
+
+def table_for_exam(exam):
+    """The compiled grading table that applies to ``exam``."""
+    return tables_for_exams({exam.pk: exam.academic_year_id})[exam.pk]
@@ -1,60 +1,109 @@
-from django.db.models.signals import post_save
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from django.db.models import Sum, Avg
-from .models import SubjectResult, StudentResultSummary
+from django.utils import timezone
+from academics.models import Subject
+from .attendance_rollups import rebuild_attendance_rollups, record_attendance_changes
+from .models import Attendance, ExamSubject, GradeBand, GradingScale, SubjectResult
+from .packed_attendance import packed_storage, rebuild_packed, record_packed, remove_packed
+from .results import mark_summary_dirty
+from .statistics import rebuild_exam_subject_statistics, record_result_changes
 
 @receiver(post_save, sender=SubjectResult)
 def update_result_summary(sender, instance, **kwargs):
-    print('!!! Signal triggered')
-    # 'instance.student' is now a StudentEnrollment object
-    enrollment = instance.student 
-    actual_student = enrollment.student # The underlying Student model
-    exam = instance.exam_subject.exam
-    academic_year = enrollment.academic_year
-
-    # 1. Fetch all subject results for this student for THIS specific exam
-    results = SubjectResult.objects.filter(
-        student__student=actual_student, 
-        exam_subject__exam=exam
-    )
-    
-    # 2. Calculate totals
-    # We aggregate both theory and practical from all subjects
-    aggregates = results.aggregate(
-        total_theory=Sum('marks_obtained_theory'),
-        total_practical=Sum('marks_obtained_practical'),
-        avg_gpa=Avg('subject_grade_point')
-    )
-    
-    total_marks = (aggregates['total_theory'] or 0) + (aggregates['total_practical'] or 0)
-    avg_gpa = aggregates['avg_gpa'] or 0
-
-    # 3. Determine Overall Grade (CDC Logic)
-    # If ANY subject has an 'NG', the overall grade is 'NG'
-    if results.filter(subject_grade='NG').exists():
-        overall = 'NG'
-        avg_gpa = 0.00 # Usually, GPA is not awarded if a student fails a subject
+    # 'instance.student' is a StudentEnrollment, and so is the summary's student.
+    # The summary is recomputed once per transaction, not once per saved row.
+    mark_summary_dirty(instance.student_id, instance.exam_subject.exam_id)
+
+
+@receiver(post_delete, sender=SubjectResult)
+def remove_from_result_summary(sender, instance, **kwargs):
+    try:
+        exam_id = instance.exam_subject.exam_id
+    except ObjectDoesNotExist:
+        # The exam subject is being deleted along with its results
+        return
+    mark_summary_dirty(instance.student_id, exam_id)
+
+
+@receiver(post_save, sender=SubjectResult)
+def update_exam_subject_statistics(sender, instance, created, **kwargs):
+    new = instance.statistics_entry()
+    if created:
+        record_result_changes([(None, new)])
+    elif hasattr(instance, '_statistics_entry'):
+        record_result_changes([(instance._statistics_entry, new)])
+    else:
+        # Not loaded from the database with all its fields, so what the
+        # statistics count for this row is unknown; recount the subject.
+        rebuild_exam_subject_statistics([instance.exam_subject_id])
+    instance._statistics_entry = new
+
+
+@receiver(post_delete, sender=SubjectResult)
+def remove_from_exam_subject_statistics(sender, instance, **kwargs):
+    # Deleting the exam subject cascades to its statistics as well
+    record_result_changes([(getattr(instance, '_statistics_entry', instance.statistics_entry()), None)])
+
+
+@receiver(post_save, sender=Attendance)
+def update_attendance_rollups(sender, instance, created, **kwargs):
+    new = instance.rollup_entry()
+    if created:
+        record_attendance_changes([(None, new)])
+    elif hasattr(instance, '_rollup_entry'):
+        record_attendance_changes([(instance._rollup_entry, new)])
+    else:
+        # Not loaded from the database with all its fields, so what the
+        # rollups count for this row is unknown; recount its section.
+        rebuild_attendance_rollups([instance.academic_year_id], [instance.standard_id])
+    instance._rollup_entry = new
+
+
+@receiver(post_delete, sender=Attendance)
+def remove_from_attendance_rollups(sender, instance, **kwargs):
+    # Deleting the student or standard cascades to its rollups as well
+    record_attendance_changes([(getattr(instance, '_rollup_entry', instance.rollup_entry()), None)])
+
+
+@receiver(post_save, sender=Attendance)
+def update_attendance_month(sender, instance, created, **kwargs):
+    if not packed_storage():
+        return
+    new = instance.packed_entry()
+    if created:
+        record_packed([new])
+    elif hasattr(instance, '_packed_entry'):
+        old = instance._packed_entry
+        # An entry moved to another day or period leaves its old day empty
+        if old[:3] + old[4:5] != new[:3] + new[4:5]:
+            remove_packed([old])
+        record_packed([new])
     else:
-        # Simple mapping based on total average percentage or GPA
-        if avg_gpa >= 3.6: overall = 'A+'
-        elif avg_gpa >= 3.2: overall = 'A'
-        elif avg_gpa >= 2.8: overall = 'B+'
-        elif avg_gpa >= 2.4: overall = 'B'
-        elif avg_gpa >= 2.0: overall = 'C+'
-        elif avg_gpa >= 1.6: overall = 'C'
-        else: overall = 'D'
-
-    # 4. Update or Create the Summary
-    # We use actual_student so the summary links to the person, not just the enrollment record
-    StudentResultSummary.objects.update_or_create(
-        student=actual_student,
-        exam=exam,
-        defaults={
-            'academic_year': academic_year,
-            'total_marks': total_marks,
-            'gpa': avg_gpa,
-            'overall_grade': overall,
-            # 'percentage' calculation if needed:
-            # 'percentage': (total_marks / total_full_marks) * 100 
-        }
-    )
\ No newline at end of file
+        # Not loaded from the database with all its fields, so where the
+        # months hold this row is unknown; copy its section again.
+        rebuild_packed([instance.academic_year_id], [instance.standard_id])
+    instance._packed_entry = new
+
+
+@receiver(post_delete, sender=Attendance)
+def remove_from_attendance_month(sender, instance, **kwargs):
+    if packed_storage():
+        remove_packed([getattr(instance, '_packed_entry', instance.packed_entry())])
+
+
+@receiver(post_save, sender=GradeBand)
+@receiver(post_delete, sender=GradeBand)
+def touch_grading_scale(sender, instance, **kwargs):
+    # Compiled scales are cached against updated_at; bumping it makes
+    # every process recompile the scale on its next lookup.
+    GradingScale.objects.filter(pk=instance.scale_id).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Subject)
+def touch_exam_subjects_of_subject(sender, instance, created, **kwargs):
+    # A subject moving to another standard moves its full marks with it;
+    # touching its exam subjects changes their exams' full-marks version
+    if not created:
+        ExamSubject.objects.filter(subject=instance).update(updated_at=timezone.now())
+
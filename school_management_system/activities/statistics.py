@@ -0,0 +1,157 @@
+"""
+Incremental maintenance of ExamSubjectStatistics and ExamStandardStatistics.
+
+Writers report each change as an (old, new) pair of entries, where an entry
+is the statistics key followed by (total marks, grade), and None means the
+row did not exist before or no longer exists. apply_changes() locks the
+affected statistics rows and applies only the differences, so an update
+costs the same whether the exam has 50 results or 50,000.
+
+The rebuild_* functions recompute statistics from scratch; they back the
+full exam processing and the rebuild_exam_statistics command.
+"""
+import operator
+from collections import defaultdict
+from functools import reduce
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import ExamStandardStatistics, ExamSubjectStatistics, StudentResultSummary, SubjectResult
+
+
+def _changes(entries, key_length):
+    """Turn (old, new) entries into (key, old value, new value) per statistics row."""
+    changes = []
+    for old, new in entries:
+        if old is not None and new is not None and old[:key_length] == new[:key_length]:
+            changes.append((new[:key_length], old[key_length:], new[key_length:]))
+            continue
+        if old is not None:
+            changes.append((old[:key_length], old[key_length:], None))
+        if new is not None:
+            changes.append((new[:key_length], None, new[key_length:]))
+    return changes
+
+
+def apply_changes(model, changes):
+    """
+    Apply (key, old value, new value) changes to statistics rows of ``model``.
+
+    Missing rows that gain a value are created first; all touched rows are
+    then locked, updated in memory and written back with one bulk update.
+    """
+    pending = defaultdict(list)
+    for key, old, new in changes:
+        if old != new:
+            pending[key].append((old, new))
+    if not pending:
+        return 0
+
+    key_fields = model.STATISTICS_KEY
+    with transaction.atomic(savepoint=False):
+        # Removals never create a row: a missing row has nothing to remove,
+        # e.g. when it was deleted by the same cascade as the results.
+        created = [
+            model(**dict(zip(key_fields, key)))
+            for key, values in pending.items()
+            if any(new is not None for _, new in values)
+        ]
+        if created:
+            model.objects.bulk_create(created, ignore_conflicts=True)
+        rows = list(
+            model.objects
+            .select_for_update()
+            .filter(reduce(operator.or_, (Q(**dict(zip(key_fields, key))) for key in pending)))
+            .order_by('pk')
+        )
+        now = timezone.now()
+        for row in rows:
+            for old, new in pending[tuple(getattr(row, field) for field in key_fields)]:
+                if old is not None:
+                    row.apply(*old, sign=-1)
+                if new is not None:
+                    row.apply(*new)
+            row.updated_at = now
+        model.objects.bulk_update(rows, model.STATISTICS_FIELDS)
+    return len(rows)
+
+
+def record_result_changes(entries):
+    """
+    Update ExamSubjectStatistics for changed SubjectResults.
+
+    ``entries`` holds (old, new) pairs of SubjectResult.statistics_entry().
+    """
+    return apply_changes(ExamSubjectStatistics, _changes(entries, key_length=1))
+
+
+def record_summary_changes(entries):
+    """
+    Update ExamStandardStatistics for changed summaries.
+
+    ``entries`` holds (old, new) pairs of
+    (exam_id, standard_id, total_marks, overall_grade).
+    """
+    return apply_changes(ExamStandardStatistics, _changes(entries, key_length=2))
+
+
+def rebuild_exam_subject_statistics(exam_subject_ids):
+    """Recompute ExamSubjectStatistics of the given exam subjects from their results."""
+    exam_subject_ids = set(exam_subject_ids)
+    rows = {
+        exam_subject_id: ExamSubjectStatistics(exam_subject_id=exam_subject_id)
+        for exam_subject_id in exam_subject_ids
+    }
+    counts = (
+        SubjectResult.objects
+        .filter(exam_subject_id__in=exam_subject_ids)
+        .order_by()
+        .values(
+            'exam_subject_id',
+            'subject_grade',
+            total=F('marks_obtained_theory') + F('marks_obtained_practical'),
+        )
+        .annotate(count=Count('id'))
+    )
+    for row in counts:
+        rows[row['exam_subject_id']].apply(row['total'], row['subject_grade'], sign=row['count'])
+
+    ExamSubjectStatistics.objects.bulk_create(
+        rows.values(),
+        update_conflicts=True,
+        unique_fields=['exam_subject'],
+        update_fields=ExamSubjectStatistics.STATISTICS_FIELDS,
+    )
+    return len(rows)
+
+
+def rebuild_standard_statistics(exam_ids, standard_ids=None):
+    """
+    Recompute ExamStandardStatistics of the given exams from their summaries,
+    optionally only for ``standard_ids``.
+    """
+    summaries = StudentResultSummary.objects.filter(exam_id__in=exam_ids)
+    existing = ExamStandardStatistics.objects.filter(exam_id__in=exam_ids)
+    if standard_ids is not None:
+        summaries = summaries.filter(student__standard_id__in=standard_ids)
+        existing = existing.filter(standard_id__in=standard_ids)
+
+    rows = {}
+    counts = (
+        summaries
+        .order_by()
+        .values('exam_id', 'student__standard_id', 'total_marks', 'overall_grade')
+        .annotate(count=Count('id'))
+    )
+    for row in counts:
+        key = (row['exam_id'], row['student__standard_id'])
+        if key not in rows:
+            rows[key] = ExamStandardStatistics(exam_id=key[0], standard_id=key[1])
+        rows[key].apply(row['total_marks'], row['overall_grade'], sign=row['count'])
+
+    with transaction.atomic(savepoint=False):
+        existing.delete()
+        ExamStandardStatistics.objects.bulk_create(rows.values())
+    return len(rows)
@@ -1,12 +1,45 @@
-from django.test import TestCase
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
 from django.contrib.auth import get_user_model
+from django.urls import reverse
 from decimal import Decimal
+from django.utils import timezone
+import csv
+import datetime
+import json
+import threading
+from io import BytesIO, StringIO
+from zipfile import ZipFile
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+import nepali_datetime
 
-from activities.models import SubjectResult, StudentResultSummary, Exam, ExamSubject
+from django.core.management import call_command
+from activities.models import (
+    SubjectResult, StudentResultSummary, Exam, ExamSubject, GradingScale, GradeBand,
+    ExamSubjectStatistics, ExamStandardStatistics, ResultJob, Attendance, AttendanceMonth,
+    AttendanceDailyRollup, AttendanceMonthlyRollup,
+)
+from activities.api.serializers import (
+    AttendanceSerializer, ExamSubjectSerializer, MarkSheetSerializer, RollCallSerializer, SubjectResultSerializer,
+)
+from activities.full_marks import full_marks_by_standard
+from activities.jobs import STALE_AFTER, claim_next, enqueue, run_pending
+from activities.marksheets import iter_marksheets, iter_zip
+from activities.packed_attendance import clear_days, decode, decode_months, month_report, pack_rows, set_days
+from activities.grading import grade_marks, grade_one
+from activities.results import (
+    defer_summary_updates, flush_dirty_summaries, process_exam_results, rank_exam, refresh_summaries,
+    regrade_results,
+)
 from academics.models import (
-    StudentEnrollment, Standard, Subject, AcademicYear
+    StudentEnrollment, Standard, Subject, AcademicYear, ClassTeacher
 )
-from accounts.models import Student
+from academics.api.serializers import StudentEnrollmentSerializer
+from accounts.models import Student, Teacher
+from school_management_system import nepali_dates
+from school_management_system.compiled_serializers import compile_values, iter_representations
 
 User = get_user_model()
 
@@ -239,3 +272,1593 @@ class SubjectResultTestCase(TestCase):
                 marks_obtained_theory=Decimal('65.00'),
                 marks_obtained_practical=Decimal('22.00')
             )
+
+
+class ExamResultFixture:
+    """Shared fixture: one exam with two subjects for a class of students."""
+
+    def setUp(self):
+        self.academic_year = AcademicYear.objects.create(name='2081', is_current=True)
+        self.standard = Standard.objects.create(name='Class 10', section='A')
+        self.exam = Exam.objects.create(
+            name='First Terminal Exam 2081',
+            term='first_term',
+            academic_year=self.academic_year,
+            start_date='2081-01-01',
+            end_date='2081-01-15',
+        )
+        self.exam_subjects = []
+        for idx, name in enumerate(['Mathematics', 'Science'], start=1):
+            subject = Subject.objects.create(
+                name=name,
+                code=f'C10-{idx}',
+                standard=self.standard,
+                credit_hours=Decimal('4.0'),
+            )
+            self.exam_subjects.append(ExamSubject.objects.create(
+                exam=self.exam,
+                subject=subject,
+                exam_date='2081-01-05',
+                full_marks_theory=Decimal('75.00'),
+                pass_marks_theory=Decimal('27.00'),
+                full_marks_practical=Decimal('25.00'),
+                pass_marks_practical=Decimal('9.00'),
+            ))
+        self.enrollments = []
+        for idx in range(1, 4):
+            student = Student.objects.create(
+                first_name=f'Student{idx}',
+                last_name='Test',
+                admission_number=f'2081-{idx:04d}',
+            )
+            self.enrollments.append(StudentEnrollment.objects.create(
+                student=student,
+                standard=self.standard,
+                academic_year=self.academic_year,
+                roll_number=f'{idx:02d}',
+            ))
+
+    def enter_marks(self, enrollment, marks):
+        """Create one SubjectResult per exam subject from (theory, practical) pairs."""
+        return [
+            SubjectResult.objects.create(
+                student=enrollment,
+                exam_subject=exam_subject,
+                marks_obtained_theory=Decimal(theory),
+                marks_obtained_practical=Decimal(practical),
+            )
+            for exam_subject, (theory, practical) in zip(self.exam_subjects, marks)
+        ]
+
+
+class ExamResultTestBase(ExamResultFixture, TestCase):
+    """The shared fixture, rolled back after every test."""
+
+
+class ProcessExamResultsTestCase(ExamResultTestBase):
+    """Test cases for the set-based result processing engine."""
+
+    def setUp(self):
+        super().setUp()
+        self.enter_marks(self.enrollments[0], [('70', '20'), ('60', '20')])
+        self.enter_marks(self.enrollments[1], [('20', '20'), ('60', '20')])
+        self.enter_marks(self.enrollments[2], [('50', '15'), ('50', '15')])
+        StudentResultSummary.objects.all().delete()
+
+    def test_summaries_are_computed_for_every_enrollment(self):
+        processed = process_exam_results(self.exam)
+
+        self.assertEqual(processed, 3)
+        top = StudentResultSummary.objects.get(student=self.enrollments[0], exam=self.exam)
+        self.assertEqual(top.total_marks, Decimal('170.00'))
+        self.assertEqual(top.gpa, Decimal('3.80'))
+        self.assertEqual(top.overall_grade, 'A+')
+
+    def test_ng_subject_fails_the_summary(self):
+        process_exam_results(self.exam)
+
+        failed = StudentResultSummary.objects.get(student=self.enrollments[1], exam=self.exam)
+        self.assertEqual(failed.overall_grade, 'NG')
+        self.assertEqual(failed.gpa, Decimal('0.00'))
+
+    def test_query_count_does_not_depend_on_class_size(self):
+        full_marks_by_standard([self.exam.pk])
+        # SAVEPOINT, one grouped SELECT, full-marks version, grading scale lookup,
+        # one upsert, standard statistics SELECT, DELETE and INSERT, RELEASE;
+        # full marks are cached
+        with self.assertNumQueries(9):
+            process_exam_results(self.exam)
+
+    def test_percentage_uses_full_marks_of_the_standard(self):
+        process_exam_results(self.exam)
+
+        top = StudentResultSummary.objects.get(student=self.enrollments[0], exam=self.exam)
+        self.assertEqual(top.percentage, Decimal('85.00'))
+
+    def test_full_marks_are_cached_until_an_exam_subject_changes(self):
+        self.assertEqual(full_marks_by_standard([self.exam.pk]), {self.exam.pk: {self.standard.pk: Decimal('200.00')}})
+        # Only the exam's version
+        with self.assertNumQueries(1):
+            full_marks_by_standard([self.exam.pk])
+
+        self.exam_subjects[1].full_marks_practical = Decimal('75.00')
+        self.exam_subjects[1].save()
+        self.assertEqual(full_marks_by_standard([self.exam.pk])[self.exam.pk][self.standard.pk], Decimal('250.00'))
+
+    def test_full_marks_written_elsewhere_are_not_read_stale(self):
+        full_marks_by_standard([self.exam.pk])
+        # As another process would: no signal reaches this process's cache
+        ExamSubject.objects.filter(pk=self.exam_subjects[1].pk).update(
+            full_marks_practical=Decimal('75.00'), updated_at=timezone.now(),
+        )
+        self.assertEqual(full_marks_by_standard([self.exam.pk])[self.exam.pk][self.standard.pk], Decimal('250.00'))
+
+        # A saved subject may have moved standard; its exam subjects are touched
+        exam_subject = ExamSubject.objects.get(pk=self.exam_subjects[1].pk)
+        exam_subject.subject.save()
+        self.assertGreater(ExamSubject.objects.get(pk=exam_subject.pk).updated_at, exam_subject.updated_at)
+
+        self.assertEqual(full_marks_by_standard([0]), {0: {}})
+
+    def test_reprocessing_updates_existing_rows(self):
+        process_exam_results(self.exam)
+        process_exam_results(self.exam)
+
+        self.assertEqual(StudentResultSummary.objects.filter(exam=self.exam).count(), 3)
+
+
+class ConcurrentWritesTestCase(ExamResultFixture, TransactionTestCase):
+    """Test cases for statistics and rollups kept by concurrent writers of the same rows."""
+    # Lets the flush between tests cascade to the leftover summary-results
+    # table of migration 0009, which still references SubjectResult
+    available_apps = ['django.contrib.auth', 'django.contrib.contenttypes', 'accounts', 'academics', 'activities']
+
+    def in_thread(self, target):
+        def run():
+            try:
+                target()
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        errors = []
+        thread = threading.Thread(target=run)
+        thread.start()
+        return thread, errors
+
+    def run_alongside(self, write):
+        """Run ``write`` twice at once: the second starts before the first commits."""
+        with transaction.atomic():
+            write()
+            thread, errors = self.in_thread(write)
+            # The second writer has to wait for the first one's lock
+            thread.join(timeout=1)
+            self.assertTrue(thread.is_alive())
+        thread.join()
+        self.assertEqual(errors, [])
+
+    def test_concurrent_flushes_count_a_new_summary_once(self):
+        self.enter_marks(self.enrollments[0], [('70', '20'), ('60', '20')])
+        StudentResultSummary.objects.all().delete()
+        ExamStandardStatistics.objects.all().delete()
+
+        self.run_alongside(lambda: refresh_summaries([(self.enrollments[0].pk, self.exam.pk)]))
+
+        row = ExamStandardStatistics.objects.get(exam=self.exam, standard=self.standard)
+        self.assertEqual(row.result_count, 1)
+
+    def test_concurrent_mark_sheets_count_new_results_once(self):
+        exam_subject = self.exam_subjects[0]
+
+        def post_sheet():
+            serializer = MarkSheetSerializer(
+                data={'results': [
+                    {'student_id': enrollment.pk, 'marks_obtained_theory': '60', 'marks_obtained_practical': '20'}
+                    for enrollment in self.enrollments
+                ]},
+                context={'exam_subject': exam_subject},
+            )
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+
+        self.run_alongside(post_sheet)
+
+        self.assertEqual(ExamSubjectStatistics.objects.get(exam_subject=exam_subject).result_count, 3)
+        self.assertEqual(ExamStandardStatistics.objects.get(exam=self.exam, standard=self.standard).result_count, 3)
+
+    def test_concurrent_roll_calls_count_new_entries_once(self):
+        def post_roll_call():
+            serializer = RollCallSerializer(
+                data={'date': '2081-02-01', 'entries': [
+                    {'roll_number': enrollment.roll_number, 'status': 'absent'} for enrollment in self.enrollments
+                ]},
+                context={'standard': self.standard},
+            )
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+
+        self.run_alongside(post_roll_call)
+
+        self.assertEqual(Attendance.objects.count(), 3)
+        day = AttendanceDailyRollup.objects.get(student=self.enrollments[0].student)
+        month = AttendanceMonthlyRollup.objects.get(student=self.enrollments[0].student)
+        self.assertEqual((day.absent_count, month.absent_count), (1, 1))
+
+
+class RankExamTestCase(ExamResultTestBase):
+    """Test cases for window-function ranking."""
+
+    def setUp(self):
+        super().setUp()
+        # Two students tie on GPA and total marks
+        self.enter_marks(self.enrollments[0], [('50', '15'), ('50', '15')])
+        self.enter_marks(self.enrollments[1], [('70', '20'), ('60', '20')])
+        self.enter_marks(self.enrollments[2], [('50', '15'), ('50', '15')])
+        self.extra = Student.objects.create(
+            first_name='Student4', last_name='Test', admission_number='2081-0004',
+        )
+        self.enrollments.append(StudentEnrollment.objects.create(
+            student=self.extra,
+            standard=self.standard,
+            academic_year=self.academic_year,
+            roll_number='04',
+        ))
+        self.enter_marks(self.enrollments[3], [('40', '15'), ('40', '15')])
+        process_exam_results(self.exam)
+
+    def ranks(self):
+        return [
+            StudentResultSummary.objects.get(student=enrollment, exam=self.exam).rank
+            for enrollment in self.enrollments
+        ]
+
+    def test_competition_ranking(self):
+        rank_exam(self.exam.pk, tie_policy='competition')
+        self.assertEqual(self.ranks(), [2, 1, 2, 4])
+
+    def test_dense_ranking(self):
+        rank_exam(self.exam.pk, tie_policy='dense')
+        self.assertEqual(self.ranks(), [2, 1, 2, 3])
+
+    def test_unchanged_ranks_are_not_rewritten(self):
+        self.assertEqual(rank_exam(self.exam.pk), 4)
+        self.assertEqual(rank_exam(self.exam.pk), 0)
+
+    def test_unknown_tie_policy(self):
+        with self.assertRaises(ValueError):
+            rank_exam(self.exam.pk, tie_policy='olympic')
+
+
+class DeferredSummaryTestCase(ExamResultTestBase):
+    """Test cases for commit-time summary recomputation."""
+
+    def test_summary_is_written_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.enter_marks(self.enrollments[0], [('70', '20'), ('60', '20')])
+            self.assertFalse(StudentResultSummary.objects.exists())
+
+        summary = StudentResultSummary.objects.get(student=self.enrollments[0], exam=self.exam)
+        self.assertEqual(summary.total_marks, Decimal('170.00'))
+
+    def test_each_pair_is_recomputed_once(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.enter_marks(self.enrollments[0], [('70', '20'), ('60', '20')])
+            self.enter_marks(self.enrollments[1], [('50', '15'), ('50', '15')])
+
+        # One flush for the whole transaction, however many results were saved
+        self.assertEqual([callback for callback in callbacks if callback is flush_dirty_summaries], [flush_dirty_summaries])
+
+        full_marks_by_standard([self.exam.pk])
+        # Advisory lock, previous summaries, grouped SELECT, full-marks version,
+        # grading scale lookup, one upsert, new enrollments' standards, then the
+        # statistics insert, lock and update; the remaining callbacks are no-ops
+        with self.assertNumQueries(10):
+            for callback in callbacks:
+                callback()
+        self.assertEqual(StudentResultSummary.objects.count(), 2)
+
+    def test_rolled_back_flush_is_scheduled_again(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self.enter_marks(self.enrollments[0], [('70', '20')])
+                    raise ValueError("Entry aborted")
+            except ValueError:
+                pass
+            self.enter_marks(self.enrollments[1], [('50', '15'), ('50', '15')])
+
+        summary = StudentResultSummary.objects.get()
+        self.assertEqual(summary.student, self.enrollments[1])
+
+    def test_deferred_block_flushes_once_at_the_end(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            with defer_summary_updates():
+                for enrollment in self.enrollments:
+                    self.enter_marks(enrollment, [('50', '15'), ('50', '15')])
+
+        self.assertEqual(len(callbacks), 1)
+
+    def test_deferred_block_flushes_when_it_raises(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(ValueError):
+                with defer_summary_updates():
+                    self.enter_marks(self.enrollments[0], [('70', '20'), ('60', '20')])
+                    raise ValueError("Import aborted")
+
+        summary = StudentResultSummary.objects.get(student=self.enrollments[0], exam=self.exam)
+        self.assertEqual(summary.total_marks, Decimal('170.00'))
+
+    def test_deleted_results_remove_the_summary(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            results = self.enter_marks(self.enrollments[0], [('70', '20'), ('60', '20')])
+        with self.captureOnCommitCallbacks(execute=True):
+            for result in results:
+                result.delete()
+
+        self.assertFalse(StudentResultSummary.objects.exists())
+        self.assertEqual(refresh_summaries([(self.enrollments[0].pk, self.exam.pk)]), 0)
+
+
+class MarkSheetEntryTestCase(ExamResultTestBase):
+    """Test cases for the bulk mark-entry endpoint."""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('teacher', password='secret'))
+        self.url = reverse('examsubject-marks', args=[self.exam_subjects[0].pk])
+
+    def test_json_mark_sheet_is_upserted(self):
+        payload = {'results': [
+            {'student_id': self.enrollments[0].pk, 'marks_obtained_theory': '70', 'marks_obtained_practical': '20'},
+            {'student_id': self.enrollments[1].pk, 'marks_obtained_theory': '20', 'marks_obtained_practical': '5'},
+        ]}
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, payload, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['saved'], 2)
+        top = SubjectResult.objects.get(student=self.enrollments[0], exam_subject=self.exam_subjects[0])
+        self.assertEqual(top.subject_grade, 'A+')
+        self.assertEqual(StudentResultSummary.objects.filter(exam=self.exam).count(), 2)
+
+        payload['results'][0]['marks_obtained_theory'] = '50'
+        response = self.client.post(self.url, payload, format='json')
+        top.refresh_from_db()
+        self.assertEqual(top.marks_obtained_theory, Decimal('50.00'))
+        self.assertEqual(SubjectResult.objects.count(), 2)
+
+    def test_csv_mark_sheet_by_roll_number(self):
+        body = "roll_number,marks_obtained_theory,marks_obtained_practical\n01,60,20\n02,55,\n"
+        response = self.client.post(self.url, body, content_type='text/csv')
+
+        self.assertEqual(response.status_code, 200)
+        second = SubjectResult.objects.get(student=self.enrollments[1], exam_subject=self.exam_subjects[0])
+        self.assertEqual(second.marks_obtained_practical, Decimal('0.00'))
+
+    def test_errors_are_reported_per_row(self):
+        outsider = StudentEnrollment.objects.create(
+            student=Student.objects.create(first_name='Other', last_name='Test', admission_number='2081-0099'),
+            standard=Standard.objects.create(name='Class 9', section='A'),
+            academic_year=self.academic_year,
+            roll_number='01',
+        )
+        payload = {'results': [
+            {'student_id': self.enrollments[0].pk, 'marks_obtained_theory': '80'},
+            {'student_id': self.enrollments[1].pk, 'marks_obtained_theory': '60', 'marks_obtained_practical': '20'},
+            {'student_id': outsider.pk, 'marks_obtained_theory': '60'},
+        ]}
+        response = self.client.post(self.url, payload, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        errors = response.data['results']
+        self.assertIn('marks_obtained_theory', errors[0])
+        self.assertEqual(errors[1], {})
+        self.assertIn('student_id', errors[2])
+        self.assertFalse(SubjectResult.objects.exists())
+
+    def test_unknown_roll_numbers_are_not_duplicates(self):
+        body = "roll_number,marks_obtained_theory,marks_obtained_practical\n98,60,20\n99,55,15\n"
+        response = self.client.post(self.url, body, content_type='text/csv')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([set(row_errors) for row_errors in response.data['results']], [{'roll_number'}] * 2)
+
+
+class GradingKernelTestCase(TestCase):
+    """Test cases for the vectorized grading kernel."""
+
+    def test_grade_boundaries(self):
+        grades, points = grade_marks(
+            ['67.50', '67.49', '26.25', '26.24', '60', '30'],
+            ['22.50', '22.50', '25', '25', '0', '10'],
+            ['75', '75', '75', '75', '75', '75'],
+            ['25', '25', '25', '25', '0', '25'],
+        )
+        self.assertEqual(list(grades), ['A+', 'A', 'C+', 'NG', 'A', 'C'])
+        self.assertEqual(points[0], Decimal('4.0'))
+        self.assertEqual(points[3], Decimal('0.0'))
+
+    def test_zero_full_marks_is_ng(self):
+        self.assertEqual(grade_one(0, 0, 0, 0), ('NG', Decimal('0.0')))
+
+    def test_single_row_wrapper_matches_kernel(self):
+        self.assertEqual(grade_one(Decimal('70'), Decimal('20'), Decimal('75'), Decimal('25'))[0], 'A+')
+
+
+class RegradeResultsTestCase(ExamResultTestBase):
+    """Test cases for batch regrading."""
+
+    def test_only_changed_rows_are_written(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            results = self.enter_marks(self.enrollments[0], [('70', '20'), ('60', '20')])
+        SubjectResult.objects.filter(pk=results[0].pk).update(subject_grade='B', subject_grade_point=Decimal('2.8'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(regrade_results(SubjectResult.objects.all(), chunk_size=1), 1)
+
+        results[0].refresh_from_db()
+        self.assertEqual(results[0].subject_grade, 'A+')
+        self.assertTrue(StudentResultSummary.objects.filter(student=self.enrollments[0]).exists())
+
+
+class GradingScaleTestCase(ExamResultTestBase):
+    """Test cases for database-configured grading scales."""
+
+    def setUp(self):
+        super().setUp()
+        self.scale = GradingScale.objects.create(name='Pass/Fail', academic_year=self.academic_year)
+        GradeBand.objects.create(
+            scale=self.scale, grade='P', grade_point=Decimal('2.0'),
+            min_percentage=Decimal('50'), min_gpa=Decimal('0'),
+        )
+
+    def test_academic_year_scale_is_used(self):
+        first, second = self.enter_marks(self.enrollments[0], [('45', '10'), ('30', '10')])
+        self.assertEqual((first.subject_grade, first.subject_grade_point), ('P', Decimal('2.0')))
+        self.assertEqual(second.subject_grade, 'NG')
+
+    def test_exam_scale_overrides_academic_year_scale(self):
+        GradingScale.objects.create(name='Exam CDC', exam=self.exam)
+        first, = self.enter_marks(self.enrollments[0], [('45', '10')])
+        # An exam scale without bands grades everything NG
+        self.assertEqual(first.subject_grade, 'NG')
+
+    def test_editing_a_band_invalidates_the_compiled_scale(self):
+        first, = self.enter_marks(self.enrollments[0], [('45', '10')])
+        self.scale.bands.update(min_percentage=Decimal('60'))
+        GradeBand.objects.get(scale=self.scale).save()
+
+        first.save()
+        self.assertEqual(first.subject_grade, 'NG')
+
+    def test_regrade_command_only_touches_affected_exams(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            results = self.enter_marks(self.enrollments[0], [('45', '10'), ('60', '20')])
+        band = GradeBand.objects.get(scale=self.scale)
+        band.grade = 'S'
+        band.save()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('regrade', scale=self.scale.pk, stdout=StringIO())
+
+        self.assertEqual(
+            set(SubjectResult.objects.filter(pk__in=[r.pk for r in results]).values_list('subject_grade', flat=True)),
+            {'S'},
+        )
+        summary = StudentResultSummary.objects.get(student=self.enrollments[0], exam=self.exam)
+        self.assertEqual(summary.overall_grade, 'S')
+
+
+class ResultStatisticsTestCase(ExamResultTestBase):
+    """Test cases for incrementally maintained exam statistics."""
+
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.results = self.enter_marks(self.enrollments[0], [('70', '20'), ('60', '20')])
+            self.enter_marks(self.enrollments[1], [('20', '20'), ('60', '20')])
+            self.enter_marks(self.enrollments[2], [('50', '15'), ('50', '15')])
+
+    def statistics(self, model, **lookup):
+        row = model.objects.get(**lookup)
+        return (row.result_count, row.pass_count, row.total_marks_sum, row.grade_counts, row.mark_histogram)
+
+    def assertMatchesRebuild(self):
+        subject_rows = [
+            self.statistics(ExamSubjectStatistics, exam_subject=exam_subject)
+            for exam_subject in self.exam_subjects
+        ]
+        standard_row = self.statistics(ExamStandardStatistics, exam=self.exam, standard=self.standard)
+        call_command('rebuild_exam_statistics', exam=[self.exam.pk], stdout=StringIO())
+        self.assertEqual(subject_rows, [
+            self.statistics(ExamSubjectStatistics, exam_subject=exam_subject)
+            for exam_subject in self.exam_subjects
+        ])
+        self.assertEqual(
+            standard_row, self.statistics(ExamStandardStatistics, exam=self.exam, standard=self.standard),
+        )
+
+    def test_subject_statistics(self):
+        maths = self.exam_subjects[0].statistics
+        self.assertEqual((maths.result_count, maths.pass_count), (3, 2))
+        self.assertEqual(maths.mean_marks, Decimal('65.00'))
+        self.assertEqual(maths.median_marks, Decimal('65.00'))
+        self.assertEqual(maths.highest_marks, Decimal('90.00'))
+        self.assertEqual(maths.pass_rate, Decimal('66.67'))
+        self.assertEqual(maths.grade_counts, {'A+': 1, 'B': 1, 'NG': 1})
+
+    def test_standard_statistics(self):
+        row = ExamStandardStatistics.objects.get(exam=self.exam, standard=self.standard)
+        self.assertEqual((row.result_count, row.pass_count), (3, 2))
+        self.assertEqual(row.median_marks, Decimal('130.00'))
+        self.assertEqual(row.grade_counts, {'A+': 1, 'B+': 1, 'NG': 1})
+
+    def test_edits_and_deletes_match_a_rebuild(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.results[0].marks_obtained_theory = Decimal('40')
+            self.results[0].save()
+            self.results[1].delete()
+            # Loaded without the counted fields: the subject is recounted
+            result = SubjectResult.objects.only('id').get(student=self.enrollments[2], exam_subject=self.exam_subjects[0])
+            result.save()
+
+        self.assertEqual(self.exam_subjects[0].statistics.median_marks, Decimal('60.00'))
+        self.assertMatchesRebuild()
+
+    def test_regrade_moves_results_between_grades(self):
+        SubjectResult.objects.filter(pk=self.results[0].pk).update(subject_grade='B', subject_grade_point=Decimal('2.8'))
+        call_command('rebuild_exam_statistics', stdout=StringIO())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            regrade_results(SubjectResult.objects.all())
+
+        self.assertEqual(ExamSubjectStatistics.objects.get(exam_subject=self.exam_subjects[0]).grade_counts['A+'], 1)
+        self.assertMatchesRebuild()
+
+    def test_mark_sheet_upload_updates_statistics(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('teacher', password='secret'))
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post(
+                reverse('examsubject-marks', args=[self.exam_subjects[0].pk]),
+                {'results': [{'student_id': self.enrollments[1].pk, 'marks_obtained_theory': '60', 'marks_obtained_practical': '20'}]},
+                format='json',
+            )
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.exam_subjects[0].statistics.pass_count, 3)
+        self.assertMatchesRebuild()
+
+        response = client.get(
+            reverse('exam-subject-statistics-readonly-list'), {'exam_id': self.exam.pk, 'subject_id': self.exam_subjects[0].subject_id},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['pass_rate'], '100.00')
+
+
+class ResultJobTestCase(ExamResultTestBase):
+    """Test cases for the background result job queue."""
+
+    def setUp(self):
+        super().setUp()
+        self.enter_marks(self.enrollments[0], [('70', '20'), ('60', '20')])
+        self.enter_marks(self.enrollments[1], [('50', '15'), ('50', '15')])
+
+    def test_worker_processes_and_ranks_the_exam(self):
+        job, created = enqueue('process_exam', self.exam)
+        self.assertTrue(created)
+
+        self.assertEqual(run_pending(), 1)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.progress()), ('done', 100))
+        self.assertEqual(job.completed_standards, [self.standard.pk])
+        self.assertEqual(
+            list(StudentResultSummary.objects.order_by('rank').values_list('student', 'rank')),
+            [(self.enrollments[0].pk, 1), (self.enrollments[1].pk, 2)],
+        )
+
+    def test_exam_has_one_active_job_per_kind(self):
+        first, _ = enqueue('process_exam', self.exam)
+        second, created = enqueue('process_exam', self.exam)
+
+        self.assertFalse(created)
+        self.assertEqual(first, second)
+        self.assertTrue(enqueue('rank_exam', self.exam)[1])
+
+    def test_abandoned_job_resumes_after_its_checkpoints(self):
+        job = ResultJob.objects.create(
+            kind='process_exam',
+            exam=self.exam,
+            status='running',
+            completed_standards=[self.standard.pk],
+            heartbeat_at=timezone.now(),
+        )
+        self.assertIsNone(claim_next())
+
+        ResultJob.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - STALE_AFTER * 2)
+        run_pending()
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('done', 1))
+        # The checkpointed standard was not processed again
+        self.assertFalse(StudentResultSummary.objects.exists())
+
+    def test_failures_are_recorded(self):
+        job = ResultJob.objects.create(kind='unknown', exam=self.exam)
+        run_pending()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('KeyError', job.message)
+
+
+class BatchMarksheetTestCase(ExamResultTestBase):
+    """Test cases for class-wide marksheet rendering."""
+
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            for enrollment in self.enrollments:
+                self.enter_marks(enrollment, [('70', '20'), ('60', '20')])
+
+    def test_class_is_loaded_with_two_queries(self):
+        # Summaries, then every subject result of the class
+        with self.assertNumQueries(2):
+            marksheets = list(iter_marksheets(self.exam, self.standard))
+
+        self.assertEqual([name for name, _ in marksheets], [
+            '01-student1-test.html', '02-student2-test.html', '03-student3-test.html',
+        ])
+        self.assertIn('Mathematics', marksheets[0][1])
+        self.assertIn('90.00/100.00', marksheets[0][1])
+        self.assertIn('85.00%', marksheets[0][1])
+
+    def test_zip_is_streamed_one_file_at_a_time(self):
+        chunks = list(iter_zip(iter_marksheets(self.exam, self.standard)))
+
+        # One chunk per marksheet, then the central directory
+        self.assertEqual(len(chunks), 4)
+        with ZipFile(BytesIO(b''.join(chunks))) as archive:
+            self.assertEqual(len(archive.namelist()), 3)
+            self.assertIn(b'Student2 Test', archive.read('02-student2-test.html'))
+
+    def test_admin_action_downloads_every_class(self):
+        admin_user = User.objects.create_superuser('admin', password='secret')
+        self.client.force_login(admin_user)
+        response = self.client.post(
+            reverse('admin:activities_exam_changelist'),
+            {'action': 'download_class_marksheets', '_selected_action': [self.exam.pk]},
+        )
+
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        with ZipFile(BytesIO(b''.join(response.streaming_content))) as archive:
+            self.assertEqual(
+                archive.namelist()[0],
+                'first-terminal-exam-2081/class-10-a/01-student1-test.html',
+            )
+
+
+class ResultSummaryApiTestCase(ExamResultTestBase):
+    """Test cases for the result summary list endpoint."""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('teacher', password='secret'))
+        self.url = reverse('resultsummary-readonly-list')
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.enter_marks(self.enrollments[0], [('70', '20'), ('60', '20')])
+
+        # COUNT, the page of summaries, and all of the page's subject results
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.data['results'][0]['results']), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for enrollment in self.enrollments[1:]:
+                self.enter_marks(enrollment, [('50', '15'), ('50', '15')])
+
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+        self.assertEqual([len(summary['results']) for summary in response.data['results']], [2, 2, 2])
+
+    def test_detail_still_includes_results(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.enter_marks(self.enrollments[0], [('70', '20'), ('60', '20')])
+        summary = StudentResultSummary.objects.get()
+
+        response = self.client.get(reverse('resultsummary-readonly-detail', args=[summary.pk]))
+        self.assertEqual(
+            sorted(result['subject_grade'] for result in response.data['results']),
+            ['A', 'A+'],
+        )
+
+
+class MarksheetDetailApiTestCase(ExamResultTestBase):
+    """Test cases for the marksheet detail list endpoint."""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('teacher', password='secret'))
+        teacher = Teacher.objects.create(
+            first_name='Sita', last_name='Sharma', designation='Secondary Level Teacher',
+            email='sita@example.com', phone='9800000000',
+        )
+        ClassTeacher.objects.create(teacher=teacher, standard=self.standard, academic_year=self.academic_year)
+
+    def test_query_count_does_not_depend_on_students_on_the_page(self):
+        url = reverse('marksheet-readonly-list')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.enter_marks(self.enrollments[0], [('70', '20'), ('60', '20')])
+
+        # COUNT, the page, its summaries and its class teachers
+        with self.assertNumQueries(4):
+            self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for enrollment in self.enrollments[1:]:
+                self.enter_marks(enrollment, [('50', '15'), ('50', '15')])
+
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data['results']), 6)
+        self.assertEqual({row['class_teacher_name'] for row in response.data['results']}, {'Sita Sharma'})
+        self.assertTrue(all(row['resultsummary_id'] for row in response.data['results']))
+
+
+class KeysetPaginationTestCase(ExamResultTestBase):
+    """Test cases for keyset pagination on the attendance and result endpoints."""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('teacher', password='secret'))
+        for day in (3, 1, 2):
+            for enrollment in self.enrollments:
+                Attendance.objects.create(
+                    date=f'2081-02-0{day}',
+                    student=enrollment.student,
+                    standard=self.standard,
+                    academic_year=self.academic_year,
+                )
+
+    def walk(self, url, params):
+        rows, response = [], self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            rows += response.data['results']
+            if not response.data['next']:
+                return rows, response
+            response = self.client.get(response.data['next'])
+
+    def test_pages_follow_date_then_id(self):
+        rows, response = self.walk(reverse('attendance-readonly-list'), {'pagination': 'keyset', 'page_size': 2})
+
+        expected = list(Attendance.objects.order_by('date', 'id').values_list('id', flat=True))
+        self.assertEqual([row['id'] for row in rows], expected)
+        self.assertIsNone(response.data['count'])
+
+    def test_deep_page_skips_count_and_offset(self):
+        first = self.client.get(reverse('attendance-readonly-list'), {'pagination': 'keyset', 'page_size': 4})
+
+        with self.assertNumQueries(1) as queries:
+            self.client.get(first.data['next'])
+        for query in queries.captured_queries:
+            self.assertNotIn('COUNT', query['sql'])
+            self.assertNotIn('OFFSET', query['sql'])
+
+    def test_counts_are_opt_in(self):
+        url = reverse('attendance-readonly-list')
+        exact = self.client.get(url, {'pagination': 'keyset', 'count': 'exact'})
+        self.assertEqual((exact.data['count'], exact.data['count_estimated']), (9, False))
+
+        estimate = self.client.get(url, {'pagination': 'keyset', 'count': 'estimate'})
+        self.assertTrue(estimate.data['count_estimated'])
+        self.assertIsInstance(estimate.data['count'], int)
+
+    def test_page_numbers_remain_the_default(self):
+        response = self.client.get(reverse('subjectresults-readonly-list'))
+        self.assertEqual(response.data['count'], 0)
+        self.assertIn('previous', response.data)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('attendance-readonly-list'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('attendance-readonly-list'), {'cursor': 'WyJ4IiwxXQ'})
+        self.assertEqual(response.status_code, 404)
+
+
+
+class SparseFieldsTestCase(ExamResultTestBase):
+    """Test cases for ?fields= and ?expand= on the read-only endpoints."""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('teacher', password='secret'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.enter_marks(self.enrollments[0], [('70', '20'), ('60', '20')])
+        self.url = reverse('subjectresults-readonly-list')
+
+    def test_fields_select_columns_and_joins(self):
+        with self.assertNumQueries(2) as queries:
+            response = self.client.get(self.url, {'fields': 'id,marks_obtained_theory,student.roll_number'})
+
+        self.assertEqual(
+            response.data['results'][0],
+            {'id': response.data['results'][0]['id'], 'marks_obtained_theory': '70.00', 'student': {'roll_number': '01'}},
+        )
+        sql = queries.captured_queries[1]['sql']
+        self.assertIn('"academics_studentenrollment"."roll_number"', sql)
+        self.assertNotIn('marks_obtained_practical', sql)
+        self.assertNotIn('activities_examsubject', sql)
+        self.assertNotIn('accounts_student', sql)
+
+    def test_unexpanded_relations_render_as_ids(self):
+        result = SubjectResult.objects.order_by('id').first()
+        with self.assertNumQueries(2) as queries:
+            response = self.client.get(self.url, {'expand': ''})
+
+        row = response.data['results'][0]
+        self.assertEqual((row['student'], row['exam_subject']), (result.student_id, result.exam_subject_id))
+        self.assertNotIn('JOIN', queries.captured_queries[1]['sql'])
+
+        response = self.client.get(self.url, {'expand': 'exam_subject', 'fields': 'id,exam_subject,student'})
+        row = response.data['results'][0]
+        self.assertEqual(row['student'], result.student_id)
+        self.assertEqual(row['exam_subject']['full_marks_theory'], '75.00')
+
+    def test_method_fields_and_preloads_follow_the_selection(self):
+        response = self.client.get(reverse('marksheet-readonly-list'), {'fields': 'id,roll_no,student_full_name'})
+        self.assertEqual(set(response.data['results'][0]), {'id', 'roll_no', 'student_full_name'})
+        self.assertEqual(response.data['results'][0]['student_full_name'], 'Student1 Test')
+
+        # Without the results field the summaries' subject results are not loaded
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('resultsummary-readonly-list'), {'fields': 'id,gpa'})
+        self.assertEqual(set(response.data['results'][0]), {'id', 'gpa'})
+
+    def test_no_parameters_leaves_responses_unchanged(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['results'][0]['student']['student']['first_name'], 'Student1')
+
+
+class SideLoadingTestCase(ExamResultTestBase):
+    """Test cases for compact list responses with side-loaded objects."""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('teacher', password='secret'))
+        with self.captureOnCommitCallbacks(execute=True):
+            for enrollment in self.enrollments:
+                self.enter_marks(enrollment, [('70', '20'), ('60', '20')])
+
+    def test_nested_objects_are_included_once(self):
+        url = reverse('subjectresults-readonly-list')
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {'compact': 'true'})
+
+        row = response.data['results'][0]
+        result = SubjectResult.objects.get(pk=row['id'])
+        self.assertEqual((row['student'], row['exam_subject']), (result.student_id, result.exam_subject_id))
+
+        included = response.data['included']
+        self.assertEqual(set(included['academics.studentenrollment']), {str(e.pk) for e in self.enrollments})
+        self.assertEqual(list(included['academics.standard']), [str(self.standard.pk)])
+        self.assertEqual(list(included['activities.exam']), [str(self.exam.pk)])
+        enrollment = included['academics.studentenrollment'][str(result.student_id)]
+        self.assertEqual(enrollment['standard'], self.standard.pk)
+        self.assertEqual(included['accounts.student'][str(enrollment['student'])]['last_name'], 'Test')
+
+        # The default format is unchanged
+        response = self.client.get(url)
+        self.assertNotIn('included', response.data)
+        self.assertEqual(response.data['results'][0]['student']['standard']['name'], 'Class 10')
+
+    def test_marksheet_groups_are_moved_out_of_rows(self):
+        response = self.client.get(reverse('marksheet-readonly-list'), {'compact': '1'})
+
+        row = response.data['results'][0]
+        self.assertNotIn('exam_name', row)
+        self.assertNotIn('student_full_name', row)
+        included = response.data['included']
+        self.assertEqual(len(included['enrollments']), 3)
+        self.assertEqual(len(included['exam_subjects']), 2)
+        self.assertEqual(included['exam_subjects'][str(row['exam_subject_id'])]['exam_name'], self.exam.name)
+        self.assertEqual(included['summaries'][str(row['resultsummary_id'])]['summary_overall_grade'], 'A+')
+        self.assertNotIn('class_teachers', included)
+
+    def test_attendance_with_keyset_pages(self):
+        for enrollment in self.enrollments:
+            Attendance.objects.create(
+                date='2081-02-01',
+                student=enrollment.student,
+                standard=self.standard,
+                academic_year=self.academic_year,
+            )
+        response = self.client.get(
+            reverse('attendance-readonly-list'), {'compact': 'true', 'pagination': 'keyset', 'page_size': 2},
+        )
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNotNone(response.data['next'])
+        self.assertEqual(len(response.data['included']['accounts.student']), 2)
+        self.assertEqual(response.data['results'][0]['subject'], None)
+
+
+class ConditionalGetTestCase(ExamResultTestBase):
+    """Test cases for ETag validation on the read-only endpoints."""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('teacher', password='secret'))
+        with self.captureOnCommitCallbacks(execute=True):
+            for enrollment in self.enrollments:
+                self.enter_marks(enrollment, [('70', '20'), ('60', '20')])
+        self.url = reverse('subjectresults-readonly-list')
+
+    def assertNotModified(self, url, etag, queries, **params):
+        # The rows are loaded as for a 200 response, but nothing is serialized
+        with self.assertNumQueries(queries):
+            response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_unchanged_list_is_not_modified(self):
+        etag = self.client.get(self.url).headers['ETag']
+        # COUNT and the page
+        self.assertNotModified(self.url, etag, 2)
+
+        # The ETag is specific to the query string
+        response = self.client.get(self.url, {'page_size': 2}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_changes_to_rows_and_related_rows_invalidate(self):
+        etag = self.client.get(self.url).headers['ETag']
+
+        self.standard.name = 'Class Ten'
+        self.standard.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['student']['standard']['name'], 'Class Ten')
+
+        etag = response.headers['ETag']
+        SubjectResult.objects.order_by('pk').last().delete()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 5)
+
+    def test_bulk_writes_touch_updated_at(self):
+        url = reverse('resultsummary-readonly-list')
+        etag = self.client.get(url).headers['ETag']
+        rank_exam(self.exam.pk)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        result = SubjectResult.objects.first()
+        SubjectResult.objects.filter(pk=result.pk).update(subject_grade='B', subject_grade_point=Decimal('2.8'))
+        with self.captureOnCommitCallbacks(execute=True):
+            regrade_results(SubjectResult.objects.filter(pk=result.pk))
+        self.assertGreater(SubjectResult.objects.get(pk=result.pk).updated_at, result.updated_at)
+
+    def test_detail_has_last_modified(self):
+        result = SubjectResult.objects.first()
+        url = reverse('subjectresults-readonly-detail', args=[result.pk])
+        response = self.client.get(url)
+        self.assertIn('Last-Modified', response.headers)
+        self.assertNotModified(url, response.headers['ETag'], 1)
+
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response.headers['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get(reverse('subjectresults-readonly-detail', args=[0]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_keyset_pages_cover_the_next_link(self):
+        params = {'pagination': 'keyset', 'page_size': 5}
+        response = self.client.get(self.url, params)
+        self.assertIsNotNone(response.data['next'])
+        self.assertNotModified(self.url, response.headers['ETag'], 1, **params)
+
+        # Removing the row after the page only changes the next link
+        SubjectResult.objects.order_by('pk').last().delete()
+        response = self.client.get(self.url, params, HTTP_IF_NONE_MATCH=response.headers['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.data['next'])
+
+    def test_marksheet_covers_the_page_summaries_and_class_teachers(self):
+        url = reverse('marksheet-readonly-list')
+        etag = self.client.get(url).headers['ETag']
+        self.assertNotModified(url, etag, 4)
+
+        # Class teachers of other sections are not on the page
+        other = Standard.objects.create(name='Class 9', section='A')
+        teacher = Teacher.objects.create(
+            first_name='Sita', last_name='Sharma', designation='Secondary Level Teacher',
+            email='sita@example.com', phone='9800000000',
+        )
+        ClassTeacher.objects.create(teacher=teacher, standard=other, academic_year=self.academic_year)
+        self.assertNotModified(url, etag, 4)
+
+        ClassTeacher.objects.create(teacher=teacher, standard=self.standard, academic_year=self.academic_year)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['class_teacher_name'], 'Sita Sharma')
+
+        etag = response.headers['ETag']
+        rank_exam(self.exam.pk)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_summaries_cover_their_nested_results(self):
+        url = reverse('resultsummary-readonly-list')
+        etag = self.client.get(url).headers['ETag']
+        # COUNT, the page and its subject results
+        self.assertNotModified(url, etag, 3)
+
+        # The exam subjects are only read through the nested results
+        exam_subject = self.exam_subjects[1]
+        exam_subject.exam_date = '2081-01-06'
+        exam_subject.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['results'][1]['exam_subject']['exam_date'], '2081-01-06')
+
+
+class CompiledSerializerTestCase(ExamResultTestBase):
+    """Test cases for the compiled list serializers of the busiest endpoints."""
+
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            for enrollment in self.enrollments:
+                self.enter_marks(enrollment, [('70', '20'), ('33.5', '12')])
+        teacher = Teacher.objects.create(
+            first_name='Sita', last_name='Sharma', designation='Secondary Level Teacher',
+            email='sita@example.com', phone='9800000000',
+        )
+        subject = self.exam_subjects[0].subject
+        for enrollment in self.enrollments:
+            # Daily attendance has no subject; the last row has no teacher either
+            for date, row_subject, recorded_by in (
+                ('2081-02-01', None, teacher),
+                ('2081-02-02', subject, teacher),
+                ('2081-02-03', None, None),
+            ):
+                Attendance.objects.create(
+                    date=date,
+                    student=enrollment.student,
+                    standard=self.standard,
+                    subject=row_subject,
+                    recorded_by=recorded_by,
+                    academic_year=self.academic_year,
+                )
+
+    def assertRendersLikeDrf(self, serializer_class, queryset):
+        render = JSONRenderer().render
+        expected = render(serializers.ListSerializer(list(queryset), child=serializer_class()).data)
+        self.assertEqual(render(serializer_class(list(queryset), many=True).data), expected)
+        self.assertEqual(render(serializer_class(queryset.all(), many=True).data), expected)
+
+    def test_output_is_byte_identical(self):
+        self.assertRendersLikeDrf(AttendanceSerializer, Attendance.objects.order_by('pk'))
+        self.assertRendersLikeDrf(SubjectResultSerializer, SubjectResult.objects.order_by('pk'))
+        self.assertRendersLikeDrf(StudentEnrollmentSerializer, StudentEnrollment.objects.order_by('pk'))
+
+        rows = AttendanceSerializer(Attendance.objects.order_by('pk'), many=True).data
+        self.assertIsNone(rows[0]['subject'])
+        self.assertEqual(rows[1]['subject']['standard']['name'], 'Class 10')
+        self.assertIsNone(rows[2]['recorded_by'])
+
+    def test_querysets_of_plain_columns_are_read_with_values(self):
+        serializer = StudentEnrollmentSerializer(StudentEnrollment.objects.order_by('pk'), many=True)
+        del serializer.child.fields['student']
+        # Standard and academic year are joined in, without instances or extra queries
+        with self.assertNumQueries(1):
+            rows = serializer.data
+        self.assertEqual(rows[0]['standard']['name'], 'Class 10')
+        self.assertEqual(rows[0]['roll_number'], '01')
+
+    def test_nepali_dates_are_formatted_from_the_stored_ad_date(self):
+        columns, _ = compile_values(ExamSubjectSerializer(), ExamSubject)
+        self.assertNotIn('exam_date', columns)
+        queryset = ExamSubject.objects.order_by('pk')
+        rows = list(iter_representations(ExamSubjectSerializer(), queryset))
+        self.assertEqual(rows, ExamSubjectSerializer(list(queryset), many=True).data)
+        self.assertEqual((rows[0]['exam_date'], rows[0]['exam']['end_date']), ('2081-01-05', '2081-01-15'))
+
+    def test_pruned_fields_are_left_out(self):
+        serializer = SubjectResultSerializer(list(SubjectResult.objects.all()), many=True)
+        del serializer.child.fields['exam_subject']
+        self.assertNotIn('exam_subject', serializer.data[0])
+
+
+class StreamingExportTestCase(ExamResultTestBase):
+    """Test cases for the streaming CSV and NDJSON exports."""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('teacher', password='secret'))
+        with self.captureOnCommitCallbacks(execute=True):
+            for enrollment in self.enrollments:
+                self.enter_marks(enrollment, [('70', '20'), ('60', '20')])
+        for day, enrollment in enumerate(self.enrollments, start=1):
+            Attendance.objects.create(
+                date=f'2081-02-0{day}',
+                student=enrollment.student,
+                standard=self.standard,
+                academic_year=self.academic_year,
+                status='absent' if day == 2 else 'present',
+            )
+
+    def export(self, basename, **params):
+        response = self.client.get(reverse(f'{basename}-export'), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_csv_has_every_row_with_nested_columns(self):
+        response, body = self.export('subjectresults-readonly')
+        self.assertEqual(response.headers['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('subjectresults-readonly.csv', response.headers['Content-Disposition'])
+
+        rows = list(csv.DictReader(body.splitlines()))
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[0]['student.student.first_name'], 'Student1')
+        self.assertEqual(rows[0]['exam_subject.exam.name'], 'First Terminal Exam 2081')
+        self.assertNotIn('student_id', rows[0])
+
+    def test_ndjson_matches_the_list_and_filters_apply(self):
+        _, body = self.export('subjectresults-readonly', format='ndjson', student_id=self.enrollments[0].pk)
+        lines = [json.loads(line) for line in body.splitlines()]
+        listed = self.client.get(
+            reverse('subjectresults-readonly-list'), {'student_id': self.enrollments[0].pk}
+        ).json()['results']
+        self.assertEqual(lines, listed)
+
+        _, body = self.export('attendance-readonly', format='ndjson', status='absent', fields='id,date,subject')
+        self.assertEqual([json.loads(line) for line in body.splitlines()], [
+            {'id': Attendance.objects.get(status='absent').pk, 'date': '2081-02-02', 'subject': None},
+        ])
+
+    def test_selected_fields_are_the_csv_columns(self):
+        _, body = self.export('attendance-readonly', fields='date,student.first_name,subject.name')
+        self.assertEqual(body.splitlines(), [
+            'date,student.first_name,subject.name',
+            '2081-02-01,Student1,',
+            '2081-02-02,Student2,',
+            '2081-02-03,Student3,',
+        ])
+
+    def test_errors_are_json(self):
+        response = self.client.get(reverse('subjectresults-readonly-export'), {'exam_id': 'x'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('exam_id', response.json())
+
+
+class RollCallTestCase(ExamResultTestBase):
+    """Test cases for the bulk roll-call endpoint."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('teacher', password='secret')
+        self.teacher = Teacher.objects.create(
+            user=self.user, first_name='Sita', last_name='Sharma', designation='Secondary Level Teacher',
+            email='sita@example.com', phone='9800000000',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('standard-roll-call', args=[self.standard.pk])
+
+    def roll_call(self, statuses, **payload):
+        payload.setdefault('date', '2081-02-01')
+        payload['entries'] = [
+            {'roll_number': enrollment.roll_number, 'status': status}
+            for enrollment, status in zip(self.enrollments, statuses)
+        ]
+        return self.client.post(self.url, payload, format='json')
+
+    def test_daily_roll_call_is_upserted_in_one_statement(self):
+        # Standard, user's teacher and enrollment; then, in a savepoint, the
+        # roll-call's lock, the rows being replaced, the upsert, and create,
+        # lock and update for each of the daily and monthly rollups
+        with self.assertNumQueries(14):
+            response = self.roll_call(['present', 'absent', 'late'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'standard_id': self.standard.pk, 'date': '2081-02-01', 'saved': 3})
+
+        entry = Attendance.objects.get(student=self.enrollments[1].student)
+        self.assertEqual((entry.status, entry.recorded_by, entry.academic_year), ('absent', self.teacher, self.academic_year))
+        self.assertIsNone(entry.subject)
+
+        # Sending the roll-call again corrects it instead of adding rows
+        response = self.roll_call(['present', 'present', 'present'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Attendance.objects.count(), 3)
+        self.assertEqual(set(Attendance.objects.values_list('status', flat=True)), {'present'})
+
+    def test_subject_roll_calls_are_kept_apart(self):
+        subject = self.exam_subjects[0].subject
+        self.roll_call(['present', 'present', 'present'])
+        response = self.roll_call(['absent', 'present', 'present'], subject_id=subject.pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Attendance.objects.count(), 6)
+        self.assertEqual(Attendance.objects.get(subject=subject, status='absent').student, self.enrollments[0].student)
+
+    def test_errors_are_reported_per_row(self):
+        other = Standard.objects.create(name='Class 9', section='A')
+        outsider = StudentEnrollment.objects.create(
+            student=Student.objects.create(first_name='Other', last_name='Test', admission_number='2081-0099'),
+            standard=other,
+            academic_year=self.academic_year,
+            roll_number='04',
+        )
+        payload = {
+            'date': '2081-02-01',
+            'subject_id': Subject.objects.create(name='Nepali', code='C9-1', standard=other, credit_hours=4).pk,
+            'entries': [
+                {'roll_number': '01', 'status': 'present'},
+                {'student_id': outsider.student_id, 'status': 'present'},
+                {'roll_number': '01', 'status': 'absent'},
+            ],
+        }
+        response = self.client.post(self.url, payload, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('subject_id', response.data)
+        errors = response.data['entries']
+        self.assertEqual(errors[0], {})
+        self.assertIn('student_id', errors[1])
+        self.assertIn('student_id', errors[2])
+        self.assertFalse(Attendance.objects.exists())
+
+        response = self.client.post(self.url, {
+            'date': '2081-13-40',
+            'entries': [{'roll_number': '01', 'status': 'sleeping'}],
+        }, format='json')
+        self.assertIn('date', response.data)
+        self.assertIn('status', response.data['entries'][0])
+
+    def test_unknown_roll_numbers_are_not_duplicates(self):
+        response = self.client.post(self.url, {
+            'date': '2081-02-01',
+            'entries': [{'roll_number': '98', 'status': 'present'}, {'roll_number': '99', 'status': 'absent'}],
+        }, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([set(row_errors) for row_errors in response.data['entries']], [{'roll_number'}] * 2)
+
+
+class PackedAttendanceTestCase(ExamResultTestBase):
+    """Test cases for packed per-month attendance storage."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('teacher', password='secret')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        statuses = ['present', 'absent', 'late', 'leave']
+        for enrollment_index, enrollment in enumerate(self.enrollments):
+            for day in range(1, 6):
+                Attendance.objects.create(
+                    date=f'2081-04-{day:02d}',
+                    student=enrollment.student,
+                    standard=self.standard,
+                    academic_year=self.academic_year,
+                    status=statuses[(day + enrollment_index) % 4],
+                )
+        # Another month, and another period of the same month
+        Attendance.objects.create(
+            date='2081-05-01', student=self.enrollments[0].student, standard=self.standard,
+            academic_year=self.academic_year, status='absent',
+        )
+        Attendance.objects.create(
+            date='2081-04-01', student=self.enrollments[0].student, standard=self.standard,
+            subject=self.exam_subjects[0].subject, academic_year=self.academic_year, status='late',
+        )
+
+    def test_codec_round_trip(self):
+        days = {1: 'present', 2: 'absent', 31: 'late', 32: 'leave'}
+        codes = {day: ['present', 'absent', 'late', 'leave'].index(status) for day, status in days.items()}
+        recorded, statuses = set_days(0, 0, codes)
+        # Day 32 uses the sign bit of the bigint
+        self.assertLess(statuses, 0)
+        self.assertEqual(decode(recorded, statuses), days)
+
+        recorded, statuses = set_days(recorded, statuses, {2: 0})
+        self.assertEqual(decode(recorded, statuses)[2], 'present')
+        self.assertEqual(decode(*clear_days(recorded, statuses, [2, 32])), {1: 'present', 31: 'late'})
+        rows = decode_months([recorded, 0], [statuses, 0])
+        self.assertEqual(rows.shape, (2, 32))
+        self.assertEqual(rows[0, :4].tolist(), [0, 0, -1, -1])
+        self.assertEqual(rows[0, 30:].tolist(), [2, 3])
+        self.assertTrue((rows[1] == -1).all())
+
+    def test_packed_rows_report_like_the_row_table(self):
+        expected = month_report(self.standard, 2081, 4)
+        self.assertEqual(len(expected), 3)
+        self.assertEqual(expected[0]['days'][:6], ['absent', 'late', 'leave', 'present', 'absent', None])
+        self.assertEqual((expected[0]['absent'], expected[0]['present']), (2, 1))
+        self.assertEqual(len(expected[0]['days']), 32)
+
+        self.assertEqual(pack_rows(Attendance.objects.all(), chunk_size=4), 17)
+        # Three students in Shrawan, one of them also in Bhadra and in a subject's periods
+        self.assertEqual(AttendanceMonth.objects.count(), 5)
+
+        with override_settings(ATTENDANCE_STORAGE='packed'):
+            # One query for the whole section
+            with self.assertNumQueries(1):
+                self.assertEqual(month_report(self.standard, 2081, 4), expected)
+            subject_report = month_report(self.standard, 2081, 4, self.exam_subjects[0].subject)
+            self.assertEqual(subject_report[0]['days'][0], 'late')
+
+    @override_settings(ATTENDANCE_STORAGE='packed')
+    def test_roll_call_writes_rows_and_packed_months(self):
+        Attendance.objects.all().delete()
+        payload = {'date': '2081-04-07', 'entries': [
+            {'roll_number': enrollment.roll_number, 'status': 'present'} for enrollment in self.enrollments
+        ]}
+        payload['entries'][2]['status'] = 'absent'
+        url = reverse('standard-roll-call', args=[self.standard.pk])
+        self.assertEqual(self.client.post(url, payload, format='json').data['saved'], 3)
+        payload['date'] = '2081-04-08'
+        self.client.post(url, payload, format='json')
+
+        # The rows are still the record every other reader uses
+        response = self.client.get(reverse('attendance-readonly-list'), {'date_from': '2081-04-08'})
+        self.assertEqual(len(response.data['results']), 3)
+        day = AttendanceDailyRollup.objects.get(student=self.enrollments[2].student, date=datetime.date(2024, 7, 23))
+        self.assertEqual(day.absent_count, 1)
+        self.assertEqual(AttendanceMonth.objects.count(), 3)
+        response = self.client.get(reverse('standard-attendance-month', args=[self.standard.pk, 2081, 4]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['days'], 32)
+        third = response.data['students'][2]
+        self.assertEqual(third['days'][6:8], ['absent', 'absent'])
+        self.assertEqual(third['absent'], 2)
+
+        response = self.client.get(reverse('standard-attendance-month', args=[self.standard.pk, 2081, 13]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_saved_rows_keep_the_packed_months_in_sync(self):
+        subject = self.exam_subjects[0].subject
+
+        def assert_months_match_rows():
+            for month, period in [(4, None), (5, None), (4, subject)]:
+                expected = month_report(self.standard, 2081, month, period)
+                with override_settings(ATTENDANCE_STORAGE='packed'):
+                    self.assertEqual(month_report(self.standard, 2081, month, period), expected)
+
+        with override_settings(ATTENDANCE_STORAGE='packed'):
+            call_command('pack_attendance', stdout=StringIO())
+            student = self.enrollments[0].student
+            entry = Attendance.objects.get(student=student, date='2081-04-02', subject=None)
+            entry.status = 'leave'
+            entry.save()
+            # Moved to another month
+            entry.date = '2081-05-03'
+            entry.save()
+            Attendance.objects.create(
+                date='2081-04-06', student=student, standard=self.standard,
+                academic_year=self.academic_year, status='late',
+            )
+            # Without the fields the months were written from
+            entry = Attendance.objects.only('status').get(student=student, date='2081-04-03', subject=None)
+            entry.status = 'present'
+            entry.save()
+            Attendance.objects.get(subject=subject).delete()
+        assert_months_match_rows()
+        self.assertFalse(AttendanceMonth.objects.filter(subject=subject).exists())
+
+
+class AttendanceRollupTestCase(ExamResultTestBase):
+    """Test cases for the daily and monthly attendance rollups and the range summary."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('teacher', password='secret')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('standard-attendance-summary', args=[self.standard.pk])
+        statuses = ['present', 'absent', 'late', 'leave']
+        # The end of Asar, all of Shrawan (32 days) and the start of Bhadra
+        dates = ['2081-03-30', '2081-03-31'] + [f'2081-04-{day:02d}' for day in range(1, 33)] + ['2081-05-01', '2081-05-02']
+        for enrollment_index, enrollment in enumerate(self.enrollments):
+            for date_index, date in enumerate(dates):
+                Attendance.objects.create(
+                    date=date,
+                    student=enrollment.student,
+                    standard=self.standard,
+                    academic_year=self.academic_year,
+                    status=statuses[(date_index * (enrollment_index + 1)) % 4],
+                )
+        # A subject's period is an entry of its own
+        Attendance.objects.create(
+            date='2081-04-10', student=self.enrollments[0].student, standard=self.standard,
+            subject=self.exam_subjects[0].subject, academic_year=self.academic_year, status='late',
+        )
+
+    def counted(self, date_from, date_to):
+        """The summary's counts, recounted from the Attendance rows."""
+        counts = {}
+        for student_id, status in (
+            Attendance.objects.filter(date__range=(date_from, date_to)).values_list('student_id', 'status')
+        ):
+            student_counts = counts.setdefault(student_id, {'present': 0, 'absent': 0, 'late': 0, 'leave': 0})
+            student_counts[status] += 1
+        return counts
+
+    def summary(self, date_from, date_to):
+        response = self.client.get(self.url, {'date_from': date_from, 'date_to': date_to})
+        self.assertEqual(response.status_code, 200)
+        return {
+            row['student_id']: {status: row[status] for status in ('present', 'absent', 'late', 'leave')}
+            for row in response.data['students']
+        }
+
+    def test_writes_keep_the_rollups_up_to_date(self):
+        student = self.enrollments[0].student
+        month = AttendanceMonthlyRollup.objects.get(student=student, year=2081, month=4)
+        self.assertEqual(
+            (month.present_count, month.absent_count, month.late_count, month.leave_count), (8, 8, 9, 8),
+        )
+
+        entry = Attendance.objects.get(student=student, date='2081-04-03', subject=None)
+        self.assertEqual(entry.status, 'present')
+        entry.status = 'absent'
+        entry.save()
+        month.refresh_from_db()
+        self.assertEqual((month.present_count, month.absent_count), (7, 9))
+        day = AttendanceDailyRollup.objects.get(student=student, date=entry.date.to_datetime_date())
+        self.assertEqual((day.present_count, day.absent_count), (0, 1))
+
+        entry.delete()
+        month.refresh_from_db()
+        self.assertEqual(month.absent_count, 8)
+
+    def test_roll_call_updates_the_rollups(self):
+        url = reverse('standard-roll-call', args=[self.standard.pk])
+        payload = {'date': '2081-05-03', 'entries': [
+            {'roll_number': enrollment.roll_number, 'status': 'absent'} for enrollment in self.enrollments
+        ]}
+        self.client.post(url, payload, format='json')
+        payload['entries'][0]['status'] = 'present'
+        self.client.post(url, payload, format='json')
+
+        # The first two days of Bhadra were late and on leave
+        month = AttendanceMonthlyRollup.objects.get(student=self.enrollments[0].student, year=2081, month=5)
+        self.assertEqual((month.present_count, month.absent_count), (1, 0))
+        self.assertEqual(self.summary('2081-05-01', '2081-05-03'), self.counted('2081-05-01', '2081-05-03'))
+
+    def test_summary_combines_months_and_days(self):
+        for date_from, date_to in [
+            ('2081-03-30', '2081-05-01'),  # part of Asar, all of Shrawan, part of Bhadra
+            ('2081-04-01', '2081-04-32'),  # exactly Shrawan
+            ('2081-04-05', '2081-04-09'),  # within Shrawan
+            ('2081-03-31', '2081-04-01'),  # across a month end
+        ]:
+            with self.subTest(date_from=date_from, date_to=date_to):
+                self.assertEqual(self.summary(date_from, date_to), self.counted(date_from, date_to))
+
+        # The standard, the whole months and the days around them
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url, {'date_from': '2081-03-30', 'date_to': '2081-05-01'})
+        first = response.data['students'][0]
+        self.assertEqual(first['total'], 36)
+        self.assertEqual(first['percentage'], Decimal('52.78'))
+
+    def test_invalid_ranges_are_rejected(self):
+        response = self.client.get(self.url, {'date_from': '2081-04-01'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('date_to', response.data)
+        response = self.client.get(self.url, {'date_from': '2081-04-10', 'date_to': '2081-04-01'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(self.url, {'date_from': '2081-13-01', 'date_to': '2081-04-01'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_rebuild_recounts_the_rows(self):
+        def rollups():
+            return (
+                list(AttendanceDailyRollup.objects.order_by('student', 'date').values_list(
+                    'student', 'date', *AttendanceDailyRollup.STATISTICS_FIELDS[:-1],
+                )),
+                list(AttendanceMonthlyRollup.objects.order_by('student', 'year', 'month').values_list(
+                    'student', 'year', 'month', *AttendanceMonthlyRollup.STATISTICS_FIELDS[:-1],
+                )),
+            )
+
+        expected = rollups()
+        AttendanceDailyRollup.objects.update(present_count=0)
+        AttendanceMonthlyRollup.objects.all().delete()
+        call_command('rebuild_attendance_rollups', stdout=StringIO())
+        self.assertEqual(rollups(), expected)
+
+        # The packed months are a copy of the rows and are not counted again
+        with override_settings(ATTENDANCE_STORAGE='packed'):
+            call_command('pack_attendance', stdout=StringIO())
+            self.assertEqual(rollups(), expected)
+            call_command('rebuild_attendance_rollups', '--standard', str(self.standard.pk), stdout=StringIO())
+            self.assertEqual(rollups(), expected)
+
+
+class DateRangeFilterTestCase(ExamResultTestBase):
+    """Test cases for the BS date range filters of attendance and exams."""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('teacher', password='secret'))
+        for date in ['2081-03-31', '2081-04-01', '2081-04-32', '2081-05-01']:
+            for enrollment in self.enrollments[:2]:
+                Attendance.objects.create(
+                    date=date, student=enrollment.student, standard=self.standard, academic_year=self.academic_year,
+                )
+        self.second_exam = Exam.objects.create(
+            name='Second Terminal Exam 2081', term='second_term', academic_year=self.academic_year,
+            start_date='2081-04-10', end_date='2081-04-20',
+        )
+
+    def ids(self, url_name, **params):
+        response = self.client.get(reverse(url_name), params)
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.data['results']]
+
+    def test_attendance_date_range(self):
+        student = self.enrollments[0].student
+        ids = self.ids('attendance-readonly-list', student_id=student.pk, date_from='2081-04-01', date_to='2081-04-32')
+        expected = Attendance.objects.filter(student=student, date__in=['2081-04-01', '2081-04-32'])
+        self.assertEqual(ids, list(expected.order_by('date', 'id').values_list('id', flat=True)))
+
+        self.assertEqual(len(self.ids('attendance-readonly-list', date_from='2081-05-01')), 2)
+        self.assertEqual(len(self.ids('attendance-readonly-list', date_to='2081-03-31')), 2)
+
+    def test_exam_date_ranges(self):
+        # Exams held at least partly within the range
+        self.assertEqual(self.ids('exam-readonly-list', date_from='2081-04-15'), [self.second_exam.pk])
+        self.assertEqual(self.ids('exam-readonly-list', date_from='2081-01-10', date_to='2081-04-10'),
+                         [self.exam.pk, self.second_exam.pk])
+        self.assertEqual(self.ids('exam-readonly-list', date_to='2080-12-30'), [])
+
+        ids = self.ids('examsubject-readonly-list', standard_id=self.standard.pk, date_from='2081-01-05', date_to='2081-01-05')
+        self.assertEqual(sorted(ids), sorted(exam_subject.pk for exam_subject in self.exam_subjects))
+
+    def test_invalid_dates_are_rejected(self):
+        response = self.client.get(reverse('attendance-readonly-list'), {'date_from': '2081-13-01'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('date_from', response.data)
+
+
+class NepaliDatesTestCase(TestCase):
+    """Test cases for the BS <-> AD conversion table."""
+
+    def test_table_matches_nepali_datetime(self):
+        first = nepali_datetime.date(nepali_dates.MIN_YEAR, 1, 1).to_datetime_date()
+        last = nepali_datetime.date(nepali_dates.MAX_YEAR, 12, 1).to_datetime_date()
+        ad_dates = [first + datetime.timedelta(days=offset) for offset in range(0, (last - first).days, 13)]
+        bs_dates = [nepali_datetime.date.from_datetime_date(date) for date in ad_dates]
+
+        self.assertEqual(nepali_dates.to_bs_many(ad_dates), bs_dates)
+        self.assertEqual(nepali_dates.to_ad_many(bs_dates), ad_dates)
+        self.assertEqual(nepali_dates.bs_isoformat_many(ad_dates), [date.isoformat() for date in bs_dates])
+        for ad_date, bs_date in zip(ad_dates[::101], bs_dates[::101]):
+            self.assertEqual(nepali_dates.to_bs(ad_date), bs_date)
+            self.assertEqual(nepali_dates.to_ad(bs_date), ad_date)
+            self.assertEqual(nepali_dates.bs_isoformat(ad_date), bs_date.isoformat())
+
+    def test_months_and_limits(self):
+        self.assertEqual([nepali_dates.days_in_month(2081, month) for month in (2, 4, 9)], [32, 32, 29])
+        self.assertEqual(nepali_dates.to_ad(nepali_datetime.date(2081, 4, 32)), datetime.date(2024, 8, 16))
+        self.assertEqual(
+            nepali_dates.to_bs_many([datetime.date(2024, 8, 16), None]), [nepali_datetime.date(2081, 4, 32), None],
+        )
+        with self.assertRaises(ValueError):
+            nepali_dates.days_in_month(2081, 13)
+        with self.assertRaises(ValueError):
+            nepali_dates.to_bs(datetime.date(1900, 1, 1))
+        with self.assertRaises(ValueError):
+            nepali_dates.bs_isoformat_many([datetime.date(2024, 8, 16), datetime.date(2100, 1, 1)])
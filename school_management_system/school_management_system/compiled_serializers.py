@@ -0,0 +1,321 @@
+"""
+Compiled read-only serializers.
+
+DRF renders a row by walking the serializer's fields and, for every one
+of them, resolving its source, checking for None and calling
+to_representation(). CompiledListSerializer does that walk once per
+response instead of once per row: each readable field becomes a small
+function of the row, picked for its field class, and a row is rendered
+by calling them in turn. The output is the same as the serializer's own.
+Fields the compiler does not know (a custom get_attribute() or
+to_representation(), list serializers, sources it cannot resolve
+statically) are rendered by DRF itself, and any error on the fast path
+is retried through DRF so it surfaces exactly as before.
+
+Handed a queryset rather than a page of instances, with a serializer
+whose fields are all plain columns, the rows are read with
+values_list() and no model instances are built. Nepali dates are then
+read as the AD dates they are stored as and formatted from the
+conversion table in nepali_dates.py.
+
+Use it with ``list_serializer_class = CompiledListSerializer`` in a
+serializer's Meta, or render a queryset of any size row by row with
+iter_representations().
+"""
+import datetime
+import inspect
+from operator import attrgetter, itemgetter
+
+from django.core.exceptions import FieldDoesNotExist, ObjectDoesNotExist
+from django.db import models
+from nepali_datetime_field.models import NepaliDateField
+from rest_framework import ISO_8601, serializers
+from rest_framework.fields import Field, SkipField, get_attribute
+from rest_framework.relations import PKOnlyObject
+from rest_framework.settings import api_settings
+
+from .nepali_dates import ad_column, bs_isoformat
+
+
+_SKIP = object()
+
+
+def _model_field(model, name):
+    if model is None:
+        return None
+    if name == 'pk':
+        return model._meta.pk
+    try:
+        return model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+
+
+def _is_simple_method(model, name):
+    """Whether ``name`` is a model method DRF would call: one needing no arguments."""
+    function = inspect.getattr_static(model, name, None)
+    if not inspect.isfunction(function):
+        return False
+    parameters = list(inspect.signature(function).parameters.values())[1:]
+    return all(
+        parameter.default is not parameter.empty
+        or parameter.kind in (parameter.VAR_POSITIONAL, parameter.VAR_KEYWORD)
+        for parameter in parameters
+    )
+
+
+def _iso_datetime(field, field_timezone):
+    """DateTimeField.to_representation() in ISO 8601, with the timezone looked up once."""
+    def convert(value):
+        if not isinstance(value, datetime.datetime) or value.utcoffset() is None:
+            # Naive datetimes and strings keep DRF's handling
+            return field.to_representation(value)
+        try:
+            text = value.astimezone(field_timezone).isoformat()
+        except OverflowError:
+            return field.to_representation(value)
+        return text[:-6] + 'Z' if text.endswith('+00:00') else text
+    return convert
+
+
+def _converter(field):
+    """The field's to_representation() for a non-None value, shortened where it is trivial."""
+    if type(field) is serializers.DateTimeField:
+        output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+        # The current timezone does not change while a response is rendered
+        field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+        if isinstance(output_format, str) and output_format.lower() == ISO_8601 and field_timezone is not None:
+            return _iso_datetime(field, field_timezone)
+    if type(field) is serializers.IntegerField:
+        return int
+    if type(field) is serializers.CharField:
+        return str
+    if type(field) is serializers.BigIntegerField:
+        return str if getattr(field, 'coerce_to_string', api_settings.COERCE_BIGINT_TO_STRING) else int
+    return field.to_representation
+
+
+def _is_iso_nepali_date(field, model_field):
+    """Whether ``field`` renders the NepaliDateField ``model_field`` as an ISO 8601 date."""
+    output_format = getattr(field, 'format', api_settings.DATE_FORMAT)
+    return (
+        isinstance(model_field, NepaliDateField)
+        and type(field) is serializers.DateField
+        and isinstance(output_format, str)
+        and output_format.lower() == ISO_8601
+    )
+
+
+def _with_drf(field):
+    """The field's value exactly as Serializer.to_representation() computes it, or _SKIP."""
+    def render(instance):
+        try:
+            attribute = field.get_attribute(instance)
+        except SkipField:
+            return _SKIP
+        check_for_none = attribute.pk if isinstance(attribute, PKOnlyObject) else attribute
+        return None if check_for_none is None else field.to_representation(attribute)
+    return render
+
+
+def _resolve(model, source_attrs):
+    """
+    Follow ``source_attrs`` through concrete model fields. Returns
+    ``(path, final model field, method name)`` where the optional method
+    name is a model method called at the end of the path, or None when
+    the source is not statically known.
+    """
+    path = []
+    model_field = None
+    for position, attr in enumerate(source_attrs):
+        model_field = _model_field(model, attr)
+        if model_field is None or not model_field.concrete:
+            # Only a plain method of the model is allowed, and only last
+            last = position == len(source_attrs) - 1
+            if last and model is not None and _is_simple_method(model, attr):
+                return path, None, attr
+            return None
+        if attr == model_field.attname and attr != model_field.name:
+            # The raw foreign key column, e.g. 'exam_subject_id'
+            path.append(attr)
+            model_field, model = model_field.target_field, None
+            continue
+        path.append(model_field.name)
+        model = model_field.related_model
+    return path, model_field, None
+
+
+def _attribute_getter(model, source_attrs):
+    resolved = _resolve(model, source_attrs)
+    if resolved is None:
+        return lambda instance: get_attribute(instance, source_attrs)
+    path, _, method = resolved
+    getter = attrgetter('.'.join(path)) if path else (lambda instance: instance)
+    if method is None:
+        return getter
+    return lambda instance: getattr(getter(instance), method)()
+
+
+def _compile_field(field, model):
+    if isinstance(field, serializers.SerializerMethodField):
+        return getattr(field.parent, field.method_name)
+
+    slow = _with_drf(field)
+    if isinstance(field, serializers.PrimaryKeyRelatedField):
+        model_field = _model_field(model, field.source) if len(field.source_attrs) == 1 else None
+        if field.pk_field is not None or model_field is None or not model_field.concrete or not model_field.is_relation:
+            return slow
+        # The foreign key column, as use_pk_only_optimization() reads it
+        return attrgetter(model_field.attname)
+
+    if (
+        isinstance(field, serializers.ListSerializer)
+        or type(field).get_attribute is not Field.get_attribute
+        or field.source == '*'
+    ):
+        return slow
+
+    getter = _attribute_getter(model, field.source_attrs)
+    if isinstance(field, serializers.BaseSerializer):
+        resolved = _resolve(model, field.source_attrs)
+        related_model = resolved[1].related_model if resolved and resolved[1] is not None else None
+        convert = compile_serializer(field, related_model) or field.to_representation
+    else:
+        convert = _converter(field)
+
+    def render(instance):
+        try:
+            attribute = getter(instance)
+        except (AttributeError, KeyError, ObjectDoesNotExist, ValueError):
+            # Let DRF decide: a default, None, a skipped field or the error
+            return slow(instance)
+        return None if attribute is None else convert(attribute)
+    return render
+
+
+def compile_serializer(serializer, model=None):
+    """
+    A function rendering an instance like ``serializer.to_representation()``,
+    or None if the serializer renders instances its own way.
+    """
+    if type(serializer).to_representation is not serializers.Serializer.to_representation:
+        return None
+    model = model or getattr(getattr(serializer, 'Meta', None), 'model', None)
+    fields = [(field.field_name, _compile_field(field, model)) for field in serializer._readable_fields]
+
+    def render(instance):
+        ret = {}
+        for name, value_of in fields:
+            value = value_of(instance)
+            if value is not _SKIP:
+                ret[name] = value
+        return ret
+    return render
+
+
+def _compile_columns(serializer, model, prefix, columns):
+    """
+    A function rendering a values_list() row like ``serializer``, adding
+    the columns it reads to ``columns``; None unless every field is a
+    plain column. A column is a lookup path, or ``(path, 'ad')`` for a
+    Nepali date read as its stored AD date.
+    """
+    if model is None or type(serializer).to_representation is not serializers.Serializer.to_representation:
+        return None
+
+    def column(key):
+        return columns.setdefault(key, len(columns))
+
+    fields = []
+    for field in serializer._readable_fields:
+        if isinstance(field, (serializers.SerializerMethodField, serializers.ListSerializer)):
+            return None
+        if isinstance(field, serializers.PrimaryKeyRelatedField):
+            model_field = _model_field(model, field.source) if len(field.source_attrs) == 1 else None
+            if field.pk_field is not None or model_field is None or not model_field.concrete or not model_field.is_relation:
+                return None
+            fields.append((field.field_name, itemgetter(column(prefix + model_field.attname)), None, None))
+            continue
+        if type(field).get_attribute is not Field.get_attribute or field.source == '*':
+            return None
+        resolved = _resolve(model, field.source_attrs)
+        if resolved is None or resolved[2] is not None:
+            return None
+        path, model_field, _ = resolved
+        # A null relation half-way makes DRF skip the field; leave that to it
+        for step in range(len(path) - 1):
+            if _resolve(model, path[:step + 1])[1].null:
+                return None
+
+        if isinstance(field, serializers.BaseSerializer):
+            if len(path) != 1 or not model_field.is_relation:
+                return None
+            nested = _compile_columns(field, model_field.related_model, f'{prefix}{path[0]}__', columns)
+            if nested is None:
+                return None
+            # The foreign key only tells whether the relation is set
+            key = itemgetter(column(prefix + model_field.attname))
+            fields.append((field.field_name, key, nested, None))
+        else:
+            if model_field.is_relation:
+                return None
+            if _is_iso_nepali_date(field, model_field):
+                fields.append((field.field_name, itemgetter(column((prefix + '__'.join(path), 'ad'))), None, bs_isoformat))
+                continue
+            fields.append((field.field_name, itemgetter(column(prefix + '__'.join(path))), None, _converter(field)))
+
+    def render(row):
+        ret = {}
+        for name, value_of, nested, convert in fields:
+            value = value_of(row)
+            if value is None:
+                ret[name] = None
+            elif nested is not None:
+                ret[name] = nested(row)
+            else:
+                ret[name] = value if convert is None else convert(value)
+        return ret
+    return render
+
+
+def compile_values(serializer, model):
+    """``(columns, row function)`` for rendering values_list() rows of ``model``, or None."""
+    columns = {}
+    render = _compile_columns(serializer, model, '', columns)
+    if render is None:
+        return None
+    return [ad_column(key[0]) if isinstance(key, tuple) else key for key in columns], render
+
+
+def iter_representations(serializer, queryset, chunk_size=2000):
+    """
+    Yield every row of ``queryset`` rendered like ``serializer``, reading
+    ``chunk_size`` rows at a time from a server-side cursor.
+    """
+    compiled = compile_values(serializer, queryset.model)
+    if compiled is not None:
+        columns, render = compiled
+        rows = queryset.values_list(*columns)
+    else:
+        render = compile_serializer(serializer) or serializer.to_representation
+        rows = queryset
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield render(row)
+
+
+class CompiledListSerializer(serializers.ListSerializer):
+    """A ListSerializer that compiles its child once per response; see the module docstring."""
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+
+        if isinstance(iterable, models.QuerySet):
+            compiled = compile_values(self.child, iterable.model)
+            if compiled is not None:
+                columns, render = compiled
+                return [render(row) for row in iterable.values_list(*columns)]
+
+        render = compile_serializer(self.child)
+        if render is None:
+            return super().to_representation(data)
+        return [render(item) for item in iterable]
@@ -0,0 +1,151 @@
+"""
+Conditional GET for read-only API endpoints.
+
+List and detail responses carry an ETag computed from the rows they
+serve: their ids and the latest ``updated_at`` among them and among the
+related rows they join in with select_related(). The latest timestamp is
+selected with the rows themselves, as an annotation, so the ETag costs no
+query of its own. Once a page (or the detail object) is loaded, and
+before it is serialized, it is checked against the client's
+If-None-Match; a match answers 304 Not Modified. A list's ETag also
+covers the count and the next link the page would show.
+
+Detail responses also carry Last-Modified. List responses do not: a
+deleted row changes the ids, which the ETag includes, but not the latest
+``updated_at``.
+
+Data a response reads outside its queryset, like the summaries shown on
+a marksheet, is folded in by get_dependency_marker(). Views override it
+to load that data for the served rows only, keep it for the serializer,
+and return what the ETag should cover.
+
+Writes that bypass Model.save() (bulk_update(), bulk_create() with
+update_conflicts, raw UPDATEs) must set ``updated_at`` themselves.
+"""
+import hashlib
+
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .sparse_fields import select_related_paths
+
+
+LATEST_UPDATE = 'conditional_updated_at'
+
+
+def _has_updated_at(model):
+    return any(field.name == 'updated_at' for field in model._meta.concrete_fields)
+
+
+def latest_update_column(queryset):
+    """
+    Expression for the latest ``updated_at`` of a row of ``queryset`` and
+    of the related rows it selects, or None if none of them has one.
+    """
+    columns = []
+    for path in [''] + select_related_paths(queryset):
+        model = queryset.model
+        for name in filter(None, path.split('__')):
+            model = model._meta.get_field(name).related_model
+        if _has_updated_at(model):
+            columns.append(F(f'{path}__updated_at' if path else 'updated_at'))
+    if len(columns) > 1:
+        # PostgreSQL's GREATEST skips the NULLs of unmatched outer joins
+        return Greatest(*columns)
+    return columns[0] if columns else None
+
+
+def latest_update(instance, _seen=None):
+    """Latest ``updated_at`` of ``instance`` and of the related objects loaded with it."""
+    if instance is None:
+        return None
+    seen = set() if _seen is None else _seen
+    if id(instance) in seen:
+        return None
+    seen.add(id(instance))
+    # Deferred fields are missing from __dict__; reading them would query
+    stamps = [instance.__dict__.get('updated_at')]
+    stamps += [latest_update(related, seen) for related in instance._state.fields_cache.values()]
+    return max(filter(None, stamps), default=None)
+
+
+class _NotModified(Exception):
+    """Stops a view once it knows the client's copy is current."""
+
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+
+class ConditionalGetMixin:
+    """Adds ETag validation to a read-only viewset's list and retrieve actions."""
+
+    def get_dependency_marker(self, rows):
+        """What the response reads about ``rows`` outside its queryset; None if nothing."""
+        return None
+
+    def get_etag(self, marker):
+        request = self.request
+        parts = [request.get_full_path(), getattr(request, 'accepted_media_type', None), marker]
+        return quote_etag(hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest())
+
+    def pagination_marker(self):
+        """The count and next link of the page being served."""
+        paginator = self.paginator
+        page = getattr(paginator, 'page', None)
+        count = page.paginator.count if page is not None else getattr(paginator, 'count', None)
+        return count, paginator.get_next_link()
+
+    def check_not_modified(self, rows, *extra):
+        """Answer 304 if the client's copy of ``rows`` is current, else note the validators."""
+        latest = max(filter(None, (getattr(row, LATEST_UPDATE, None) for row in rows)), default=None)
+        marker = [[row.pk for row in rows], latest, *extra, self.get_dependency_marker(rows)]
+        etag = self.get_etag(marker)
+        last_modified = int(latest.timestamp()) if self.detail and latest else None
+
+        not_modified = get_conditional_response(self.request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            raise _NotModified(not_modified)
+
+        self.validators = {'ETag': etag}
+        if last_modified:
+            self.validators['Last-Modified'] = http_date(last_modified)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if getattr(self, 'action', None) not in ('list', 'retrieve'):
+            return queryset
+        # Added last, so it only joins what the other mixins kept
+        column = latest_update_column(queryset)
+        return queryset if column is None else queryset.annotate(**{LATEST_UPDATE: column})
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if page is not None and getattr(self, 'action', None) == 'list':
+            self.check_not_modified(page, self.pagination_marker())
+        return page
+
+    def get_object(self):
+        obj = super().get_object()
+        if getattr(self, 'action', None) == 'retrieve':
+            self.check_not_modified([obj])
+        return obj
+
+    def conditional(self, action, request, *args, **kwargs):
+        self.validators = {}
+        try:
+            response = action(request, *args, **kwargs)
+        except _NotModified as exc:
+            return exc.response
+        if response.status_code == 200:
+            for header, value in self.validators.items():
+                response.headers[header] = value
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
@@ -0,0 +1,132 @@
+"""
+Streaming CSV and NDJSON exports for read-only API endpoints.
+
+StreamingExportMixin adds an ``export`` action next to ``list``:
+
+    GET /api/attendance-readonly/export/?format=csv&student_id=12
+    GET /api/subjectresults-readonly/export/?format=ndjson&exam_id=3
+
+It answers with every row the list would show across all of its pages:
+the view's filters and ``?fields=`` apply, pagination does not. Rows are
+read from a server-side cursor with QuerySet.iterator(), rendered one at
+a time by the compiled serializer and written out in batches, so memory
+stays flat however many rows there are, and the CSV header is sent
+before the query has run.
+
+NDJSON has one JSON object per line, exactly as the list renders it.
+CSV has one column per field; fields of nested objects are named with
+dots (``student.first_name``), and a missing nested object leaves its
+cells empty.
+
+The format is chosen like any DRF response format, with ``?format=`` or
+the Accept header, and defaults to CSV. Errors, such as invalid filter
+values, are answered in JSON.
+"""
+import csv
+import io
+import json
+from itertools import islice
+
+from django.http import StreamingHttpResponse
+from rest_framework import serializers
+from rest_framework.decorators import action
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from .compiled_serializers import iter_representations
+
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+def _batches(rows, size):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def csv_columns(serializer, prefix=()):
+    """Paths of the CSV columns of ``serializer``: one per field, nested objects flattened."""
+    columns = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if isinstance(field, serializers.Serializer):
+            columns += csv_columns(field, prefix + (name,))
+        else:
+            columns.append(prefix + (name,))
+    return columns
+
+
+def _cell(row, path):
+    value = row
+    for name in path:
+        if value is None:
+            return ''
+        value = value.get(name)
+    if value is None:
+        return ''
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, cls=JSONEncoder, ensure_ascii=False)
+    return value
+
+
+class CSVRenderer(BaseRenderer):
+    """Writes rendered rows as CSV; used by StreamingExportMixin."""
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def stream(self, serializer, rows, batch_size=EXPORT_CHUNK_SIZE):
+        columns = csv_columns(serializer)
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        def drain():
+            data = buffer.getvalue().encode(self.charset)
+            buffer.seek(0)
+            buffer.truncate()
+            return data
+
+        writer.writerow(['.'.join(path) for path in columns])
+        yield drain()
+        for batch in _batches(rows, batch_size):
+            writer.writerows([_cell(row, path) for path in columns] for row in batch)
+            yield drain()
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Writes rendered rows as newline-delimited JSON; used by StreamingExportMixin."""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def stream(self, serializer, rows, batch_size=EXPORT_CHUNK_SIZE):
+        encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+        for batch in _batches(rows, batch_size):
+            yield ''.join(encoder.encode(row) + '\n' for row in batch).encode(self.charset)
+
+
+class StreamingExportMixin:
+    """Adds the streaming ``export`` action to a read-only viewset."""
+    export_ordering = ('pk',)
+    export_chunk_size = EXPORT_CHUNK_SIZE
+
+    @action(detail=False, renderer_classes=[CSVRenderer, NDJSONRenderer])
+    def export(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset()).order_by(*self.export_ordering)
+        serializer = self.get_serializer()
+        renderer = request.accepted_renderer
+        rows = iter_representations(serializer, queryset, self.export_chunk_size)
+
+        response = StreamingHttpResponse(
+            renderer.stream(serializer, rows, self.export_chunk_size),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}',
+        )
+        response['Content-Disposition'] = f'attachment; filename="{self.basename}.{renderer.format}"'
+        return response
+
+    def handle_exception(self, exc):
+        if getattr(self, 'action', None) == 'export':
+            # An error is not a row; answer it in JSON
+            self.request.accepted_renderer = JSONRenderer()
+            self.request.accepted_media_type = JSONRenderer.media_type
+        return super().handle_exception(exc)
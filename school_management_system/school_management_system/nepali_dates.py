@@ -0,0 +1,155 @@
+"""
+BS <-> AD date conversion from a precomputed table.
+
+nepali_datetime converts a date by calendar arithmetic on every call.
+Here the whole supported range (BS 1975 to 2100, some 46,000 days) is
+laid out once per process in a few numpy arrays:
+
+- the AD ordinal of the first day of every BS month, indexed by
+  ``(year - MIN_YEAR) * 12 + month - 1``;
+- the BS year, month and day of every AD day, indexed by the day's AD
+  ordinal minus that of BS 1975-01-01.
+
+Converting a date is then one array lookup either way. The ``*_many``
+functions convert whole columns at once and pass None through, for
+nullable columns.
+
+Dates outside the supported range raise ValueError.
+
+NepaliDateField stores AD dates and converts every value it reads to BS.
+Bulk reads can select ad_column() instead and convert the column here.
+"""
+import datetime
+from functools import cache
+
+import nepali_datetime
+import numpy as np
+from django.db import models
+from django.db.models import ExpressionWrapper, F
+
+
+MIN_YEAR = nepali_datetime.MINYEAR
+MAX_YEAR = nepali_datetime.MAXYEAR
+
+
+@cache
+def _table():
+    lengths = np.array(
+        [
+            # The one place the calendar is asked for; nepali_datetime has
+            # the month lengths, but only as a private helper
+            nepali_datetime._days_in_month(year, month)
+            for year in range(MIN_YEAR, MAX_YEAR + 1)
+            for month in range(1, 13)
+        ],
+        dtype=np.int64,
+    )
+    first = nepali_datetime.date(MIN_YEAR, 1, 1).to_datetime_date().toordinal()
+    month_starts = first + np.concatenate(([0], np.cumsum(lengths)[:-1]))
+
+    months = np.repeat(np.arange(len(lengths)), lengths)
+    days = np.arange(len(months)) - np.repeat(month_starts - first, lengths) + 1
+    years = (MIN_YEAR + months // 12).astype(np.int16)
+    months = (months % 12 + 1).astype(np.int8)
+    days = days.astype(np.int8)
+    return {
+        'first': first,
+        'lengths': lengths,
+        'month_starts': month_starts,
+        'years': years,
+        'months': months,
+        'days': days,
+        # Indexing numpy arrays one item at a time is slow; single dates
+        # are looked up in plain lists
+        'month_start_list': month_starts.tolist(),
+        'bs_list': list(zip(years.tolist(), months.tolist(), days.tolist())),
+    }
+
+
+def ad_column(name):
+    """The AD date stored in the NepaliDateField ``name``, read as a datetime.date."""
+    return ExpressionWrapper(F(name), output_field=models.DateField())
+
+
+def _month_index(year, month):
+    if not (MIN_YEAR <= year <= MAX_YEAR and 1 <= month <= 12):
+        raise ValueError(f"{year}-{month:02d} is not a supported Nepali month.")
+    return (year - MIN_YEAR) * 12 + month - 1
+
+
+def days_in_month(year, month):
+    """Number of days of a Nepali month."""
+    return int(_table()['lengths'][_month_index(year, month)])
+
+
+def to_ad(date):
+    """The datetime.date of a nepali_datetime.date."""
+    ordinal = _table()['month_start_list'][_month_index(date.year, date.month)] + date.day - 1
+    return datetime.date.fromordinal(ordinal)
+
+
+def _bs(date):
+    table = _table()
+    offset = date.toordinal() - table['first']
+    if not 0 <= offset < len(table['bs_list']):
+        raise ValueError(f"{date} is outside the supported Nepali calendar.")
+    return table['bs_list'][offset]
+
+
+def to_bs(date):
+    """The nepali_datetime.date of a datetime.date."""
+    return nepali_datetime.date(*_bs(date))
+
+
+def bs_isoformat(date):
+    """The BS date of a datetime.date as ``YYYY-MM-DD``, without building a nepali_datetime.date."""
+    return '%04d-%02d-%02d' % _bs(date)
+
+
+def _offsets(dates):
+    table = _table()
+    offsets = np.fromiter((date.toordinal() for date in dates), dtype=np.int64, count=len(dates)) - table['first']
+    if len(offsets) and (offsets.min() < 0 or offsets.max() >= len(table['days'])):
+        raise ValueError("Date outside the supported Nepali calendar.")
+    return offsets
+
+
+def _bs_parts(dates):
+    table = _table()
+    offsets = _offsets(dates)
+    return zip(table['years'][offsets].tolist(), table['months'][offsets].tolist(), table['days'][offsets].tolist())
+
+
+def _many(convert, dates):
+    dates = list(dates)
+    present = [date for date in dates if date is not None]
+    converted = iter(convert(present))
+    return [None if date is None else next(converted) for date in dates]
+
+
+def to_ad_many(dates):
+    """Convert a column of nepali_datetime.date, or None, to datetime.date."""
+    def convert(dates):
+        table = _table()
+        indexes = np.fromiter(
+            ((date.year - MIN_YEAR) * 12 + date.month - 1 for date in dates), dtype=np.int64, count=len(dates),
+        )
+        if len(indexes) and (indexes.min() < 0 or indexes.max() >= len(table['lengths'])):
+            raise ValueError("Date outside the supported Nepali calendar.")
+        days = np.fromiter((date.day for date in dates), dtype=np.int64, count=len(dates))
+        return map(datetime.date.fromordinal, (table['month_starts'][indexes] + days - 1).tolist())
+    return _many(convert, dates)
+
+
+def to_bs_many(dates):
+    """Convert a column of datetime.date, or None, to nepali_datetime.date."""
+    return _many(
+        lambda dates: [nepali_datetime.date(year, month, day) for year, month, day in _bs_parts(dates)], dates,
+    )
+
+
+def bs_isoformat_many(dates):
+    """Convert a column of datetime.date, or None, to BS ``YYYY-MM-DD`` strings."""
+    return _many(
+        lambda dates: [f'{year:04d}-{month:02d}-{day:02d}' for year, month, day in _bs_parts(dates)], dates,
+    )
@@ -0,0 +1,157 @@
+"""
+Keyset pagination for large API endpoints.
+
+KeysetPagination behaves exactly like the default PageNumberPagination
+until a request asks for keyset mode with ``?pagination=keyset`` (or
+follows a ``next`` link carrying a ``cursor``). In keyset mode a page
+starts after the last row of the previous one,
+
+    WHERE date > :date OR (date = :date AND id > :id) ORDER BY date, id LIMIT n + 1
+
+so a deep page costs the same as the first one, and no COUNT(*) is run
+unless the client asks for one with ``?count=exact`` or ``?count=estimate``
+(the planner's row estimate, read from EXPLAIN).
+
+A view chooses its ordering with ``keyset_ordering``, a tuple of
+non-null model fields ending in a unique one; prefix a field with ``-``
+to walk it in descending order.
+"""
+import base64
+import binascii
+import json
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def estimate_count(queryset):
+    """The planner's row estimate for ``queryset``, or None if unavailable."""
+    if connections[queryset.db].vendor != 'postgresql':
+        return None
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def _encode_value(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+class KeysetPagination(PageNumberPagination):
+    """Page numbers by default; keyset pages on request."""
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    mode_query_param = 'pagination'
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Invalid cursor'
+
+    default_ordering = ('id',)
+
+    def get_ordering(self, view):
+        return tuple(getattr(view, 'keyset_ordering', self.default_ordering))
+
+    def use_keyset(self, request):
+        return (
+            self.cursor_query_param in request.query_params
+            or request.query_params.get(self.mode_query_param) == 'keyset'
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.ordering = self.get_ordering(view)
+        # Both modes use the keyset ordering, so page numbers are stable too
+        queryset = queryset.order_by(*self.ordering)
+
+        self.keyset = self.use_keyset(request)
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        self.count, self.count_estimated = self.get_count(queryset, request)
+
+        position = self.decode_cursor(request)
+        if position is not None:
+            try:
+                queryset = queryset.filter(self.after(position))
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+
+        rows = list(queryset[:page_size + 1])
+        self.next_position = self.position_of(rows[page_size - 1]) if len(rows) > page_size else None
+        return rows[:page_size]
+
+    def get_count(self, queryset, request):
+        """``(count, is_estimate)`` as requested by ``?count=``; ``(None, False)`` by default."""
+        mode = request.query_params.get(self.count_query_param)
+        if mode == 'exact':
+            return queryset.count(), False
+        if mode == 'estimate':
+            estimate = estimate_count(queryset)
+            if estimate is not None:
+                return estimate, True
+            return queryset.count(), False
+        return None, False
+
+    def after(self, position):
+        """Q matching the rows that come after ``position`` in the ordering."""
+        condition = Q()
+        equal = {}
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return condition
+
+    def position_of(self, obj):
+        return [
+            _encode_value(getattr(obj, obj._meta.get_field(field.lstrip('-')).attname))
+            for field in self.ordering
+        ]
+
+    def encode_cursor(self, position):
+        data = json.dumps(position, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            data = base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4))
+            position = json.loads(data)
+        except (binascii.Error, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if self.next_position is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self.get_next_link(),
+            'count': self.count,
+            'count_estimated': self.count_estimated,
+            'results': data,
+        })
+
@@ -0,0 +1,146 @@
+"""
+Versioned response cache for small, rarely changing reference tables.
+
+Every tracked model has a version number in the cache, and saving or
+deleting one of its rows bumps it (see track_versions()). A cached
+response is keyed by its URL, its media type and the current versions
+of every model it renders, so a change to any of them makes the old
+entries unreachable at once. They are never read again and age out of
+the cache; no TTL has to be guessed.
+
+Writes that send no signals (QuerySet.update(), bulk_create()) must call
+bump_version() themselves.
+
+Any Django cache backend works. With the default local-memory cache the
+versions and responses belong to one process, so a write only reaches
+the process that made it; use the file-based cache (CACHE_BACKEND and
+CACHE_LOCATION) or another shared backend when running several workers.
+"""
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from rest_framework import serializers
+from rest_framework.response import Response
+
+
+RESPONSE_TIMEOUT = 60 * 60 * 24
+# Stored with a cached response, so that conditional requests can be
+# answered from the cache; ConditionalGetMixin sets them
+VALIDATOR_HEADERS = ('ETag', 'Last-Modified')
+
+_tracked_models = set()
+
+
+def _version_key(model):
+    return f'api:version:{model._meta.label_lower}'
+
+
+def _new_version():
+    # Larger than any version handed out before, even if the old one was evicted
+    return time.time_ns()
+
+
+def _increment(model):
+    key = _version_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _new_version(), None)
+
+
+def bump_version(model):
+    """Invalidate every cached response that renders ``model``, now and again on commit."""
+    _increment(model)
+    # A concurrent request may cache the old rows under the new version before we commit
+    transaction.on_commit(lambda: _increment(model))
+
+
+def _bump_sender(sender, **kwargs):
+    bump_version(sender)
+
+
+def track_versions(*models):
+    """Bump the version of each of ``models`` whenever one of its rows is saved or deleted."""
+    for model in models:
+        _tracked_models.add(model)
+        uid = f'response-cache:{model._meta.label_lower}'
+        post_save.connect(_bump_sender, sender=model, dispatch_uid=uid)
+        post_delete.connect(_bump_sender, sender=model, dispatch_uid=uid)
+
+
+def versions(models):
+    """Current version of each of ``models``, as ``{label: version}``."""
+    keys = {_version_key(model): model._meta.label_lower for model in models}
+    found = cache.get_many(keys)
+    for key in keys.keys() - found.keys():
+        cache.add(key, _new_version(), None)
+        found[key] = cache.get(key)
+    return {label: found[key] for key, label in keys.items()}
+
+
+def rendered_models(serializer):
+    """Models whose rows ``serializer`` renders, following nested serializers."""
+    serializer = getattr(serializer, 'child', serializer)
+    models = set()
+    model = getattr(getattr(serializer, 'Meta', None), 'model', None)
+    if model is not None:
+        models.add(model)
+    for field in serializer.fields.values():
+        if isinstance(field, serializers.BaseSerializer) and not field.write_only:
+            models |= rendered_models(field)
+    return models
+
+
+class ResponseCacheMixin:
+    """
+    Caches a read-only viewset's list and detail responses against the
+    versions of the models its serializer renders. Every one of those
+    models must be registered with track_versions().
+
+    Put it before ConditionalGetMixin in the bases, so that a cached
+    response is served without the ETag being computed.
+    """
+    response_cache_timeout = RESPONSE_TIMEOUT
+
+    def get_response_cache_key(self, request):
+        models = rendered_models(self.get_serializer())
+        untracked = models - _tracked_models
+        if untracked:
+            raise ImproperlyConfigured(
+                f"{type(self).__name__} renders {sorted(model._meta.label for model in untracked)}, "
+                "which are not registered with track_versions()."
+            )
+        parts = [request.get_full_path(), getattr(request, 'accepted_media_type', None), sorted(versions(models).items())]
+        return 'api:response:' + hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+
+    def cached(self, request, action, *args, **kwargs):
+        key = self.get_response_cache_key(request)
+        entry = cache.get(key)
+        if entry is not None:
+            data, validators = entry
+            response = Response(data, headers=validators)
+            # Answer If-None-Match from the stored ETag, still without a query
+            not_modified = get_conditional_response(
+                request,
+                etag=validators.get('ETag'),
+                last_modified=parse_http_date_safe(validators.get('Last-Modified')),
+                response=response,
+            )
+            return response if not_modified is None else not_modified
+        response = action(request, *args, **kwargs)
+        if response.status_code == 200:
+            validators = {header: response[header] for header in VALIDATOR_HEADERS if response.has_header(header)}
+            cache.set(key, (response.data, validators), self.response_cache_timeout)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached(request, super().retrieve, *args, **kwargs)
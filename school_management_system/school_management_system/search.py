@@ -0,0 +1,76 @@
+"""
+Name search for students and teachers.
+
+Students and teachers carry ``search_name``, a lower-case "first middle
+last" that the database keeps up to date, with a pg_trgm GIN index on
+it. A search matches every word against that one column, either as a
+substring, like the icontains search it replaces, or by trigram word
+similarity so that misspelt names are found too. The index answers
+both, and the best matches come first.
+
+Without the pg_trgm extension (it ships with PostgreSQL's contrib
+package) there is no index and only substring matching is done.
+"""
+import django_filters
+from django_filters.constants import EMPTY_VALUES
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connections
+from django.db.models import Q
+
+
+_trigram_installed = {}
+
+
+def trigram_available(using):
+    """Whether the pg_trgm extension is installed in database ``using``."""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return False
+    key = (using, connection.settings_dict['NAME'])
+    if key not in _trigram_installed:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            _trigram_installed[key] = cursor.fetchone() is not None
+    return _trigram_installed[key]
+
+
+def search_full_name(queryset, value, person=''):
+    """
+    Filter ``queryset`` to the rows whose person matches every word of
+    ``value``, most similar names first. ``person`` is the path from the
+    queryset's model to the Student or Teacher, e.g. ``'student__student'``.
+    """
+    words = value.lower().split()
+    if not words:
+        return queryset
+    field = f'{person}__search_name' if person else 'search_name'
+    fuzzy = trigram_available(queryset.db)
+
+    q = Q()
+    for word in words:
+        match = Q(**{f'{field}__contains': word})
+        if fuzzy:
+            match |= Q(**{f'{field}__trigram_word_similar': word})
+        q &= match
+    queryset = queryset.filter(q)
+    if not fuzzy:
+        return queryset
+    return queryset.annotate(
+        name_similarity=TrigramWordSimilarity(' '.join(words), field),
+    ).order_by('-name_similarity', 'pk')
+
+
+class FullNameFilter(django_filters.CharFilter):
+    """
+    Name search on the Student or Teacher at ``field_name`` (empty for
+    the filtered model itself); see search_full_name().
+    """
+
+    def __init__(self, field_name='', **kwargs):
+        super().__init__(field_name=field_name, **kwargs)
+
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        qs = search_full_name(qs, value, self.field_name)
+        return qs.distinct() if self.distinct else qs
@@ -37,6 +37,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'debug_toolbar',
     'nepali_datetime_field',
     'rest_framework',
@@ -94,6 +95,21 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+# Per-process memory by default. Use a shared backend when running several
+# workers so that invalidations reach all of them, e.g. the file-based cache:
+# CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache
+# CACHE_LOCATION=/var/tmp/django_cache
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -141,3 +157,14 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 50,
 }
+
+# Tie policy for exam ranks: 'competition' (1, 2, 2, 4) or 'dense' (1, 2, 2, 3)
+RESULT_RANKING_TIE_POLICY = 'competition'
+
+# Attendance rows (one per entry) are always the record: every writer saves
+# rows, and the attendance list, its export and filters, the admin and the
+# rollups read them. 'packed' also keeps a copy of the rows as one
+# AttendanceMonth per student, month and period, updated by the same writes,
+# and month reports read that copy instead of scanning rows. After switching
+# to 'packed', copy the existing rows with `manage.py pack_attendance`.
+ATTENDANCE_STORAGE = 'rows'
@@ -0,0 +1,167 @@
+"""
+Compact list responses with side-loaded reference objects.
+
+With ``?compact=true`` a list response renders related objects as ids
+and adds an ``included`` section in which every referenced object
+appears once, however many rows refer to it:
+
+    {
+        "count": 50, "next": ..., "previous": ...,
+        "results": [{"id": 1, "standard": 4, "academic_year": 2, ...}, ...],
+        "included": {
+            "academics.standard": {"4": {"id": 4, "name": "Class 10", ...}},
+            "academics.academicyear": {"2": {...}}
+        }
+    }
+
+Nested serializers of foreign keys are side-loaded automatically, keyed
+by the model's label; objects nested inside them are side-loaded too.
+Serializers that flatten related rows into plain fields declare
+``INCLUDED_GROUPS`` instead, mapping an ``included`` key to the field
+holding the id and the fields that depend on it. Those fields move out
+of the rows and are rendered once per id.
+
+Fields pruned by ``?fields=`` or collapsed by ``?expand=`` are left as
+they are, so the two can be combined.
+"""
+from rest_framework import serializers
+from rest_framework.fields import SkipField
+from rest_framework.response import Response
+
+from .sparse_fields import forward_relation
+
+
+TRUE_VALUES = {'1', 'true', 'yes'}
+
+
+def _render(field, instance):
+    """The value ``field`` renders for ``instance``, or None if it has none."""
+    try:
+        attribute = field.get_attribute(instance)
+    except SkipField:
+        return None
+    return None if attribute is None else field.to_representation(attribute)
+
+
+class _Reference:
+    """A related object rendered as an id in the rows and side-loaded once."""
+
+    def __init__(self, relation, field):
+        self.relation = relation
+        self.field = field
+        self.key = relation.related_model._meta.label_lower
+        self.children = []
+        if isinstance(field, serializers.BaseSerializer):
+            self.children = _flatten(field, relation.related_model)
+
+    def render(self, instance, related):
+        if isinstance(self.field, serializers.BaseSerializer):
+            return self.field.to_representation(related)
+        # A method field renders the related object from its parent row
+        return self.field.to_representation(instance)
+
+
+def _flatten(serializer, model):
+    """Replace the nested objects of ``serializer`` with ids; return their references."""
+    references = []
+    for name, field in list(serializer.fields.items()):
+        if field.write_only or isinstance(field, serializers.ListSerializer):
+            continue
+        if not isinstance(field, (serializers.BaseSerializer, serializers.SerializerMethodField)):
+            continue
+        relation = forward_relation(model, name, field)
+        if relation is None:
+            continue
+        source = {} if relation.name == name else {'source': relation.name}
+        serializer.fields[name] = serializers.PrimaryKeyRelatedField(read_only=True, **source)
+        references.append(_Reference(relation, field))
+    return references
+
+
+class _Group:
+    """Fields of a flat serializer that depend on one related id."""
+
+    def __init__(self, serializer, key, key_field, names):
+        self.key = key
+        self.key_field = serializer.fields[key_field]
+        # A copy of the row serializer that renders just this group's fields
+        self.serializer = type(serializer)(context=serializer.context)
+        for name in list(self.serializer.fields):
+            if name not in names:
+                del self.serializer.fields[name]
+        for name in names:
+            del serializer.fields[name]
+
+    def render(self, instance):
+        return self.serializer.to_representation(instance)
+
+
+class SideLoader:
+    """Collects the objects referenced by a page of rows into ``included``."""
+
+    def __init__(self, serializer):
+        model = getattr(getattr(serializer, 'Meta', None), 'model', None)
+        self.references = _flatten(serializer, model)
+        self.groups = []
+        for key, (key_field, names) in getattr(serializer, 'INCLUDED_GROUPS', {}).items():
+            names = [name for name in names if name in serializer.fields]
+            if key_field in serializer.fields and names:
+                self.groups.append(_Group(serializer, key, key_field, names))
+        self.included = {}
+        self._seen = set()
+
+    def collect(self, instances):
+        for instance in instances:
+            self._collect_references(instance, self.references)
+            for group in self.groups:
+                value = _render(group.key_field, instance)
+                if value is None:
+                    continue
+                objects = self.included.setdefault(group.key, {})
+                if str(value) not in objects:
+                    objects[str(value)] = group.render(instance)
+        return self.included
+
+    def _collect_references(self, instance, references):
+        for reference in references:
+            related = getattr(instance, reference.relation.name)
+            if related is None:
+                continue
+            seen = (id(reference), related.pk)
+            if seen in self._seen:
+                continue
+            self._seen.add(seen)
+            # The same object reached through different paths is merged
+            objects = self.included.setdefault(reference.key, {})
+            objects.setdefault(str(related.pk), {}).update(reference.render(instance, related))
+            self._collect_references(related, reference.children)
+
+
+class SideLoadMixin:
+    """Adds the ``?compact=true`` response format to a viewset's list action."""
+    compact_query_param = 'compact'
+
+    def use_compact(self):
+        request = getattr(self, 'request', None)
+        value = request.query_params.get(self.compact_query_param, '') if request is not None else ''
+        return value.lower() in TRUE_VALUES
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_compact():
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        rows = queryset if page is None else page
+        # The view sets the serializer up first (pruning, preloads), then
+        # its nested objects are replaced with ids
+        serializer = self.get_serializer(rows, many=True)
+        side_loader = SideLoader(serializer.child)
+        results = serializer.data
+        included = side_loader.collect(rows)
+
+        if page is None:
+            return Response({'results': results, 'included': included})
+        response = self.get_paginated_response(results)
+        response.data['included'] = included
+        return response
@@ -0,0 +1,265 @@
+"""
+Sparse fieldsets and expansion control for read-only API endpoints.
+
+``?fields=id,marks_obtained_theory,student.roll_number`` keeps only the
+listed fields; dotted names select fields of nested objects.
+``?expand=student,exam_subject.exam`` keeps only the listed nested
+objects expanded and renders every other relation as its primary key.
+Without ``expand`` every nested object is expanded, as before.
+
+The pruned serializer also decides the query: relations that are no
+longer rendered are dropped from select_related(), and with ``fields``
+only the columns that are rendered are loaded. Fields computed in Python
+(SerializerMethodField, model methods) may read anything, so a request
+that keeps one of them loads the full rows and relations of the model it
+belongs to; a method field that is not named after a relation keeps the
+view's query untouched.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+
+def parse_field_paths(value):
+    """Turn ``'id,student.roll_number'`` into ``{'id': {}, 'student': {'roll_number': {}}}``."""
+    tree = {}
+    for path in value.split(','):
+        path = path.strip()
+        if not path:
+            continue
+        node = tree
+        for part in path.split('.'):
+            node = node.setdefault(part, {})
+    return tree
+
+
+def _join(prefix, name):
+    return f'{prefix}__{name}' if prefix else name
+
+
+def _model_of(serializer):
+    return getattr(getattr(serializer, 'Meta', None), 'model', None)
+
+
+def _get_field(model, name):
+    if model is None:
+        return None
+    if name == 'pk':
+        return model._meta.pk
+    try:
+        return model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+
+
+def forward_relation(model, name, field):
+    """The forward relation a serializer field renders, or None."""
+    attrs = [name] if field.source == '*' else field.source_attrs
+    if len(attrs) != 1:
+        return None
+    model_field = _get_field(model, attrs[0])
+    if model_field is not None and model_field.concrete and (model_field.many_to_one or model_field.one_to_one):
+        return model_field
+    return None
+
+
+def _is_serializer(field):
+    return isinstance(field, serializers.BaseSerializer)
+
+
+def _prune(serializer, fields, expand):
+    model = _model_of(serializer)
+    for name, field in list(serializer.fields.items()):
+        if field.write_only:
+            continue
+        if fields is not None and name not in fields:
+            del serializer.fields[name]
+            continue
+
+        relation = forward_relation(model, name, field)
+        nested = _is_serializer(field) or (relation is not None and isinstance(field, serializers.SerializerMethodField))
+        if not nested:
+            continue
+        if expand is not None and name not in expand and relation is not None:
+            source = {} if relation.name == name else {'source': relation.name}
+            serializer.fields[name] = serializers.PrimaryKeyRelatedField(read_only=True, **source)
+        elif _is_serializer(field) and not isinstance(field, serializers.ListSerializer):
+            _prune(
+                field,
+                (fields or {}).get(name) or None,
+                None if expand is None else expand.get(name, {}),
+            )
+
+
+class QueryPlan:
+    """Relations and columns a pruned serializer reads."""
+
+    def __init__(self):
+        self.related = set()    # select_related paths
+        self.columns = set()    # only() paths
+        self.full = set()       # relation paths whose rows are loaded whole ('' is the root)
+        self.subtrees = set()   # relation paths read by Python code, with everything below them
+        self.opaque = False     # some field may read anything; leave the query alone
+
+    def add(self, serializer, model, prefix=''):
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if field.source == '*':
+                relation = forward_relation(model, name, field)
+                if relation is None:
+                    self.opaque = True
+                else:
+                    path = _join(prefix, relation.name)
+                    self.columns.add(path)
+                    self.related.add(path)
+                    self.subtrees.add(path)
+                continue
+            self._add_source(field, model, prefix)
+
+    def _add_source(self, field, model, prefix):
+        path = prefix
+        for attr in field.source_attrs[:-1]:
+            model_field = _get_field(model, attr)
+            if model_field is None or not model_field.is_relation or not model_field.concrete:
+                self.opaque = True
+                return
+            self.columns.add(_join(path, attr))
+            path = _join(path, attr)
+            self.related.add(path)
+            model = model_field.related_model
+
+        last = field.source_attrs[-1]
+        model_field = _get_field(model, last)
+        if isinstance(field, serializers.ListSerializer) or getattr(field, 'many', False):
+            self.opaque = True
+        elif _is_serializer(field):
+            if model_field is None or not model_field.is_relation or not model_field.concrete:
+                self.opaque = True
+                return
+            self.columns.add(_join(path, last))
+            self.related.add(_join(path, last))
+            self.add(field, model_field.related_model, _join(path, last))
+        elif model_field is not None and model_field.concrete:
+            self.columns.add(_join(path, model_field.name))
+        else:
+            # A property or method of the model
+            self.full.add(path)
+
+    def select_related(self, original):
+        """The original select_related() paths, cut down to what is read."""
+        kept = set(self.related)
+        for path in original:
+            parts = path.split('__')
+            for length in range(len(parts), 0, -1):
+                prefix = '__'.join(parts[:length])
+                if prefix in self.related or any(
+                    prefix == subtree or prefix.startswith(subtree + '__') for subtree in self.subtrees
+                ):
+                    kept.add(prefix)
+                    break
+        # Only the longest paths are needed
+        return sorted(path for path in kept if not any(other.startswith(path + '__') for other in kept))
+
+    def only(self, model, select_related):
+        """Column paths for only(), or None when whole rows are needed."""
+        if '' in self.full:
+            return None
+        columns = set(self.columns) | {model._meta.pk.name}
+        # Keys of the root row are cheap and often read by view code
+        columns.update(field.name for field in model._meta.concrete_fields if field.is_relation)
+        for path in select_related:
+            parts = path.split('__')
+            related_model = model
+            for length, part in enumerate(parts, start=1):
+                related_model = related_model._meta.get_field(part).related_model
+                prefix = '__'.join(parts[:length])
+                columns.add(prefix)
+                if prefix in self.full or any(
+                    prefix == subtree or prefix.startswith(subtree + '__') for subtree in self.subtrees
+                ):
+                    columns.update(_join(prefix, field.name) for field in related_model._meta.concrete_fields)
+        return sorted(columns)
+
+
+def select_related_paths(queryset):
+    """The select_related() paths of ``queryset``, each parent before its children."""
+    def walk(tree, prefix):
+        for name, subtree in tree.items():
+            path = _join(prefix, name)
+            yield path
+            yield from walk(subtree, path)
+
+    select_related = queryset.query.select_related
+    if not isinstance(select_related, dict):
+        return []
+    return list(walk(select_related, ''))
+
+
+class FieldSelection:
+    """The ``fields`` and ``expand`` trees of one request."""
+
+    def __init__(self, fields=None, expand=None):
+        self.fields = fields
+        self.expand = expand
+
+    @classmethod
+    def from_request(cls, request):
+        params = getattr(request, 'query_params', {})
+        return cls(
+            parse_field_paths(params['fields']) if 'fields' in params else None,
+            parse_field_paths(params['expand']) if 'expand' in params else None,
+        )
+
+    @property
+    def active(self):
+        return self.fields is not None or self.expand is not None
+
+    def prune(self, serializer):
+        _prune(getattr(serializer, 'child', serializer), self.fields, self.expand)
+
+    def trim_queryset(self, queryset, serializer):
+        """Restrict ``queryset`` to the relations and columns ``serializer`` renders."""
+        serializer = getattr(serializer, 'child', serializer)
+        plan = QueryPlan()
+        plan.add(serializer, queryset.model)
+        if plan.opaque:
+            return queryset
+
+        select_related = plan.select_related(select_related_paths(queryset))
+        queryset = queryset.select_related(None)
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if self.fields is not None:
+            columns = plan.only(queryset.model, select_related)
+            if columns is not None:
+                queryset = queryset.only(*columns)
+        return queryset
+
+
+class SparseFieldsMixin:
+    """
+    Adds ``?fields=`` and ``?expand=`` to a read-only viewset. Both the
+    response and the queryset are cut down to the selected fields.
+    """
+
+    def get_field_selection(self):
+        if not hasattr(self, '_field_selection'):
+            self._field_selection = FieldSelection.from_request(getattr(self, 'request', None))
+        return self._field_selection
+
+    def filter_queryset(self, queryset):
+        # Views define get_queryset() themselves, so trim after filtering
+        queryset = super().filter_queryset(queryset)
+        selection = self.get_field_selection()
+        if not selection.active:
+            return queryset
+        probe = self.get_serializer_class()(context=self.get_serializer_context())
+        selection.prune(probe)
+        return selection.trim_queryset(queryset, probe)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        selection = self.get_field_selection()
+        if selection.active:
+            selection.prune(serializer)
+        return serializer